@@ -26,7 +26,8 @@ async def chat_with_agent(
     try:
         # La lógica de contexto se puede refinar aquí o mover al manager.
         # Por ahora, mantenemos una construcción de prompt simple.
-        df = state_store.load_dataframe(session_id=request.session_id)
+        # Only the rows shown in the prompt are fetched from storage
+        df = state_store.load_dataframe(request.session_id, limit=5)
         if df is None:
             df_context = "No dataset loaded."
         else:
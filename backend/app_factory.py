@@ -75,10 +75,19 @@ def create_app():
         finally:
             db.close()
 
+        # Open the pooled async StateStore used by the async endpoints
+        from backend.core.async_state_store import get_async_state_store
+        await get_async_state_store()
+
         print("--- Registered Routes ---")
         for route in app.routes:
             if hasattr(route, "methods"):
                 print(f"Path: {route.path}, Methods: {list(route.methods)}")
         print("-------------------------")
 
+    @app.on_event("shutdown")
+    async def shutdown_event():
+        from backend.core.async_state_store import close_async_state_store
+        await close_async_state_store()
+
     return app
@@ -6,16 +6,15 @@ import difflib
 from typing import List, Dict, Any
 import pandas as pd
 
+from backend.core.fingerprint import dataset_digest
+
 # --- Configuration ---
 LOG_FILE_PATH = os.path.join('data', 'logs', 'audit_log.json')
 os.makedirs(os.path.dirname(LOG_FILE_PATH), exist_ok=True)
 
 def _calculate_dataframe_hash(df: pd.DataFrame) -> str:
-    """Calculates a SHA256 hash of the dataframe's content."""
-    # The hash is based on the JSON representation of the dataframe
-    # to ensure consistency.
-    df_json = df.to_json(orient='records', date_format='iso')
-    return sha256(df_json.encode()).hexdigest()
+    """Calculates the dataset fingerprint of the dataframe's content."""
+    return dataset_digest(df)
 
 def log_data_ingestion(
     source_type: str,
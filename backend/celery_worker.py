@@ -1,5 +1,9 @@
 from celery import Celery
+from celery.signals import worker_init, worker_process_shutdown
+from kombu import Queue
+from prometheus_client import REGISTRY, CollectorRegistry, multiprocess, start_http_server
 import os
+import sys
 
 # Get Redis connection details from environment variables, with defaults for local dev
 REDIS_HOST = os.getenv("REDIS_HOST", "redis")
@@ -11,13 +15,98 @@ REDIS_PORT = os.getenv("REDIS_PORT", "6379")
 celery_app = Celery(
     broker=f"redis://{REDIS_HOST}:{REDIS_PORT}/0",
     backend=f"redis://{REDIS_HOST}:{REDIS_PORT}/0",
-    include=["backend.wpa.tasks"],  # Auto-discover tasks from this module
+    include=["backend.wpa.tasks", "backend.wpa.auto_ml.tasks", "backend.wpa.auto_ml.hpo"],  # Auto-discover tasks from these modules
     main='backend.celery_worker' # Explicitly set the main module
 )
 
+# --- Queue topology ---
+# Heavy ML work gets its own queues so a long AutoML or HPO run never sits in front
+# of pipeline jobs, and each queue can be served by a separately scaled worker pool.
+# Per queue: the tasks routed to it, whether they are long-running (acknowledged
+# only after they finish, and re-queued if their worker dies), and the settings of
+# a worker serving it (process concurrency and memory-based child recycling, KiB).
+TASK_QUEUES = {
+    "ingest_eda": {
+        "tasks": ["wpa.master_pipeline_task"], "long_running": True,
+        "concurrency": int(os.getenv("CELERY_INGEST_EDA_CONCURRENCY", 4)),
+        "max_memory_per_child": int(os.getenv("CELERY_INGEST_EDA_MAX_MEMORY_KB", 4_000_000)),
+    },
+    "automl": {
+        "tasks": ["automl.run_full_automl"], "long_running": True,
+        "concurrency": int(os.getenv("CELERY_AUTOML_CONCURRENCY", 2)),
+        "max_memory_per_child": int(os.getenv("CELERY_AUTOML_MAX_MEMORY_KB", 8_000_000)),
+    },
+    "hpo": {
+        "tasks": ["automl.run_hpo_study", "automl.run_hpo_worker"], "long_running": True,
+        "concurrency": int(os.getenv("CELERY_HPO_CONCURRENCY", 2)),
+        "max_memory_per_child": int(os.getenv("CELERY_HPO_MAX_MEMORY_KB", 8_000_000)),
+    },
+    "reports": {
+        "tasks": ["automl.finalize_hpo_study"], "long_running": False,
+        "concurrency": int(os.getenv("CELERY_REPORTS_CONCURRENCY", 4)),
+        "max_memory_per_child": int(os.getenv("CELERY_REPORTS_MAX_MEMORY_KB", 1_000_000)),
+    },
+}
+DEFAULT_QUEUE = "ingest_eda"
+# A late-acked task is redelivered when not acknowledged within this time, so it
+# must exceed the longest task (Redis transport).
+VISIBILITY_TIMEOUT_SECONDS = int(os.getenv("CELERY_VISIBILITY_TIMEOUT_SECONDS", 4 * 3600))
+
 celery_app.conf.update(
     task_track_started=True,
+    task_queues=[Queue(name) for name in TASK_QUEUES],
+    task_default_queue=DEFAULT_QUEUE,
+    task_routes={task: {"queue": name} for name, queue in TASK_QUEUES.items() for task in queue["tasks"]},
+    task_annotations={
+        task: {"acks_late": True, "reject_on_worker_lost": True}
+        for queue in TASK_QUEUES.values() if queue["long_running"] for task in queue["tasks"]
+    },
+    # Reserve one task per process at a time, so long tasks are not prefetched onto busy workers
+    worker_prefetch_multiplier=1,
+    worker_max_memory_per_child=int(os.getenv("CELERY_MAX_MEMORY_PER_CHILD_KB", 4_000_000)),
+    broker_transport_options={"visibility_timeout": VISIBILITY_TIMEOUT_SECONDS},
 )
 
+def worker_argv(queues):
+    """
+    Celery worker arguments for a pool serving `queues`: the concurrency of the
+    queues adds up and the most generous memory limit applies.
+    """
+    unknown = [name for name in queues if name not in TASK_QUEUES]
+    if unknown:
+        raise ValueError(f"Unknown queues {unknown}; expected some of {list(TASK_QUEUES)}.")
+    return [
+        "worker", "--loglevel=info",
+        f"--queues={','.join(queues)}",
+        f"--concurrency={sum(TASK_QUEUES[name]['concurrency'] for name in queues)}",
+        f"--max-memory-per-child={max(TASK_QUEUES[name]['max_memory_per_child'] for name in queues)}",
+        "--prefetch-multiplier=1",
+    ]
+
+# --- Prometheus metrics of the worker (e.g. the per-stage pipeline histograms) ---
+# Served on CELERY_METRICS_PORT when it is set. With the prefork pool the tasks run
+# in child processes: set PROMETHEUS_MULTIPROC_DIR so their metrics are collected
+# from prometheus_client's shared directory.
+CELERY_METRICS_PORT = os.getenv("CELERY_METRICS_PORT")
+
+@worker_init.connect
+def start_metrics_server(**kwargs):
+    if not CELERY_METRICS_PORT:
+        return
+    registry = None
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    start_http_server(int(CELERY_METRICS_PORT), registry=registry or REGISTRY)
+
+@worker_process_shutdown.connect
+def mark_metrics_process_dead(pid=None, **kwargs):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid or os.getpid())
+
 if __name__ == "__main__":
-    celery_app.start()
+    # `python -m backend.celery_worker automl,hpo` starts a worker pool for those queues
+    if len(sys.argv) == 2 and not sys.argv[1].startswith("-"):
+        celery_app.worker_main(worker_argv(sys.argv[1].split(",")))
+    else:
+        celery_app.start()
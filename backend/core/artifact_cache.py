@@ -0,0 +1,153 @@
+"""
+Node-local read-through cache for StateStore objects.
+
+Within a job the same objects are read from MinIO over and over (`data.parquet` by
+every AutoML task, `target.json` / `quality_report.json` by the report endpoints,
+the train/test splits by each AutoML and HPO task). With `STATE_STORE_CACHE_DIR`
+set, StateStore keeps a copy of every object it downloads in that directory and
+later reads become conditional GETs (`If-None-Match: <ETag>`): an unchanged object
+costs one round trip with an empty `304 Not Modified` response and is served from
+local disk (or the page cache), a changed one is downloaded and replaces the copy.
+Reads are therefore never stale, whichever process or node wrote the object.
+
+Each entry is one file, the object's ETag on the first line followed by its bytes,
+written to a temporary file and renamed into place, so concurrent readers always
+see a complete entry. Recency is the file's mtime (touched on every hit), which
+lets the worker processes sharing the directory keep a single LRU order and a
+single `STATE_STORE_CACHE_MAX_BYTES` budget; objects larger than the budget are
+not cached.
+
+Ranged reads (`load_dataframe` with columns/filters/limit) bypass the cache.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from functools import lru_cache
+from typing import Optional
+
+from botocore.exceptions import ClientError
+from prometheus_client import Counter
+
+CACHE_DIR = os.getenv("STATE_STORE_CACHE_DIR")
+CACHE_MAX_BYTES = int(os.getenv("STATE_STORE_CACHE_MAX_BYTES", 2 * 2**30))
+
+STATE_STORE_CACHE_REQUESTS = Counter(
+    "state_store_cache_requests", "StateStore object reads by local cache outcome", ["result"]
+)
+STATE_STORE_CACHE_HIT_BYTES = Counter(
+    "state_store_cache_hit_bytes", "Bytes served from the local StateStore cache instead of MinIO"
+)
+STATE_STORE_CACHE_EVICTIONS = Counter(
+    "state_store_cache_evictions", "Entries evicted from the local StateStore cache"
+)
+
+
+class LocalArtifactCache:
+    """
+    LRU cache of S3 objects in `directory`, bounded to `max_bytes` and validated by
+    ETag on every read. `hits`, `misses` and `evictions` count this instance's
+    activity (the Prometheus counters above aggregate the process).
+    """
+
+    def __init__(self, directory: str, max_bytes: int = CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, bucket: str, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(f"{bucket}/{key}".encode()).hexdigest())
+
+    def get(self, s3_client, bucket: str, key: str) -> Optional[bytes]:
+        """
+        Returns the object's bytes, from the local copy when MinIO confirms it is
+        current, or None if the object does not exist.
+        """
+        path = self._path(bucket, key)
+        try:
+            entry = open(path, 'rb')
+        except FileNotFoundError:
+            entry = None
+        try:
+            etag = entry.readline().rstrip(b'\n').decode() if entry is not None else None
+            try:
+                response = s3_client.get_object(Bucket=bucket, Key=key, **({'IfNoneMatch': etag} if etag else {}))
+            except ClientError as e:
+                code = e.response['Error']['Code']
+                if code == '304' and entry is not None:
+                    content = entry.read()
+                    self._touch(path)
+                    self.hits += 1
+                    STATE_STORE_CACHE_REQUESTS.labels(result="hit").inc()
+                    STATE_STORE_CACHE_HIT_BYTES.inc(len(content))
+                    return content
+                if code in ('404', 'NoSuchKey'):
+                    self._remove(path)
+                    return None
+                raise
+        finally:
+            if entry is not None:
+                entry.close()
+        content = response['Body'].read()
+        self.misses += 1
+        STATE_STORE_CACHE_REQUESTS.labels(result="miss").inc()
+        if len(content) <= self.max_bytes:
+            self._store(path, response['ETag'], content)
+        return content
+
+    def _store(self, path: str, etag: str, content: bytes):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(etag.encode() + b'\n')
+                f.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        self._evict()
+
+    def _evict(self):
+        """Removes the least recently used entries until the directory fits the budget."""
+        with self._lock:
+            entries = []
+            for dir_entry in os.scandir(self.directory):
+                if dir_entry.name.endswith('.tmp'):
+                    continue
+                try:
+                    stat = dir_entry.stat()
+                except FileNotFoundError:  # evicted by another process meanwhile
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, dir_entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+                self.evictions += 1
+                STATE_STORE_CACHE_EVICTIONS.inc()
+
+    @staticmethod
+    def _touch(path: str):
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+@lru_cache()
+def get_artifact_cache() -> Optional[LocalArtifactCache]:
+    """The process-wide cache, or None when `STATE_STORE_CACHE_DIR` is not set."""
+    return LocalArtifactCache(CACHE_DIR, CACHE_MAX_BYTES) if CACHE_DIR else None
@@ -0,0 +1,288 @@
+"""
+Asynchronous StateStore for the FastAPI endpoints.
+
+`StateStore` talks to MinIO through boto3 and to Redis through redis-py, both
+blocking; called from an `async def` endpoint, every put/get stalls the event loop
+and with it every other request served by the worker. `AsyncStateStore` has the
+same method surface with coroutine methods backed by aiobotocore and
+`redis.asyncio`, each with an explicitly sized connection pool:
+
+  * `STATE_STORE_S3_POOL_SIZE` HTTP connections to MinIO (aiobotocore's
+    `max_pool_connections`; requests beyond it wait for a free connection);
+  * `STATE_STORE_REDIS_POOL_SIZE` Redis connections in a BlockingConnectionPool
+    (requests beyond it wait up to `STATE_STORE_REDIS_POOL_TIMEOUT` seconds).
+
+Parquet (de)serialization and the SQLAlchemy session/job methods are still
+blocking, so they run in the threadpool. Files and dataframes are uploaded in
+`MULTIPART_PART_BYTES` parts, so an upload holds one part in memory at a time. The Celery workers keep using the
+synchronous StateStore.
+
+The store is opened on application startup and closed on shutdown (see
+app_factory.py); `get_async_state_store` is the FastAPI dependency.
+"""
+import asyncio
+import json
+import os
+from contextlib import AsyncExitStack
+from io import BytesIO
+from tempfile import SpooledTemporaryFile
+from typing import Any, BinaryIO, Dict, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+import redis.asyncio as aioredis
+from aiobotocore.config import AioConfig
+from aiobotocore.session import get_session
+from starlette.concurrency import run_in_threadpool
+
+from backend.core.state_store import (
+    CANCEL_FLAG_TTL_SECONDS, MINIO_ACCESS_KEY, MINIO_BUCKET, MINIO_SECRET_KEY, MINIO_URL, MULTIPART_PART_BYTES,
+    PARQUET_ROW_GROUP_ROWS, StateStore, get_state_store, write_dataframe_parquet,
+)
+
+S3_POOL_SIZE = int(os.getenv("STATE_STORE_S3_POOL_SIZE", 32))
+REDIS_POOL_SIZE = int(os.getenv("STATE_STORE_REDIS_POOL_SIZE", 64))
+REDIS_POOL_TIMEOUT_SECONDS = float(os.getenv("STATE_STORE_REDIS_POOL_TIMEOUT", 5))
+
+
+class AsyncStateStore:
+    """
+    Coroutine counterpart of StateStore. `start()` must be awaited before use and
+    `close()` releases the pools. The database methods delegate to `sync_store`.
+    """
+
+    def __init__(self, sync_store: Optional[StateStore] = None, s3_pool_size: int = S3_POOL_SIZE,
+                 redis_pool_size: int = REDIS_POOL_SIZE, endpoint_url: str = MINIO_URL):
+        self._sync_store = sync_store
+        self.s3_pool_size = s3_pool_size
+        self.redis_pool_size = redis_pool_size
+        self.endpoint_url = endpoint_url
+        self.s3_client = None
+        self.redis_client = None
+        self._exit_stack: Optional[AsyncExitStack] = None
+
+    @property
+    def sync_store(self) -> StateStore:
+        if self._sync_store is None:
+            self._sync_store = get_state_store()
+        return self._sync_store
+
+    async def start(self):
+        self._exit_stack = AsyncExitStack()
+        config = AioConfig(signature_version='s3v4', max_pool_connections=self.s3_pool_size)
+        self.s3_client = await self._exit_stack.enter_async_context(get_session().create_client(
+            's3', endpoint_url=self.endpoint_url, aws_access_key_id=MINIO_ACCESS_KEY,
+            aws_secret_access_key=MINIO_SECRET_KEY, config=config
+        ))
+        pool = aioredis.BlockingConnectionPool(
+            host=os.getenv("REDIS_HOST", "redis"), port=int(os.getenv("REDIS_PORT", 6379)), db=0,
+            decode_responses=True, max_connections=self.redis_pool_size, timeout=REDIS_POOL_TIMEOUT_SECONDS
+        )
+        self.redis_client = aioredis.Redis(connection_pool=pool)
+        return self
+
+    async def close(self):
+        if self.redis_client is not None:
+            await self.redis_client.aclose()
+            await self.redis_client.connection_pool.disconnect()
+            self.redis_client = None
+        if self._exit_stack is not None:
+            await self._exit_stack.aclose()
+            self._exit_stack, self.s3_client = None, None
+
+    # --- S3 helpers ---
+    async def _put(self, key: str, body: bytes):
+        await self.s3_client.put_object(Bucket=MINIO_BUCKET, Key=key, Body=body)
+
+    async def _put_stream(self, key: str, file: BinaryIO, part_size: int = MULTIPART_PART_BYTES):
+        """
+        Uploads a blocking binary file object: reads happen in the threadpool one part
+        at a time, anything larger than one part goes up as a multipart upload.
+        """
+        body = await run_in_threadpool(file.read, part_size)
+        if len(body) < part_size:
+            await self._put(key, body)
+            return
+        upload_id = (await self.s3_client.create_multipart_upload(Bucket=MINIO_BUCKET, Key=key))['UploadId']
+        parts = []
+        try:
+            while body:
+                response = await self.s3_client.upload_part(
+                    Bucket=MINIO_BUCKET, Key=key, UploadId=upload_id, PartNumber=len(parts) + 1, Body=body
+                )
+                parts.append({'PartNumber': len(parts) + 1, 'ETag': response['ETag']})
+                body = await run_in_threadpool(file.read, part_size)
+            await self.s3_client.complete_multipart_upload(
+                Bucket=MINIO_BUCKET, Key=key, UploadId=upload_id, MultipartUpload={'Parts': parts}
+            )
+        except BaseException:
+            await self.s3_client.abort_multipart_upload(Bucket=MINIO_BUCKET, Key=key, UploadId=upload_id)
+            raise
+
+    async def _get(self, key: str) -> Optional[bytes]:
+        try:
+            response = await self.s3_client.get_object(Bucket=MINIO_BUCKET, Key=key)
+        except self.s3_client.exceptions.NoSuchKey:
+            return None
+        async with response['Body'] as stream:
+            return await stream.read()
+
+    async def _list_keys(self, prefix: str):
+        keys = []
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        async for page in paginator.paginate(Bucket=MINIO_BUCKET, Prefix=prefix):
+            keys.extend(obj['Key'] for obj in page.get('Contents', []))
+        return keys
+
+    # --- MCP Methods (SQLAlchemy, run in the threadpool) ---
+    async def create_session(self, db):
+        return await run_in_threadpool(self.sync_store.create_session, db)
+
+    async def get_session(self, db, session_id):
+        return await run_in_threadpool(self.sync_store.get_session, db, session_id)
+
+    async def create_job(self, db, session_id, job_type: str, filename: str):
+        return await run_in_threadpool(self.sync_store.create_job, db, session_id, job_type, filename)
+
+    async def get_job(self, db, job_id):
+        return await run_in_threadpool(self.sync_store.get_job, db, job_id)
+
+    async def create_mcp_step(self, db, job_id, description: str, payload: Optional[Dict]):
+        return await run_in_threadpool(self.sync_store.create_mcp_step, db, job_id, description, payload)
+
+    async def update_scoreboard(self, db, trial_result: Dict[str, Any]):
+        return await run_in_threadpool(self.sync_store.update_scoreboard, db, trial_result)
+
+    # --- Artifact and Job Status Methods ---
+    async def save_raw_file(self, job_id: str, filename: str, content: Union[bytes, BinaryIO]):
+        key = f"raw/{job_id}/{filename}"
+        if isinstance(content, (bytes, bytearray)):
+            await self._put(key, content)
+        else:
+            await self._put_stream(key, content)
+
+    async def save_dataframe(self, job_id: str, df: pd.DataFrame):
+        # The Parquet bytes spill to disk past one part instead of growing in memory
+        with SpooledTemporaryFile(max_size=MULTIPART_PART_BYTES) as buffer:
+            def to_parquet():
+                write_dataframe_parquet(df, buffer, PARQUET_ROW_GROUP_ROWS)
+                buffer.seek(0)
+            await run_in_threadpool(to_parquet)
+            await self._put_stream(f"{job_id}/data.parquet", buffer)
+
+    async def save_parquet_file(self, job_id: str, path: str):
+        with open(path, 'rb') as f:
+            await self._put_stream(f"{job_id}/data.parquet", f)
+
+    async def load_dataframe(self, job_id: str, columns: Optional[Sequence[str]] = None,
+                             filters: Optional[List[Tuple]] = None, limit: Optional[int] = None) -> Optional[pd.DataFrame]:
+        if columns is not None or filters is not None or limit is not None:
+            # pyarrow drives the ranged reads synchronously; keep them off the event loop
+            return await run_in_threadpool(self.sync_store.load_dataframe, job_id, columns, filters, limit)
+        content = await self._get(f"{job_id}/data.parquet")
+        if content is None:
+            return None
+        return await run_in_threadpool(pd.read_parquet, BytesIO(content))
+
+    async def load_dataframe_schema(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await run_in_threadpool(self.sync_store.load_dataframe_schema, job_id)
+
+    async def load_raw_file(self, job_id: str, filename: str) -> Optional[BytesIO]:
+        content = await self._get(f"raw/{job_id}/{filename}")
+        return BytesIO(content) if content is not None else None
+
+    async def save_job_status(self, job_id: str, status: Dict[str, Any]):
+        await self.redis_client.set(f"job_status:{job_id}", json.dumps(status))
+
+    async def load_job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        status_json = await self.redis_client.get(f"job_status:{job_id}")
+        return json.loads(status_json) if status_json else None
+
+    async def save_schema_metadata(self, job_id: str, metadata: Dict[str, Any]):
+        await self.save_json_artifact(job_id, "metadata.json", metadata)
+
+    async def save_json_artifact(self, job_id: str, artifact_name: str, data: Dict[str, Any]):
+        await self._put(f"processed/{job_id}/{artifact_name}", json.dumps(data, indent=2).encode('utf-8'))
+
+    async def load_json_artifact(self, job_id: str, artifact_name: str) -> Optional[Dict[str, Any]]:
+        content = await self._get(f"processed/{job_id}/{artifact_name}")
+        return json.loads(content) if content is not None else None
+
+    async def save_figure_artifact(self, job_id: str, artifact_name: str, fig):
+        def to_png() -> bytes:
+            buffer = BytesIO(); fig.savefig(buffer, format='png', bbox_inches='tight')
+            return buffer.getvalue()
+        await self._put(f"processed/{job_id}/{artifact_name}", await run_in_threadpool(to_png))
+
+    async def save_report_artifact(self, job_id: str, artifact_name: str, content: bytes):
+        await self._put(f"processed/{job_id}/reports/{artifact_name}", content)
+
+    async def artifact_exists(self, job_id: str, artifact_name: str) -> bool:
+        try:
+            await self.s3_client.head_object(Bucket=MINIO_BUCKET, Key=f"processed/{job_id}/{artifact_name}")
+            return True
+        except self.s3_client.exceptions.ClientError as e:
+            if e.response['Error']['Code'] == '404':
+                return False
+            raise
+
+    async def load_artifact_as_bytes(self, job_id: str, artifact_name: str) -> Optional[bytes]:
+        return await self._get(f"processed/{job_id}/{artifact_name}")
+
+    async def load_object_bytes(self, key: str) -> Optional[bytes]:
+        return await self._get(key)
+
+    async def copy_job_artifacts(self, source_job_id: str, target_job_id: str) -> int:
+        keys = await self._list_keys(f"processed/{source_job_id}/") + await self._list_keys(f"{source_job_id}/")
+        await asyncio.gather(*(
+            self.s3_client.copy_object(
+                Bucket=MINIO_BUCKET, Key=key.replace(source_job_id, target_job_id, 1),
+                CopySource={'Bucket': MINIO_BUCKET, 'Key': key}
+            ) for key in keys
+        ))
+        return len(keys)
+
+    async def delete_artifacts(self, job_id: str, prefix: str) -> int:
+        keys = [{'Key': key} for key in await self._list_keys(f"processed/{job_id}/{prefix}")]
+        for i in range(0, len(keys), 1000):  # delete_objects takes at most 1000 keys
+            await self.s3_client.delete_objects(Bucket=MINIO_BUCKET, Delete={'Objects': keys[i:i + 1000]})
+        return len(keys)
+
+    # --- Job Cancellation ---
+    async def request_job_cancellation(self, job_id: str):
+        await self.redis_client.set(f"job_cancel:{job_id}", "1", ex=CANCEL_FLAG_TTL_SECONDS)
+
+    async def is_job_cancellation_requested(self, job_id: str) -> bool:
+        return bool(await self.redis_client.exists(f"job_cancel:{job_id}"))
+
+    async def clear_job_cancellation(self, job_id: str):
+        await self.redis_client.delete(f"job_cancel:{job_id}")
+
+    # --- Pipeline Result Cache ---
+    async def save_pipeline_cache_entry(self, cache_key: str, job_id: str):
+        await self.redis_client.set(f"pipeline_cache:{cache_key}", job_id)
+
+    async def load_pipeline_cache_entry(self, cache_key: str) -> Optional[str]:
+        return await self.redis_client.get(f"pipeline_cache:{cache_key}")
+
+    async def delete_pipeline_cache_entry(self, cache_key: str):
+        await self.redis_client.delete(f"pipeline_cache:{cache_key}")
+
+
+_async_state_store: Optional[AsyncStateStore] = None
+_async_state_store_lock = asyncio.Lock()
+
+
+async def get_async_state_store() -> AsyncStateStore:
+    global _async_state_store
+    if _async_state_store is None:
+        async with _async_state_store_lock:
+            if _async_state_store is None:
+                _async_state_store = await AsyncStateStore().start()
+    return _async_state_store
+
+
+async def close_async_state_store():
+    global _async_state_store
+    if _async_state_store is not None:
+        await _async_state_store.close()
+        _async_state_store = None
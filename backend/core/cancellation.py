@@ -0,0 +1,46 @@
+"""
+Cooperative job cancellation.
+
+`POST /job/{job_id}/cancel` sets a cancellation flag for the job in Redis; the
+long-running code paths (pipeline stages, AutoML candidate loops, HPO trials, SHAP)
+poll it through a `CancellationToken` and stop at their next check, keeping the
+artifacts written so far.
+"""
+import time
+from typing import Optional
+
+# A token asks Redis at most once per this many seconds.
+CANCEL_POLL_SECONDS = 1.0
+
+
+class JobCancelled(Exception):
+    """Raised by `CancellationToken.raise_if_cancelled` once the job was cancelled."""
+
+    def __init__(self, job_id: str):
+        super().__init__(f"Job {job_id} was cancelled.")
+        self.job_id = job_id
+
+
+class CancellationToken:
+    """Cancellation state of one job, read from the StateStore's Redis flag."""
+
+    def __init__(self, state_store, job_id: str, poll_interval: float = CANCEL_POLL_SECONDS):
+        self.state_store = state_store
+        self.job_id = job_id
+        self.poll_interval = poll_interval
+        self._cancelled = False
+        self._checked_at: Optional[float] = None
+
+    def is_cancelled(self) -> bool:
+        """Whether cancellation was requested. Once True it stays True."""
+        if self._cancelled:
+            return True
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.poll_interval:
+            self._checked_at = now
+            self._cancelled = bool(self.state_store.is_job_cancellation_requested(self.job_id))
+        return self._cancelled
+
+    def raise_if_cancelled(self):
+        if self.is_cancelled():
+            raise JobCancelled(self.job_id)
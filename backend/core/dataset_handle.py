@@ -0,0 +1,155 @@
+"""
+In-process dataset handoff between master pipeline stages.
+
+The pipeline's stages share the working DataFrame in memory, but every stage that
+changes it also persisted it to MinIO synchronously: ingestion wrote
+`data.parquet`, cleaning immediately overwrote it, and both waited for the Parquet
+encoding and the upload before the next stage could start.
+
+`DatasetHandle` is an immutable snapshot of a DataFrame as an Arrow IPC file on
+local disk, opened through a memory map: reading its `table` copies nothing (the
+columns are views of the page cache) and does not add to the process heap.
+
+`DatasetWriter` persists those snapshots write-behind, on its own thread, while
+the next stages already run. Snapshots are coalesced: only the newest one is ever
+uploaded, so the ingestion snapshot (recorded with `defer=True`) is normally
+replaced by the cleaning one and `data.parquet` is written once per run. A stage
+is "durable" once a snapshot at least as new as its own has been uploaded; the
+pipeline only checkpoints durable stages, so resume never restores data that is
+not in MinIO. `flush()` uploads whatever is still outstanding and re-raises the
+error of a failed upload.
+"""
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+
+from backend.core.state_store import PARQUET_ROW_GROUP_ROWS
+
+# Where the snapshots are written; a local SSD is best. Defaults to the temp directory.
+DATASET_HANDLE_DIR = os.getenv("DATASET_HANDLE_DIR")
+
+
+class DatasetHandle:
+    """
+    A DataFrame snapshot stored as a memory-mapped Arrow IPC file. `close()`
+    deletes the file; tables already obtained stay valid until released.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._table: Optional[pa.Table] = None
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, directory: Optional[str] = None) -> "DatasetHandle":
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        fd, path = tempfile.mkstemp(suffix=".arrow", dir=directory or DATASET_HANDLE_DIR)
+        os.close(fd)
+        with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=PARQUET_ROW_GROUP_ROWS)
+        return cls(path)
+
+    @property
+    def table(self) -> pa.Table:
+        """The snapshot as an Arrow table whose buffers point into the memory map."""
+        if self._table is None:
+            self._table = pa.ipc.open_file(pa.memory_map(self.path, 'r')).read_all()
+        return self._table
+
+    @property
+    def num_rows(self) -> int:
+        return self.table.num_rows
+
+    def to_pandas(self) -> pd.DataFrame:
+        return self.table.to_pandas()
+
+    def close(self):
+        self._table = None
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class DatasetWriter:
+    """
+    Write-behind persistence of a job's DatasetHandles to `{job_id}/data.parquet`.
+    `on_durable` is called (on the writer thread) after each upload that made new
+    stages durable.
+    """
+
+    def __init__(self, state_store, job_id: str, on_durable: Optional[Callable[[], None]] = None):
+        self.state_store = state_store
+        self.job_id = job_id
+        self.on_durable = on_durable
+        self.uploads = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dataset-writer")
+        self._futures: List[Future] = []
+        self._handles: List[DatasetHandle] = []
+        self._latest: Optional[Tuple[int, DatasetHandle]] = None
+        self._durable_version = 0
+        self._pending: Dict[str, int] = {}  # stage -> version of the snapshot it produced
+
+    def write(self, stage: str, handle: DatasetHandle, defer: bool = False):
+        """
+        Records `handle` as the output of `stage` and schedules its upload. With
+        `defer`, the upload is left to `flush()`, by which time a later snapshot
+        has usually replaced it.
+        """
+        with self._lock:
+            version = self._latest[0] + 1 if self._latest else 1
+            self._latest = (version, handle)
+            self._pending[stage] = version
+            self._handles.append(handle)
+        if not defer:
+            self._futures.append(self._executor.submit(self._upload_latest))
+
+    def is_durable(self, stage: str) -> bool:
+        """False while the snapshot `stage` produced is not yet (superseded and) uploaded."""
+        with self._lock:
+            return stage not in self._pending
+
+    def _upload_latest(self):
+        with self._lock:
+            if self._latest is None or self._latest[0] <= self._durable_version:
+                return
+            version, handle = self._latest
+        self.state_store.save_arrow_table(self.job_id, handle.table)
+        with self._lock:
+            self._durable_version = max(self._durable_version, version)
+            self.uploads += 1
+            durable = [stage for stage, v in self._pending.items() if v <= self._durable_version]
+            for stage in durable:
+                del self._pending[stage]
+        if durable and self.on_durable is not None:
+            self.on_durable()
+
+    def flush(self):
+        """
+        Uploads the newest snapshot if it is not yet durable and waits for all
+        uploads. Raises the last upload error if some stage is still not durable.
+        """
+        self._futures.append(self._executor.submit(self._upload_latest))
+        futures, self._futures = self._futures, []
+        errors = []
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                errors.append(e)
+        with self._lock:
+            outstanding = bool(self._pending)
+        if errors and outstanding:
+            raise errors[-1]
+
+    def close(self):
+        """Stops the writer thread and deletes the local snapshots (call `flush()` first to keep them)."""
+        self._executor.shutdown(wait=True)
+        for handle in self._handles:
+            handle.close()
+        self._handles = []
@@ -0,0 +1,203 @@
+"""
+Dataset fingerprints: one fast content digest for DataFrames, used to key caches
+(column profiles, preprocessing, MLflow dataset tags, audit entries).
+
+Every column (and the index) is split into chunks of `CHUNK_ROWS` rows. A chunk is
+hashed with xxh3-64 over pandas' per-row value hashes, which are stable for numeric,
+object, categorical and datetime data alike; a column digest combines its name,
+dtype and chunk hashes, and the dataset digest combines the column digests
+(a two-level Merkle tree). Given the previous fingerprint of the same job, only the
+chunks that can have changed are rehashed: those of the columns the caller reports
+as changed and, when rows were appended, the chunks from the first new row on.
+`FingerprintBuilder` fingerprints a dataset that arrives in row batches (a streamed
+upload) without ever holding it whole.
+
+The per-job `FingerprintCache` also remembers which frame its fingerprint was taken
+of, so the stages that only read the job's dataset (profiling, target detection)
+get the digest without hashing it again. A frame that is modified in place must be
+re-fingerprinted with the changed columns.
+"""
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import xxhash
+
+CHUNK_ROWS = 65_536
+INDEX_KEY = "__index__"
+# Fingerprints kept per process for incremental rehashing, most recent job last.
+FINGERPRINT_CACHE_SIZE = 32
+
+
+@dataclass
+class ColumnFingerprint:
+    dtype: str
+    chunks: List[str]
+    digest: str
+
+
+@dataclass
+class DatasetFingerprint:
+    digest: str
+    n_rows: int
+    chunk_rows: int
+    columns: Dict[str, ColumnFingerprint] = field(default_factory=dict)
+
+
+def _chunk_digests(row_hashes: np.ndarray, chunk_rows: int) -> List[str]:
+    return [
+        xxhash.xxh3_64_hexdigest(np.ascontiguousarray(row_hashes[i:i + chunk_rows]))
+        for i in range(0, len(row_hashes), chunk_rows)
+    ]
+
+
+def _hash_chunks(series: pd.Series, chunk_rows: int, start_chunk: int = 0) -> List[str]:
+    """xxh3-64 of each chunk of `series` from chunk `start_chunk` on."""
+    row_hashes = pd.util.hash_pandas_object(series.iloc[start_chunk * chunk_rows:], index=False).to_numpy()
+    return _chunk_digests(row_hashes, chunk_rows)
+
+
+def _column_digest(name: str, dtype: str, chunks: List[str]) -> str:
+    h = xxhash.xxh3_128()
+    h.update(f"{name}\x00{dtype}\x00".encode("utf-8"))
+    for chunk in chunks:
+        h.update(chunk.encode("ascii"))
+    return h.hexdigest()
+
+
+def _dataset_fingerprint(n_rows: int, chunk_rows: int, columns: Dict[str, ColumnFingerprint]) -> DatasetFingerprint:
+    root = xxhash.xxh3_128()
+    root.update(f"{n_rows}\x00".encode("ascii"))
+    for column in columns.values():
+        root.update(column.digest.encode("ascii"))
+    return DatasetFingerprint(digest=root.hexdigest(), n_rows=n_rows, chunk_rows=chunk_rows, columns=columns)
+
+
+def fingerprint_dataframe(
+    df: pd.DataFrame,
+    previous: Optional[DatasetFingerprint] = None,
+    changed_columns: Optional[Iterable[str]] = None,
+    appended: bool = False,
+    chunk_rows: int = CHUNK_ROWS,
+) -> DatasetFingerprint:
+    """
+    Fingerprints `df`. With a `previous` fingerprint of the same dataset, the chunk
+    hashes of columns that are not in `changed_columns` (None: every column may have
+    changed) and kept their dtype are reused. With `appended=True` the existing rows
+    are taken as unchanged and only the chunks holding new rows are rehashed.
+    """
+    if previous is not None and previous.chunk_rows != chunk_rows:
+        previous = None
+    changed = None if changed_columns is None else {str(c) for c in changed_columns}
+    n_rows = len(df)
+
+    series_by_key = {INDEX_KEY: df.index.to_series(index=pd.RangeIndex(n_rows))}
+    series_by_key.update({str(col): df[col] for col in df.columns})
+
+    columns = {}
+    for key, series in series_by_key.items():
+        dtype = str(series.dtype)
+        old = previous.columns.get(key) if previous is not None else None
+        reusable = old is not None and old.dtype == dtype and (key not in changed if changed is not None else appended)
+        if reusable and n_rows == previous.n_rows:
+            chunks = old.chunks
+        elif reusable and appended and n_rows > previous.n_rows:
+            # The last previous chunk may have been partial: rehash from it on
+            keep = previous.n_rows // chunk_rows
+            chunks = old.chunks[:keep] + _hash_chunks(series, chunk_rows, keep)
+        else:
+            chunks = _hash_chunks(series, chunk_rows)
+        columns[key] = ColumnFingerprint(dtype=dtype, chunks=chunks, digest=_column_digest(key, dtype, chunks))
+    return _dataset_fingerprint(n_rows, chunk_rows, columns)
+
+
+def dataset_digest(df: pd.DataFrame) -> str:
+    """Content digest of `df` (no incremental reuse)."""
+    return fingerprint_dataframe(df).digest
+
+
+class FingerprintBuilder:
+    """
+    Fingerprints a dataset from row batches appended in order, holding back only the
+    row hashes of each column's last, partial chunk. `fingerprint()` equals
+    `fingerprint_dataframe` of the concatenated batches (with a fresh RangeIndex),
+    provided every batch has the final frame's dtypes.
+    """
+
+    def __init__(self, chunk_rows: int = CHUNK_ROWS):
+        self.chunk_rows = chunk_rows
+        self.n_rows = 0
+        self._dtypes: Dict[str, str] = {}
+        self._chunks: Dict[str, List[str]] = {}
+        self._tails: Dict[str, np.ndarray] = {}
+
+    def append(self, batch: pd.DataFrame):
+        series_by_key = {INDEX_KEY: pd.Series(np.arange(self.n_rows, self.n_rows + len(batch), dtype=np.int64))}
+        series_by_key.update({str(col): batch[col] for col in batch.columns})
+        for key, series in series_by_key.items():
+            dtype = str(series.dtype)
+            if self._dtypes.setdefault(key, dtype) != dtype:
+                self._dtypes[key] = "mixed"  # never matches a real dtype, so it is rehashed later
+            row_hashes = pd.util.hash_pandas_object(series, index=False).to_numpy()
+            if key in self._tails:
+                row_hashes = np.concatenate([self._tails[key], row_hashes])
+            complete = len(row_hashes) - len(row_hashes) % self.chunk_rows
+            self._chunks.setdefault(key, []).extend(_chunk_digests(row_hashes[:complete], self.chunk_rows))
+            self._tails[key] = row_hashes[complete:]
+        self.n_rows += len(batch)
+
+    def fingerprint(self) -> DatasetFingerprint:
+        columns = {}
+        for key, dtype in self._dtypes.items():
+            chunks = self._chunks[key] + _chunk_digests(self._tails[key], self.chunk_rows)
+            columns[key] = ColumnFingerprint(dtype=dtype, chunks=chunks, digest=_column_digest(key, dtype, chunks))
+        return _dataset_fingerprint(self.n_rows, self.chunk_rows, columns)
+
+
+class FingerprintCache:
+    """
+    Last fingerprint of each job, so re-fingerprinting a job's dataset can be
+    incremental, and the frame it was taken of, so fingerprinting that same frame
+    again is free.
+    """
+
+    def __init__(self, max_jobs: int = FINGERPRINT_CACHE_SIZE):
+        self.max_jobs = max_jobs
+        self._fingerprints: "OrderedDict[str, Tuple[DatasetFingerprint, weakref.ref]]" = OrderedDict()
+
+    def get(self, job_id: str) -> Optional[DatasetFingerprint]:
+        entry = self._fingerprints.get(job_id)
+        return entry[0] if entry is not None else None
+
+    def fingerprint(self, job_id: str, df: pd.DataFrame, changed_columns: Optional[Iterable[str]] = None,
+                    appended: bool = False, previous: Optional[DatasetFingerprint] = None) -> DatasetFingerprint:
+        """
+        Fingerprints the job's current dataset, reusing the chunk hashes of its
+        previous fingerprint (or of `previous`, when given) as described in
+        `fingerprint_dataframe`. If `df` is the frame the job was last fingerprinted
+        from and no change is reported, that fingerprint is returned as is.
+        """
+        entry = self._fingerprints.get(job_id)
+        if entry is not None and previous is None and not appended and not changed_columns and entry[1]() is df:
+            fingerprint = entry[0]
+        else:
+            base = previous if previous is not None else (entry[0] if entry is not None else None)
+            fingerprint = fingerprint_dataframe(df, base, changed_columns, appended)
+        self._fingerprints[job_id] = (fingerprint, weakref.ref(df))
+        self._fingerprints.move_to_end(job_id)
+        while len(self._fingerprints) > self.max_jobs:
+            self._fingerprints.popitem(last=False)
+        return fingerprint
+
+
+_fingerprint_cache: Optional[FingerprintCache] = None
+
+
+def get_fingerprint_cache() -> FingerprintCache:
+    global _fingerprint_cache
+    if _fingerprint_cache is None:
+        _fingerprint_cache = FingerprintCache()
+    return _fingerprint_cache
@@ -0,0 +1,189 @@
+"""
+Node-wide CPU budget shared by every job running on this machine.
+
+Several Celery worker processes share a node, and each of them used to run
+`n_jobs=-1` joblib pools whose estimators spawn their own OpenMP/BLAS threads.
+The ResourceManager hands each job a core allocation out of a ledger file shared
+by all processes on the node (guarded by `flock`), and `cpu_allocation` applies
+that allocation consistently to joblib (per thread), the estimators' thread
+parameters and the BLAS/OpenMP thread pools of the worker processes (through
+`worker_env`). The BLAS/OpenMP limits of the current process (threadpoolctl) are
+process-wide, so they are only applied on request, by callers that own their
+process (a Celery task), never by pipeline stages sharing one process on several
+threads. The current allocation is exported as Prometheus gauges.
+"""
+import contextlib
+import contextvars
+import fcntl
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+
+from joblib import parallel_config
+from prometheus_client import Gauge
+from threadpoolctl import threadpool_limits
+
+from backend.core.config_loader import Config
+
+# --- Prometheus Metrics ---
+CPU_CORES_TOTAL = Gauge("cpu_budget_cores_total", "Cores the CPU budget manager may hand out on this node")
+CPU_CORES_ALLOCATED = Gauge("cpu_budget_cores_allocated", "Cores currently allocated to jobs on this node")
+CPU_ACTIVE_ALLOCATIONS = Gauge("cpu_budget_active_allocations", "Jobs currently holding a core allocation on this node")
+
+# Estimator parameters that control how many threads a model uses
+# (scikit-learn/LightGBM: n_jobs, XGBoost: nthread/n_jobs, CatBoost: thread_count).
+THREAD_PARAMS = ("n_jobs", "nthread", "num_threads", "thread_count")
+
+# Environment variables read by native thread pools of worker processes at start-up.
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "BLIS_NUM_THREADS")
+
+_active_allocation: contextvars.ContextVar = contextvars.ContextVar("cpu_allocation", default=None)
+
+
+@dataclass(frozen=True)
+class CpuAllocation:
+    """Cores granted to one job."""
+    job_id: str
+    cores: int
+
+    def worker_threads(self, n_workers: int) -> int:
+        """Threads each of `n_workers` worker processes may use without exceeding the allocation."""
+        return max(1, self.cores // max(1, n_workers))
+
+    def worker_env(self, n_workers: int) -> Dict[str, str]:
+        """Thread-limit environment for worker processes spawned under this allocation."""
+        threads = str(self.worker_threads(n_workers))
+        return {name: threads for name in THREAD_ENV_VARS}
+
+
+class ResourceManager:
+    """
+    Grants core allocations out of the node's CPU budget.
+
+    The budget defaults to `os.cpu_count()` (override with SADI_CPU_BUDGET) and a
+    single job never gets more than `ml_engine.global.max_cores_per_job`. Allocation
+    never blocks: when the node is fully booked a job still gets one core.
+    Allocations of processes that died are reclaimed on the next ledger update.
+    """
+
+    def __init__(self, total_cores: Optional[int] = None, max_cores_per_job: Optional[int] = None,
+                 ledger_path: Optional[str] = None):
+        self.total_cores = total_cores or int(os.getenv("SADI_CPU_BUDGET", 0)) or os.cpu_count() or 1
+        if max_cores_per_job is None:
+            max_cores_per_job = Config.load()["ml_engine"]["global"].get("max_cores_per_job")
+        self.max_cores_per_job = max_cores_per_job or self.total_cores
+        self.ledger_path = ledger_path or os.getenv(
+            "SADI_CPU_LEDGER", os.path.join(tempfile.gettempdir(), "sadi_cpu_ledger.json")
+        )
+        CPU_CORES_TOTAL.set(self.total_cores)
+
+    @contextlib.contextmanager
+    def _ledger(self) -> Iterator[Dict[str, Dict]]:
+        """Yields the ledger under an exclusive lock and writes it back afterwards."""
+        with open(self.ledger_path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                content = f.read()
+                ledger = json.loads(content) if content else {}
+                ledger = {key: entry for key, entry in ledger.items() if _pid_alive(entry["pid"])}
+                yield ledger
+                f.seek(0)
+                f.truncate()
+                json.dump(ledger, f)
+                f.flush()
+                CPU_CORES_ALLOCATED.set(sum(entry["cores"] for entry in ledger.values()))
+                CPU_ACTIVE_ALLOCATIONS.set(len(ledger))
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def allocate(self, job_id: str, requested_cores: Optional[int] = None) -> CpuAllocation:
+        """Grants up to `requested_cores` (default: the per-job cap) of the free cores."""
+        requested = min(requested_cores or self.max_cores_per_job, self.max_cores_per_job)
+        with self._ledger() as ledger:
+            free = self.total_cores - sum(entry["cores"] for entry in ledger.values())
+            cores = max(1, min(requested, free))
+            ledger[f"{os.getpid()}:{job_id}"] = {"pid": os.getpid(), "job_id": job_id, "cores": cores}
+        return CpuAllocation(job_id=job_id, cores=cores)
+
+    def release(self, allocation: CpuAllocation):
+        with self._ledger() as ledger:
+            ledger.pop(f"{os.getpid()}:{allocation.job_id}", None)
+
+    def allocations(self) -> Dict[str, int]:
+        """Current allocations on the node, by job_id."""
+        with self._ledger() as ledger:
+            return {entry["job_id"]: entry["cores"] for entry in ledger.values()}
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+_resource_manager: Optional[ResourceManager] = None
+
+
+def get_resource_manager() -> ResourceManager:
+    global _resource_manager
+    if _resource_manager is None:
+        _resource_manager = ResourceManager()
+    return _resource_manager
+
+
+@contextlib.contextmanager
+def cpu_allocation(job_id: str, requested_cores: Optional[int] = None,
+                   process_thread_limits: bool = False) -> Iterator[CpuAllocation]:
+    """
+    Holds a core allocation for the duration of the block and applies it: joblib's
+    default `n_jobs` in this thread is limited to the allocated cores. With
+    `process_thread_limits`, the BLAS/OpenMP thread pools of the whole process are
+    limited too; only pass it when nothing else runs in the process concurrently.
+    Nested blocks reuse the enclosing allocation.
+    """
+    outer = _active_allocation.get()
+    if outer is not None:
+        yield outer
+        return
+
+    manager = get_resource_manager()
+    allocation = manager.allocate(job_id, requested_cores)
+    token = _active_allocation.set(allocation)
+    try:
+        with parallel_config(n_jobs=allocation.cores), contextlib.ExitStack() as stack:
+            if process_thread_limits:
+                stack.enter_context(threadpool_limits(limits=allocation.cores))
+            yield allocation
+    finally:
+        _active_allocation.reset(token)
+        manager.release(allocation)
+
+
+def allocated_cores() -> int:
+    """Cores of the active allocation; 1 outside `cpu_allocation` so unmanaged code never fans out."""
+    allocation = _active_allocation.get()
+    return allocation.cores if allocation is not None else 1
+
+
+def configure_estimator_threads(estimator, n_threads: Optional[int] = None):
+    """
+    Sets every thread-count parameter of `estimator` (including nested pipeline
+    steps) to `n_threads`, defaulting to the active allocation. Returns the estimator.
+    """
+    if not hasattr(estimator, "get_params"):
+        return estimator
+    n_threads = n_threads or allocated_cores()
+    params = {
+        name: n_threads for name in estimator.get_params(deep=True)
+        if name.rsplit("__", 1)[-1] in THREAD_PARAMS
+    }
+    if params:
+        estimator.set_params(**params)
+    return estimator
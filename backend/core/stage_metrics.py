@@ -0,0 +1,179 @@
+"""
+Per-stage resource instrumentation for the master pipeline.
+
+`StageMonitor.instrument(pipeline)` wraps every stage of a PipelineDAG so each run
+records its wall time, CPU time, peak RSS, tracemalloc peak, input rows/columns and
+the bytes it wrote through the StateStore. The measurements are observed in the
+Prometheus histograms below (served by the Celery worker, see celery_worker.py) and
+kept in `StageMonitor.results` for the job manifest.
+
+Stages run concurrently on threads, so:
+  * CPU time is that of the stage's own thread (work in child processes, e.g. the
+    AutoML process pool, is not included);
+  * memory is process-wide: a sampler thread polls RSS (and, when tracing, the
+    tracemalloc peak) every `SAMPLE_INTERVAL_SECONDS` and attributes each sample to
+    every stage running at that moment;
+  * bytes written are counted per thread by StateStore (`record_bytes_written`).
+
+tracemalloc slows allocations down noticeably, so it is only enabled when
+`PIPELINE_TRACEMALLOC=1`; otherwise `tracemalloc_peak_bytes` is None.
+"""
+import os
+import resource
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict, Optional
+
+from prometheus_client import Histogram
+
+SAMPLE_INTERVAL_SECONDS = 0.05
+TRACEMALLOC_ENABLED = os.getenv("PIPELINE_TRACEMALLOC", "0") == "1"
+
+_BYTES_BUCKETS = [2**20, 16 * 2**20, 64 * 2**20, 256 * 2**20, 2**30, 4 * 2**30, 16 * 2**30]
+_SIZE_BUCKETS = [10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+
+PIPELINE_STAGE_WALL_SECONDS = Histogram(
+    "pipeline_stage_wall_seconds", "Wall time of master pipeline stages", ["stage", "status"],
+    buckets=[0.1, 0.5, 1, 5, 15, 60, 300, 900, 3600]
+)
+PIPELINE_STAGE_CPU_SECONDS = Histogram(
+    "pipeline_stage_cpu_seconds", "CPU time of the thread running a master pipeline stage", ["stage"],
+    buckets=[0.1, 0.5, 1, 5, 15, 60, 300, 900, 3600]
+)
+PIPELINE_STAGE_PEAK_RSS_BYTES = Histogram(
+    "pipeline_stage_peak_rss_bytes", "Peak process RSS while a master pipeline stage ran", ["stage"],
+    buckets=_BYTES_BUCKETS
+)
+PIPELINE_STAGE_TRACEMALLOC_PEAK_BYTES = Histogram(
+    "pipeline_stage_tracemalloc_peak_bytes", "Peak traced Python allocations while a stage ran", ["stage"],
+    buckets=_BYTES_BUCKETS
+)
+PIPELINE_STAGE_INPUT_ROWS = Histogram(
+    "pipeline_stage_input_rows", "Rows of the dataframe a master pipeline stage received", ["stage"],
+    buckets=_SIZE_BUCKETS
+)
+PIPELINE_STAGE_INPUT_COLUMNS = Histogram(
+    "pipeline_stage_input_columns", "Columns of the dataframe a master pipeline stage received", ["stage"],
+    buckets=[1, 5, 10, 25, 50, 100, 250, 1000]
+)
+PIPELINE_STAGE_ARTIFACT_BYTES = Histogram(
+    "pipeline_stage_artifact_bytes", "Bytes a master pipeline stage wrote to the StateStore", ["stage"],
+    buckets=_BYTES_BUCKETS
+)
+
+_written = threading.local()
+
+
+def record_bytes_written(n_bytes: int):
+    """Called by StateStore writes; adds to the counter of the current thread's stage."""
+    if getattr(_written, "counting", False):
+        _written.total += n_bytes
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class StageMonitor:
+    """Measures the stages of one pipeline run."""
+
+    def __init__(self, trace_allocations: bool = TRACEMALLOC_ENABLED):
+        self.trace_allocations = trace_allocations
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self._peaks: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._started_tracemalloc = False
+
+    def __enter__(self):
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._sampler = threading.Thread(target=self._sample_loop, name="stage-monitor", daemon=True)
+        self._sampler.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._sampler.join()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+
+    def _sample(self):
+        rss = current_rss_bytes()
+        traced = None
+        if self.trace_allocations and tracemalloc.is_tracing():
+            traced = tracemalloc.get_traced_memory()[1]
+            tracemalloc.reset_peak()
+        with self._lock:
+            for peaks in self._peaks.values():
+                peaks["rss"] = max(peaks["rss"], rss)
+                if traced is not None:
+                    peaks["traced"] = max(peaks["traced"], traced)
+
+    def _sample_loop(self):
+        while not self._stop.wait(SAMPLE_INTERVAL_SECONDS):
+            self._sample()
+
+    def instrument(self, pipeline):
+        """Wraps the run callable of every stage of `pipeline` with `measure`."""
+        for stage in pipeline.stages:
+            stage.run = self._wrap(stage.name, stage.run)
+        return pipeline
+
+    def _wrap(self, name, run):
+        def measured(ctx):
+            return self.measure(name, run, ctx)
+        return measured
+
+    def measure(self, name: str, run, ctx: Dict[str, Any]):
+        """Runs `run(ctx)` and records the metrics of stage `name`."""
+        df = ctx.get("df")
+        rows, cols = (int(df.shape[0]), int(df.shape[1])) if df is not None else (None, None)
+        with self._lock:
+            self._peaks[name] = {"rss": current_rss_bytes(), "traced": 0}
+        _written.counting, _written.total = True, 0
+        wall_started, cpu_started = time.perf_counter(), time.thread_time()
+        status = "completed"
+        try:
+            return run(ctx)
+        except Exception:
+            status = "failed"
+            raise
+        finally:
+            wall, cpu = time.perf_counter() - wall_started, time.thread_time() - cpu_started
+            written, _written.counting = _written.total, False
+            self._sample()
+            with self._lock:
+                peaks = self._peaks.pop(name)
+            metrics = {
+                "status": status,
+                "wall_seconds": wall,
+                "cpu_seconds": cpu,
+                "peak_rss_bytes": peaks["rss"],
+                "tracemalloc_peak_bytes": peaks["traced"] if self.trace_allocations else None,
+                "input_rows": rows,
+                "input_columns": cols,
+                "artifact_bytes_written": written,
+            }
+            self.results[name] = metrics
+            self._observe(name, metrics)
+
+    @staticmethod
+    def _observe(name: str, metrics: Dict[str, Any]):
+        PIPELINE_STAGE_WALL_SECONDS.labels(stage=name, status=metrics["status"]).observe(metrics["wall_seconds"])
+        PIPELINE_STAGE_CPU_SECONDS.labels(stage=name).observe(metrics["cpu_seconds"])
+        PIPELINE_STAGE_PEAK_RSS_BYTES.labels(stage=name).observe(metrics["peak_rss_bytes"])
+        if metrics["tracemalloc_peak_bytes"] is not None:
+            PIPELINE_STAGE_TRACEMALLOC_PEAK_BYTES.labels(stage=name).observe(metrics["tracemalloc_peak_bytes"])
+        if metrics["input_rows"] is not None:
+            PIPELINE_STAGE_INPUT_ROWS.labels(stage=name).observe(metrics["input_rows"])
+            PIPELINE_STAGE_INPUT_COLUMNS.labels(stage=name).observe(metrics["input_columns"])
+        PIPELINE_STAGE_ARTIFACT_BYTES.labels(stage=name).observe(metrics["artifact_bytes_written"])
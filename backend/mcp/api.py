@@ -1,25 +1,35 @@
 
 import uuid
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from backend.mcp.schemas import Job
 from backend.core.state_store import StateStore, get_state_store
+from backend.core.async_state_store import AsyncStateStore, get_async_state_store
 from backend.core.dependencies import get_db
 from backend.wpa.tasks import master_pipeline_task
 
 router = APIRouter(tags=["MCP - Main Control Plane"])
 
+# Job statuses after which a job can no longer be cancelled
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
 @router.post("/job/start", response_model=Job, operation_id="createJobUnified")
 async def create_job_unified(
     file: UploadFile = File(...),
+    force_recompute: bool = False,
+    preview: bool = False,
     db: Session = Depends(get_db),
-    service: StateStore = Depends(get_state_store),
+    service: AsyncStateStore = Depends(get_async_state_store),
 ):
     """
-    Unified endpoint to start a new analysis job.
+    Unified endpoint to start a new analysis job. Results of an earlier job on the
+    same file and configuration are reused unless `force_recompute` is true.
+    With `preview` true, results on a bounded sample are published first (job status
+    `preview`) while the full analysis continues.
     """
-    session = service.create_session(db)
-    job = service.create_job(db, session.session_id, job_type="unified_analysis", filename=file.filename)
+    session = await service.create_session(db)
+    job = await service.create_job(db, session.session_id, job_type="unified_analysis", filename=file.filename)
 
     if not job:
         raise HTTPException(status_code=500, detail="Failed to create a job record.")
@@ -27,17 +37,57 @@ async def create_job_unified(
     job_id = str(job.job_id)
 
     try:
-        service.save_raw_file(job_id, file.filename, await file.read())
+        # Stream the spooled upload in parts rather than reading it into memory
+        await service.save_raw_file(job_id, file.filename, file.file)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"File upload failed: {e}")
 
-    master_pipeline_task.delay(job_id)
+    await run_in_threadpool(master_pipeline_task.delay, job_id, force_recompute=force_recompute, preview=preview)
 
     initial_status = {"status": "queued", "stage": "Starting"}
-    service.save_job_status(job_id, initial_status)
+    await service.save_job_status(job_id, initial_status)
 
     return job
 
+@router.post("/job/{job_id}/cancel", operation_id="cancelJobUnified")
+def cancel_job_unified(job_id: str, service: StateStore = Depends(get_state_store)):
+    """
+    Requests cancellation of a running job. The worker stops at its next check
+    (between pipeline stages, AutoML candidates, HPO trials or SHAP batches), keeps
+    the artifacts written so far and sets the job status to `cancelled`.
+    """
+    status = service.load_job_status(job_id)
+    if not status:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    if status.get("status") in FINISHED_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Job is already {status.get('status')}.")
+
+    service.request_job_cancellation(job_id)
+    service.save_job_status(job_id, {**status, "status": "cancelling"})
+
+    return {"job_id": job_id, "status": "cancelling"}
+
+@router.post("/job/{job_id}/resume", operation_id="resumeJobUnified")
+def resume_job_unified(job_id: str, service: StateStore = Depends(get_state_store)):
+    """
+    Restarts a failed or cancelled job from its first incomplete stage. The stages
+    checkpointed in its manifest are not rerun; their persisted artifacts are reused.
+    """
+    status = service.load_job_status(job_id)
+    if not status:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    if status.get("status") not in ("failed", "cancelled"):
+        raise HTTPException(status_code=409, detail=f"Only failed or cancelled jobs can be resumed; job is {status.get('status')}.")
+
+    manifest = service.load_json_artifact(job_id, "manifest.json") or {}
+    checkpointed = list(manifest.get("checkpoints", {}))
+
+    service.clear_job_cancellation(job_id)
+    service.save_job_status(job_id, {"status": "queued", "stage": "Resuming", "checkpointed_stages": checkpointed})
+    master_pipeline_task.delay(job_id, resume=True)
+
+    return {"job_id": job_id, "status": "queued", "checkpointed_stages": checkpointed}
+
 @router.get("/job/{job_id}/status", operation_id="getJobStatusUnified")
 def get_job_status_unified(job_id: str, service: StateStore = Depends(get_state_store)):
     """Retrieves the current status of a job."""
@@ -55,7 +105,14 @@ def get_job_results(job_id: str, service: StateStore = Depends(get_state_store))
     if not manifest:
         raise HTTPException(status_code=404, detail="Job manifest not found.")
 
-    target_data = service.load_json_artifact(job_id, "target.json")
+    job_status = service.load_job_status(job_id)
+    final_status = job_status.get("status", "unknown") if job_status else manifest.get("status", "unknown")
+
+    # Until the full run completes, a ready preview stands in for its results
+    is_preview = final_status != "completed" and manifest.get("preview", {}).get("status") == "ready"
+    prefix = manifest["preview"]["artifacts_prefix"] if is_preview else ""
+
+    target_data = service.load_json_artifact(job_id, f"{prefix}target.json")
     target_info = {
         "selected_target": target_data.get("selected_target") if target_data else None,
         "confidence": target_data.get("confidence") if target_data else 0.0,
@@ -69,14 +126,12 @@ def get_job_results(job_id: str, service: StateStore = Depends(get_state_store))
             if format != "generated_at":
                 report_urls[format] = f"/unified/v1/wpa/auto-analysis/{job_id}/report/{format}"
 
-    job_status = service.load_job_status(job_id)
-    final_status = job_status.get("status", "unknown") if job_status else manifest.get("status", "unknown")
-
     return {
         "job_id": job_id,
         "status": final_status,
         "dataset_hash": manifest.get("dataset_hash"),
         "target_detection": target_info,
         "reports": report_urls,
-        "mlflow_run_id": manifest.get("mlflow_run_id")
+        "mlflow_run_id": manifest.get("mlflow_run_id"),
+        "preview": manifest["preview"] if is_preview else None,
     }
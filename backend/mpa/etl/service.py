@@ -2,6 +2,7 @@
 import pandas as pd
 import numpy as np
 import json
+from typing import List, Tuple
 
 class EtlService:
     """
@@ -12,19 +13,29 @@ class EtlService:
         self.state_store = state_store
 
     def standardize_df(self, df: pd.DataFrame) -> pd.DataFrame:
+        return self.standardize_df_with_changes(df)[0]
+
+    def standardize_df_with_changes(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, List[str]]:
+        """
+        `standardize_df`, also returning the columns it may have rewritten; all
+        other columns are left exactly as they were.
+        """
         df = df.copy()
+        changed_columns = []
         for col in df.columns:
             series = df[col]
 
             # Convert columns containing lists/dicts to JSON strings to make them hashable
             if any(isinstance(i, (list, dict)) for i in series.dropna()):
                 df[col] = series.apply(lambda x: json.dumps(x) if isinstance(x, (list, dict)) else x)
+                changed_columns.append(col)
                 continue
 
             if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
                 continue
 
             if series.dtype == object:
+                changed_columns.append(col)
                 series = series.replace(r'^\s*$', np.nan, regex=True).replace(["NA", "N/A", "null", "None"], np.nan)
                 cleaned_series = series.astype(str).str.strip()
                 is_percent = cleaned_series.str.contains("%", na=False)
@@ -50,4 +61,4 @@ class EtlService:
                     pass
 
                 df[col] = series
-        return df
+        return df, changed_columns
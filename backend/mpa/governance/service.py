@@ -17,13 +17,14 @@ class DataGovernanceService:
 
         catalog = []
         for session_id in session_ids:
-            df = self.state_store.load_dataframe(session_id)
-            if df is not None:
+            # Columns and row count come from the Parquet footer; no data is downloaded
+            schema = self.state_store.load_dataframe_schema(session_id)
+            if schema is not None:
                 catalog.append({
                     "session_id": session_id,
-                    "columns": df.columns.tolist(),
-                    "num_rows": len(df),
-                    "num_cols": len(df.columns),
+                    "columns": schema["columns"],
+                    "num_rows": schema["num_rows"],
+                    "num_cols": len(schema["columns"]),
                 })
         return catalog
 
@@ -1,5 +1,7 @@
+import asyncio
 import uuid
 from fastapi import APIRouter, File, UploadFile, Depends, Form
+from starlette.concurrency import run_in_threadpool
 from backend.mpa.ingestion.service import IngestionService, get_ingestion_service
 from backend.core.security import User, require_role
 from backend.schemas import Role
@@ -19,7 +21,10 @@ async def upload_file(
     This is the new MPA-based endpoint for file ingestion.
     **Requires DATA_SCIENTIST role.**
     """
-    df = await ingestion_service.process_uploaded_file(file, session_id)
+    # Parsing, profiling and the MinIO writes block; run the whole ingestion on a
+    # threadpool worker (in its own event loop, as the Celery task does) so it does
+    # not stall the other requests.
+    df = await run_in_threadpool(asyncio.run, ingestion_service.process_uploaded_file(file, session_id))
     # Return filename and a confirmation message, not the full data.
     return {
         "filename": file.filename,
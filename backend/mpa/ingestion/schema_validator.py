@@ -1,39 +1,39 @@
 import pandas as pd
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
-def validate_dataframe(df: pd.DataFrame) -> Dict[str, Any]:
+from backend.mpa.profiling.service import build_column_profile, describe_from_profile
+
+def validate_dataframe(df: pd.DataFrame, column_profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     Validates a DataFrame and extracts its schema and basic metadata.
 
     Args:
         df: The pandas DataFrame to validate.
+        column_profile: The dataset's column profile, if it was already computed.
 
     Returns:
         A dictionary containing metadata about the schema, including column types,
         null counts, and basic statistics.
     """
     try:
-        # Get column data types
-        types = {col: str(dtype) for col, dtype in df.dtypes.items()}
-
-        # Get null counts
-        null_counts = {col: int(df[col].isnull().sum()) for col in df.columns}
+        profile = column_profile or build_column_profile(df)
+        columns = profile["columns"]
 
         # Get basic descriptive statistics for numeric columns
-        numeric_stats = df.describe(include='number').to_dict()
+        numeric_stats = {col: describe_from_profile(c) for col, c in columns.items() if c["kind"] == "numeric"}
 
         # Get summary for object/categorical columns
-        categorical_stats = df.describe(include=['object', 'category']).to_dict()
+        categorical_stats = {col: describe_from_profile(c) for col, c in columns.items() if c["kind"] == "categorical"}
 
         schema_metadata = {
-            "row_count": len(df),
-            "column_count": len(df.columns),
+            "row_count": profile["row_count"],
+            "column_count": profile["column_count"],
             "columns": {
                 col: {
-                    "dtype": types[col],
-                    "null_count": null_counts[col],
+                    "dtype": c["dtype"],
+                    "null_count": c["null_count"],
                 }
-                for col in df.columns
+                for col, c in columns.items()
             },
             "statistics": {
                 "numeric": numeric_stats,
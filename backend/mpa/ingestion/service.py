@@ -1,16 +1,25 @@
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import io
 import os
+import csv
 import json
+import tempfile
 import chardet
-from typing import List, Optional
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple, Union
 from sqlalchemy import create_engine, text
 from fastapi import Depends, UploadFile, HTTPException
+from starlette.concurrency import run_in_threadpool
 from prometheus_client import Counter, Histogram
 
+from backend.core.cancellation import JobCancelled
+from backend.core.fingerprint import FingerprintBuilder, get_fingerprint_cache
 from backend.core.state_store import StateStore, get_state_store
 from backend.mpa.quality.service import DataQualityService, get_data_quality_service
 from backend.mpa.ingestion.schema_validator import validate_dataframe
+from backend.mpa.profiling.service import ColumnProfileStore
 
 # --- Prometheus Metrics ---
 INGESTION_FILES_PROCESSED_TOTAL = Counter(
@@ -21,6 +30,14 @@ INGESTION_FILE_SIZE_BYTES = Histogram(
     buckets=[10*1024, 100*1024, 1*1024*1024, 10*1024*1024]
 )
 
+# --- Streaming CSV ingestion settings ---
+# CSV uploads at or above this size are parsed in chunks and written to Parquet
+# row group by row group instead of being decoded into memory in one piece.
+STREAMING_CSV_MIN_BYTES = int(os.getenv("INGESTION_STREAMING_MIN_BYTES", 50 * 1024 * 1024))
+STREAMING_CSV_CHUNK_ROWS = int(os.getenv("INGESTION_STREAMING_CHUNK_ROWS", 100_000))
+# Only this many leading bytes are used for encoding and delimiter detection.
+SNIFF_PREFIX_BYTES = 64 * 1024
+
 class IngestionService:
     """
     Modular Process Architecture (MPA) service for robust data ingestion from multiple sources.
@@ -28,6 +45,7 @@ class IngestionService:
     def __init__(self, state_store: StateStore, quality_service: DataQualityService):
         self.state_store = state_store
         self.quality_service = quality_service
+        self.profile_store = ColumnProfileStore(state_store)
         self.sql_engine = create_engine('sqlite:///:memory:') # In-memory DB for SQL file processing
 
     def _read_excel(self, content: bytes) -> pd.DataFrame:
@@ -51,11 +69,139 @@ class IngestionService:
             decoded_content = content.decode('latin-1')
 
         # Auto-detect delimiter
-        sniffer = pd.io.common.sniff_text(decoded_content, 1024)
-        delimiter = sniffer.delimiter if sniffer else ','
+        _, delimiter = self._detect_csv_format(content[:SNIFF_PREFIX_BYTES])
 
         return pd.read_csv(io.StringIO(decoded_content), sep=delimiter)
 
+    def _detect_csv_format(self, prefix: bytes) -> Tuple[str, str]:
+        """Detects encoding and delimiter from the first bytes of a CSV file only."""
+        encoding = chardet.detect(prefix)['encoding'] or 'utf-8'
+        if encoding.lower() == 'ascii':
+            # An ASCII prefix says nothing about the rest of the file; UTF-8 is its superset.
+            encoding = 'utf-8'
+        sample = prefix.decode(encoding, errors='ignore')
+        # Drop the (possibly truncated) last line so the sniffer sees whole records.
+        if '\n' in sample:
+            sample = sample[:sample.rfind('\n')]
+        try:
+            delimiter = csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
+        except csv.Error:
+            delimiter = ','
+        return encoding, delimiter
+
+    def _infer_csv_dtypes(self, handle, encoding: str, delimiter: str, chunk_rows: int,
+                          check_cancelled: Optional[Callable[[], None]] = None) -> Dict[str, str]:
+        """
+        First streaming pass: reconciles the dtypes pandas infers for every chunk so
+        the second pass can parse all chunks into one consistent Parquet schema.
+        """
+        kinds: Dict[str, set] = {}
+        for chunk in pd.read_csv(handle, sep=delimiter, encoding=encoding, chunksize=chunk_rows):
+            if check_cancelled is not None:
+                check_cancelled()
+            for col, dtype in chunk.dtypes.items():
+                kinds.setdefault(col, set()).add(dtype.kind)
+
+        dtypes = {}
+        for col, col_kinds in kinds.items():
+            if col_kinds <= {'i', 'u'}:
+                dtypes[col] = 'int64'
+            elif col_kinds <= {'i', 'u', 'f'}:
+                dtypes[col] = 'float64'
+            elif col_kinds == {'b'}:
+                dtypes[col] = 'bool'
+            else:
+                dtypes[col] = 'object'
+        return dtypes
+
+    def _stream_csv_to_parquet(self, handle, parquet_path: str, chunk_rows: int,
+                               check_cancelled: Optional[Callable[[], None]] = None,
+                               on_chunk: Optional[Callable[[pd.DataFrame], None]] = None) -> int:
+        """
+        Parses a seekable binary CSV handle in bounded chunks and writes each chunk as a
+        Parquet row group. Returns the number of rows written. `check_cancelled` is
+        called before every chunk and aborts the parse by raising; `on_chunk` receives
+        every parsed chunk.
+        """
+        prefix = handle.read(SNIFF_PREFIX_BYTES)
+        encoding, delimiter = self._detect_csv_format(prefix)
+
+        handle.seek(0)
+        try:
+            dtypes = self._infer_csv_dtypes(handle, encoding, delimiter, chunk_rows, check_cancelled)
+        except UnicodeDecodeError:
+            # Same fallback as the in-memory reader, decided before anything is written.
+            encoding = 'latin-1'
+            handle.seek(0)
+            dtypes = self._infer_csv_dtypes(handle, encoding, delimiter, chunk_rows, check_cancelled)
+
+        arrow_types = {'int64': pa.int64(), 'float64': pa.float64(), 'bool': pa.bool_(), 'object': pa.string()}
+        schema = pa.schema([(col, arrow_types[dtype]) for col, dtype in dtypes.items()])
+
+        handle.seek(0)
+        n_rows = 0
+        with pq.ParquetWriter(parquet_path, schema) as writer:
+            reader = pd.read_csv(handle, sep=delimiter, encoding=encoding, dtype=dtypes, chunksize=chunk_rows)
+            for chunk in reader:
+                if check_cancelled is not None:
+                    check_cancelled()
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+                if on_chunk is not None:
+                    on_chunk(chunk)
+                n_rows += len(chunk)
+        return n_rows
+
+    def _upload_size(self, file: UploadFile) -> int:
+        """Returns the upload size without reading its content into memory."""
+        if file.size is not None:
+            return file.size
+        position = file.file.tell()
+        size = file.file.seek(0, os.SEEK_END)
+        file.file.seek(position)
+        return size
+
+    async def process_uploaded_csv_streaming(
+        self, file: UploadFile, job_id: str, chunk_rows: int = STREAMING_CSV_CHUNK_ROWS,
+        should_stop: Optional[Callable[[], bool]] = None, persist_dataframe: bool = True
+    ) -> pd.DataFrame:
+        """
+        Streaming ingestion for large CSV uploads. The upload is never held in memory as
+        bytes or text: it is parsed in chunks of `chunk_rows` rows and written to a local
+        Parquet file one row group at a time, which is then uploaded as the job's
+        `data.parquet` object (unless `persist_dataframe` is False). The returned DataFrame is
+        materialized from that Parquet file. The chunks are fingerprinted as they are
+        appended, so the job's dataset digest needs no second pass over the frame.
+        When `should_stop()` becomes True the parse stops at the next chunk with JobCancelled.
+        """
+        def check_cancelled():
+            if should_stop is not None and should_stop():
+                raise JobCancelled(job_id)
+
+        await file.seek(0)
+        size = self._upload_size(file)
+        fingerprint = FingerprintBuilder()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            parquet_path = os.path.join(tmpdir, "data.parquet")
+            try:
+                await run_in_threadpool(
+                    self._stream_csv_to_parquet, file.file, parquet_path, chunk_rows, check_cancelled, fingerprint.append
+                )
+                if persist_dataframe:
+                    self.state_store.save_parquet_file(job_id, parquet_path)
+                df = pd.read_parquet(parquet_path)
+                # Columns whose dtype changed on the Parquet round trip are rehashed
+                get_fingerprint_cache().fingerprint(job_id, df, changed_columns=(), previous=fingerprint.fingerprint())
+            except JobCancelled:
+                raise
+            except Exception as e:
+                INGESTION_FILES_PROCESSED_TOTAL.labels(file_type=".csv", status="error").inc()
+                print(f"Error streaming file {file.filename}: {e}")
+                raise HTTPException(status_code=422, detail="Failed to process file.")
+
+        INGESTION_FILES_PROCESSED_TOTAL.labels(file_type=".csv", status="success").inc()
+        INGESTION_FILE_SIZE_BYTES.observe(size)
+        return df
+
     def _read_sql(self, content: bytes) -> Optional[pd.DataFrame]:
         """Executes a SQL file against the in-memory SQLite engine."""
         query = content.decode('utf-8')
@@ -89,29 +235,120 @@ class IngestionService:
             print(f"Error processing file {file_path}: {e}")
             return None
 
-    async def process_uploaded_file(self, file: UploadFile, job_id: str) -> pd.DataFrame:
-        """Processes a single file uploaded via the API."""
-        content = await file.read()
-        df = await self._read_and_process_file_content(file.filename, content)
+    async def process_uploaded_file(self, file: UploadFile, job_id: str, streaming: Optional[bool] = None,
+                                    should_stop: Optional[Callable[[], bool]] = None,
+                                    persist_dataframe: bool = True) -> pd.DataFrame:
+        """
+        Processes a single file uploaded via the API.
+        CSV files are ingested through the streaming path when `streaming` is True, or,
+        when it is None, when the upload is at least STREAMING_CSV_MIN_BYTES large.
+        `should_stop` is checked between the ingestion steps (and between the chunks of
+        a streamed CSV); once it returns True, JobCancelled is raised.
+        With `persist_dataframe` False the dataframe is not saved as `data.parquet`;
+        the caller persists it (the master pipeline does so write-behind).
+        """
+        is_csv = os.path.splitext(file.filename)[1].lower() == '.csv'
+        if streaming is None:
+            streaming = is_csv and self._upload_size(file) >= STREAMING_CSV_MIN_BYTES
+
+        if streaming and is_csv:
+            df = await self.process_uploaded_csv_streaming(
+                file, job_id, should_stop=should_stop, persist_dataframe=persist_dataframe
+            )
+        else:
+            content = await file.read()
+            df = await self._read_and_process_file_content(file.filename, content)
 
-        if df is None:
-            raise HTTPException(status_code=422, detail="Failed to process file.")
+            if df is None:
+                raise HTTPException(status_code=422, detail="Failed to process file.")
 
-        # Save the main dataframe artifact using job_id
-        self.state_store.save_dataframe(job_id, df)
+            # Save the main dataframe artifact using job_id
+            if persist_dataframe:
+                self.state_store.save_dataframe(job_id, df)
+
+        if should_stop is not None and should_stop():
+            raise JobCancelled(job_id)
+
+        # --- Column Profile (shared by validation, quality and the later pipeline stages) ---
+        column_profile = self.profile_store.get_or_compute(job_id, df)
 
         # --- Schema Validation ---
-        schema_metadata = validate_dataframe(df)
+        schema_metadata = validate_dataframe(df, column_profile)
         self.state_store.save_schema_metadata(job_id, schema_metadata)
 
         # --- Data Quality Assurance on Ingestion ---
-        quality_report = self.quality_service.get_quality_report(df)
+        quality_report = self.quality_service.get_quality_report(df, column_profile)
         self.state_store.save_json_artifact(
             job_id, "quality_report.json", quality_report.model_dump()
         )
 
         return df
 
+    def _sample_csv(self, handle: BinaryIO, max_rows: int, random_state: int,
+                    chunk_rows: int = STREAMING_CSV_CHUNK_ROWS) -> pd.DataFrame:
+        """
+        Uniform sample of at most `max_rows` rows of a CSV read from a seekable binary
+        handle, parsed chunk by chunk: every row gets a random key and the rows with
+        the `max_rows` smallest keys are kept (bottom-k sampling), so memory stays
+        bounded by one chunk.
+        """
+        handle.seek(0)
+        encoding, delimiter = self._detect_csv_format(handle.read(SNIFF_PREFIX_BYTES))
+
+        def sample(encoding: str) -> pd.DataFrame:
+            handle.seek(0)
+            rng = np.random.default_rng(random_state)
+            kept = None
+            for chunk in pd.read_csv(handle, sep=delimiter, encoding=encoding, chunksize=chunk_rows):
+                chunk = chunk.assign(__sample_key__=rng.random(len(chunk)))
+                kept = chunk if kept is None else pd.concat([kept, chunk], ignore_index=True)
+                kept = kept.nsmallest(max_rows, "__sample_key__")
+            if kept is None:
+                return pd.DataFrame()
+            return kept.drop(columns="__sample_key__").reset_index(drop=True)
+
+        try:
+            return sample(encoding)
+        except UnicodeDecodeError:
+            # Same fallback as the streaming reader.
+            return sample('latin-1')
+
+    def _sample_frame(self, df: pd.DataFrame, max_rows: int, random_state: int) -> pd.DataFrame:
+        if len(df) <= max_rows:
+            return df
+        return df.sample(n=max_rows, random_state=random_state).reset_index(drop=True)
+
+    def read_sample(self, filename: str, content: Union[bytes, BinaryIO], max_rows: int,
+                    random_state: int = 42) -> Optional[pd.DataFrame]:
+        """
+        Reads a uniform sample of at most `max_rows` rows of an uploaded file without
+        persisting anything (preview runs). `content` is the file's bytes or a seekable
+        binary file object, whose position is restored. CSVs are sampled while being
+        parsed straight from the file, Excel workbooks are read from it; JSON and SQL
+        files are read whole and sampled.
+        """
+        ext = os.path.splitext(filename)[1].lower()
+        handle = content if hasattr(content, "read") else io.BytesIO(content)
+        position = handle.tell()
+        try:
+            handle.seek(0)
+            if ext == '.csv':
+                return self._sample_csv(handle, max_rows, random_state)
+            if ext in ['.xlsx', '.xls']:
+                df = self._read_excel(handle)
+            elif ext == '.json':
+                df = self._read_json(handle.read())
+            elif ext == '.sql':
+                df = self._read_sql(handle.read())
+            else:
+                return None
+        except Exception as e:
+            print(f"Error sampling file {filename}: {e}")
+            return None
+        finally:
+            handle.seek(position)  # the caller may still ingest the same file object
+        return None if df is None else self._sample_frame(df, max_rows, random_state)
+
 # --- Dependency Injection ---
 def get_ingestion_service(
     state_store: StateStore = Depends(get_state_store),
@@ -0,0 +1,167 @@
+"""
+Column profiling engine shared by ingestion, data quality, EDA, target detection
+and the AutoML recommender.
+
+The per-column statistics all of them need (dtype, null count, nunique,
+mean/std/min/max, quantiles, skew, top value) are computed once per dataset
+version in a single vectorized pass, persisted as a StateStore artifact keyed by
+the dataset hash and read back by every consumer of the same job.
+"""
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+from fastapi import Depends
+from scipy import stats
+
+from backend.core.fingerprint import dataset_digest, get_fingerprint_cache
+from backend.core.state_store import StateStore, get_state_store
+
+PROFILE_ARTIFACT_DIR = "profiles"
+QUANTILES = (0.25, 0.5, 0.75)
+# Profiles kept in memory per process, so consumers in the same worker skip the StateStore round trip.
+PROFILE_MEMO_SIZE = 8
+
+
+def column_kind(series: pd.Series) -> str:
+    """numeric | boolean | datetime | categorical | other."""
+    if pd.api.types.is_bool_dtype(series):
+        return "boolean"
+    if pd.api.types.is_numeric_dtype(series):
+        return "numeric"
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return "datetime"
+    if isinstance(series.dtype, (pd.CategoricalDtype, pd.StringDtype)) or pd.api.types.is_object_dtype(series):
+        return "categorical"
+    return "other"
+
+
+def _native(value: Any) -> Any:
+    """JSON-friendly scalar; NaN and infinities (e.g. the mean of an all-null column) become None."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if value is pd.NA or value is pd.NaT:
+        return None
+    return str(value)
+
+
+def build_column_profile(df: pd.DataFrame, data_hash: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Profiles every column of `df` in one pass. Numeric and boolean columns get
+    mean/std/min/max/quantiles/skew; categorical and boolean columns get the most
+    frequent value and its count.
+    """
+    kinds = {col: column_kind(df[col]) for col in df.columns}
+    null_counts = df.isna().sum()
+    nunique = df.nunique(dropna=True)
+
+    stat_cols = [col for col, kind in kinds.items() if kind in ("numeric", "boolean")]
+    stat_frame = df[stat_cols].astype({col: float for col in stat_cols if kinds[col] == "boolean"})
+    if stat_cols:
+        agg = stat_frame.agg(["mean", "std", "min", "max"])
+        quantiles = stat_frame.quantile(list(QUANTILES))
+        values = stat_frame.to_numpy(dtype=float, na_value=np.nan)
+        skew = np.ma.filled(stats.skew(values, axis=0, nan_policy="omit"), np.nan)
+
+    columns = {}
+    for col in df.columns:
+        kind = kinds[col]
+        count = int(len(df) - null_counts[col])
+        entry = {
+            "dtype": str(df[col].dtype),
+            "kind": kind,
+            "count": count,
+            "null_count": int(null_counts[col]),
+            "n_unique": int(nunique[col]),
+        }
+        if kind in ("numeric", "boolean"):
+            i = stat_cols.index(col)
+            entry.update({stat: _native(agg[col][stat]) for stat in ("mean", "std", "min", "max")})
+            entry["quantiles"] = {f"{q:.0%}": _native(quantiles[col][q]) for q in QUANTILES}
+            entry["skew"] = _native(skew[i]) if count > 0 else None
+        if kind in ("categorical", "boolean"):
+            counts = df[col].value_counts()
+            entry["top"] = _native(counts.index[0]) if len(counts) else None
+            entry["freq"] = int(counts.iloc[0]) if len(counts) else None
+        columns[str(col)] = entry
+
+    return {
+        "dataset_hash": data_hash or dataset_digest(df),
+        "row_count": int(len(df)),
+        "column_count": int(len(df.columns)),
+        "duplicate_rows": int(df.duplicated().sum()),
+        "columns": columns,
+    }
+
+
+def describe_from_profile(column: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    The `Series.describe()` dictionary of a profiled column, or None for kinds
+    the profile does not summarize (datetime, other).
+    """
+    if column["kind"] == "numeric":
+        return {
+            "count": float(column["count"]), "mean": column["mean"], "std": column["std"], "min": column["min"],
+            **column["quantiles"], "max": column["max"],
+        }
+    if column["kind"] in ("categorical", "boolean"):
+        return {"count": column["count"], "unique": column["n_unique"], "top": column["top"], "freq": column["freq"]}
+    return None
+
+
+class ColumnProfileStore:
+    """
+    Get-or-compute access to the column profile of a job's dataset. Profiles are
+    stored as `profiles/<dataset_hash>.json` artifacts of the job, so a new
+    dataset version (e.g. after cleaning) gets its own profile.
+
+    The in-process memo is shared by all jobs (and the pipeline's concurrent
+    stages) and guarded by a lock. It maps a dataset hash to its profile and the
+    jobs it was saved for, so a job served from another job's profile still gets
+    its own artifact.
+    """
+    _memo: "OrderedDict[str, Tuple[Dict[str, Any], Set[str]]]" = OrderedDict()
+    _memo_lock = threading.Lock()
+
+    def __init__(self, state_store: StateStore):
+        self.state_store = state_store
+
+    @staticmethod
+    def artifact_name(data_hash: str) -> str:
+        return f"{PROFILE_ARTIFACT_DIR}/{data_hash}.json"
+
+    def get_or_compute(self, job_id: str, df: pd.DataFrame) -> Dict[str, Any]:
+        data_hash = get_fingerprint_cache().fingerprint(job_id, df).digest
+        with self._memo_lock:
+            profile, saved_for = self._memo.get(data_hash, (None, set()))
+            saved = job_id in saved_for
+        if profile is None:
+            profile = self.state_store.load_json_artifact(job_id, self.artifact_name(data_hash))
+            saved = profile is not None
+        if profile is None:
+            profile = build_column_profile(df, data_hash)
+        if not saved:
+            self.state_store.save_json_artifact(job_id, self.artifact_name(data_hash), profile)
+
+        with self._memo_lock:
+            profile, saved_for = self._memo.setdefault(data_hash, (profile, set()))
+            saved_for.add(job_id)
+            self._memo.move_to_end(data_hash)
+            while len(self._memo) > PROFILE_MEMO_SIZE:
+                self._memo.popitem(last=False)
+        return profile
+
+
+# --- Dependency Injection ---
+def get_column_profile_store(state_store: StateStore = Depends(get_state_store)) -> ColumnProfileStore:
+    """
+    Dependency injector for the ColumnProfileStore.
+    """
+    return ColumnProfileStore(state_store)
@@ -0,0 +1,107 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import MagicMock
+from scipy import stats
+
+from backend.mpa.profiling.service import (
+    ColumnProfileStore, build_column_profile, describe_from_profile,
+)
+from backend.core.fingerprint import dataset_digest
+from backend.mpa.quality.service import DataQualityService
+
+@pytest.fixture
+def sample_dataframe():
+    """Provides a DataFrame with one column of every profiled kind."""
+    return pd.DataFrame({
+        'numeric_col': [1, 2, 3, 4, 5.5, None],
+        'int_col': [3, 1, 4, 1, 5, 9],
+        'categorical_col': ['A', 'B', 'A', 'C', 'B', 'A'],
+        'flag': [True, False, True, True, False, True],
+        'date_col': pd.to_datetime(['2021-01-01', '2021-01-02', '2021-01-03', '2021-01-04', '2021-01-05', None]),
+    })
+
+def test_profile_matches_per_column_statistics(sample_dataframe):
+    """The single-pass profile gives the same statistics as computing them column by column."""
+    profile = build_column_profile(sample_dataframe)
+
+    assert profile["row_count"] == 6
+    assert profile["dataset_hash"] == dataset_digest(sample_dataframe)
+    for col in sample_dataframe.columns:
+        series = sample_dataframe[col]
+        column = profile["columns"][col]
+        assert column["null_count"] == series.isnull().sum()
+        assert column["n_unique"] == series.nunique()
+        assert column["dtype"] == str(series.dtype)
+
+    for col in ('numeric_col', 'int_col', 'categorical_col'):
+        expected = sample_dataframe[col].describe().to_dict()
+        assert describe_from_profile(profile["columns"][col]) == pytest.approx(expected) \
+            if col != 'categorical_col' else describe_from_profile(profile["columns"][col]) == expected
+
+    assert profile["columns"]['numeric_col']["skew"] == pytest.approx(stats.skew(sample_dataframe['numeric_col'].dropna()))
+    assert profile["columns"]['flag']["mean"] == pytest.approx(sample_dataframe['flag'].mean())
+    assert describe_from_profile(profile["columns"]['date_col']) is None
+
+def test_profile_store_computes_once_per_dataset_version(sample_dataframe):
+    """The profile is saved under the dataset hash and reused; a changed dataset gets a new profile."""
+    state_store = MagicMock()
+    state_store.load_json_artifact.return_value = None
+    ColumnProfileStore._memo.clear()
+
+    store = ColumnProfileStore(state_store)
+    first = store.get_or_compute("job", sample_dataframe)
+    again = store.get_or_compute("job", sample_dataframe.copy())
+
+    assert again is first
+    state_store.save_json_artifact.assert_called_once_with(
+        "job", f"profiles/{first['dataset_hash']}.json", first
+    )
+
+    store.get_or_compute("job", sample_dataframe.dropna())
+    assert state_store.save_json_artifact.call_count == 2
+
+
+def test_profile_store_saves_the_profile_for_every_job(sample_dataframe):
+    """A job served from another job's memoized profile still gets its own artifact (resume reads it)."""
+    state_store = MagicMock()
+    state_store.load_json_artifact.return_value = None
+    ColumnProfileStore._memo.clear()
+
+    store = ColumnProfileStore(state_store)
+    first = store.get_or_compute("job-a", sample_dataframe)
+    second = store.get_or_compute("job-b", sample_dataframe)
+    store.get_or_compute("job-b", sample_dataframe)
+
+    assert second is first
+    assert [c.args[0] for c in state_store.save_json_artifact.call_args_list] == ["job-a", "job-b"]
+
+
+def test_profile_store_memo_is_safe_across_threads(monkeypatch):
+    monkeypatch.setattr("backend.mpa.profiling.service.PROFILE_MEMO_SIZE", 2)
+    state_store = MagicMock()
+    state_store.load_json_artifact.return_value = None
+    ColumnProfileStore._memo.clear()
+    frames = [pd.DataFrame({"x": np.arange(50) + i}) for i in range(16)]
+
+    store = ColumnProfileStore(state_store)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        profiles = list(pool.map(lambda i: store.get_or_compute(f"job-{i % 4}", frames[i % 16]), range(400)))
+
+    assert all(p["dataset_hash"] == dataset_digest(frames[i % 16]) for i, p in enumerate(profiles))
+    assert len(ColumnProfileStore._memo) == 2
+
+
+def test_all_null_numeric_column_profiles_to_valid_json():
+    df = pd.DataFrame({"empty": pd.Series([np.nan] * 4, dtype=float), "one": [1.0, None, None, None]})
+
+    profile = build_column_profile(df)
+    report = DataQualityService().get_quality_report(df, profile)
+
+    json.dumps(profile, allow_nan=False)
+    json.dumps(report.model_dump(), allow_nan=False)
+    assert profile["columns"]["empty"]["mean"] is None and profile["columns"]["empty"]["skew"] is None
+    assert report.column_details["one"]["std_dev"] is None and report.column_details["one"]["mean"] == 1.0
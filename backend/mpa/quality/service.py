@@ -1,6 +1,8 @@
 import pandas as pd
 from pydantic import BaseModel
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+
+from backend.mpa.profiling.service import build_column_profile
 
 class QualityReport(BaseModel):
     """Pydantic model for the data quality report."""
@@ -13,20 +15,22 @@ class DataQualityService:
     Modular Process Architecture (MPA) service for assessing data quality.
     This service is self-contained and does not depend on legacy code.
     """
-    def get_quality_report(self, df: pd.DataFrame) -> QualityReport:
+    def get_quality_report(self, df: pd.DataFrame, column_profile: Optional[Dict[str, Any]] = None) -> QualityReport:
         """
         Generates a comprehensive data quality report from a pandas DataFrame.
         Converts numpy numeric types to native Python types for JSON serialization.
+        The statistics are read from `column_profile` when the caller already has it.
         """
         if not isinstance(df, pd.DataFrame):
             raise TypeError("Input must be a pandas DataFrame.")
+        profile = column_profile or build_column_profile(df)
 
         # --- Overview ---
-        num_rows, num_cols = df.shape
+        num_rows, num_cols = profile["row_count"], profile["column_count"]
         total_cells = num_rows * num_cols
-        missing_cells = df.isnull().sum().sum()
+        missing_cells = sum(c["null_count"] for c in profile["columns"].values())
         missing_percentage = (missing_cells / total_cells) * 100 if total_cells > 0 else 0
-        duplicate_rows = df.duplicated().sum()
+        duplicate_rows = profile["duplicate_rows"]
 
         overview = {
             "num_rows": int(num_rows),
@@ -39,27 +43,23 @@ class DataQualityService:
 
         # --- Column Details ---
         column_details = {}
-        for col in df.columns:
-            series = df[col]
-            dtype = str(series.dtype)
-            missing = series.isnull().sum()
+        for col, column in profile["columns"].items():
+            missing = column["null_count"]
             missing_pct = (missing / num_rows) * 100 if num_rows > 0 else 0
-            unique_values = series.nunique()
 
             stats = {
-                "dtype": dtype,
+                "dtype": column["dtype"],
                 "missing_values": int(missing),
                 "missing_percentage": float(round(missing_pct, 2)),
-                "unique_values": int(unique_values),
+                "unique_values": int(column["n_unique"]),
             }
 
-            if pd.api.types.is_numeric_dtype(series):
-                stats["mean"] = float(series.mean())
-                stats["std_dev"] = float(series.std())
-                stats["min"] = float(series.min())
-                stats["max"] = float(series.max())
+            if column["kind"] in ("numeric", "boolean"):
+                # None when the column has no (or, for std, only one) non-null value
+                for stat, key in (("mean", "mean"), ("std_dev", "std"), ("min", "min"), ("max", "max")):
+                    stats[stat] = float(column[key]) if column[key] is not None else None
 
-            column_details[str(col)] = stats
+            column_details[col] = stats
 
         # --- Health Score Calculation ---
         score = 100.0
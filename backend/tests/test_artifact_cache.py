@@ -0,0 +1,69 @@
+import time
+
+import boto3
+import pytest
+
+from backend.core.artifact_cache import LocalArtifactCache
+from backend.core.state_store import MINIO_ACCESS_KEY, MINIO_BUCKET, MINIO_SECRET_KEY, StateStore
+
+
+@pytest.fixture(scope="module")
+def s3_client():
+    moto_server = pytest.importorskip("moto.server")  # local S3 stand-in for MinIO
+    server = moto_server.ThreadedMotoServer(ip_address="127.0.0.1", port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    client = boto3.client(
+        "s3", endpoint_url=f"http://{host}:{port}",
+        aws_access_key_id=MINIO_ACCESS_KEY, aws_secret_access_key=MINIO_SECRET_KEY
+    )
+    client.create_bucket(Bucket=MINIO_BUCKET)
+    yield client
+    server.stop()
+
+
+def test_reads_are_validated_against_the_etag(s3_client, tmp_path):
+    cache = LocalArtifactCache(str(tmp_path), max_bytes=2**20)
+    s3_client.put_object(Bucket=MINIO_BUCKET, Key="processed/job-1/target.json", Body=b'{"v": 1}')
+
+    first = cache.get(s3_client, MINIO_BUCKET, "processed/job-1/target.json")
+    second = cache.get(s3_client, MINIO_BUCKET, "processed/job-1/target.json")
+    s3_client.put_object(Bucket=MINIO_BUCKET, Key="processed/job-1/target.json", Body=b'{"v": 2}')
+    changed = cache.get(s3_client, MINIO_BUCKET, "processed/job-1/target.json")
+    s3_client.delete_object(Bucket=MINIO_BUCKET, Key="processed/job-1/target.json")
+    deleted = cache.get(s3_client, MINIO_BUCKET, "processed/job-1/target.json")
+
+    assert (first, second, changed, deleted) == (b'{"v": 1}', b'{"v": 1}', b'{"v": 2}', None)
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert not any(tmp_path.iterdir())
+
+
+def test_least_recently_used_entries_are_evicted(s3_client, tmp_path):
+    cache = LocalArtifactCache(str(tmp_path), max_bytes=2_500)
+    for name in "abcd":
+        s3_client.put_object(Bucket=MINIO_BUCKET, Key=f"lru/{name}", Body=name.encode() * 1_000)
+
+    for name in ("a", "b", "a", "c", "big"):
+        if name == "big":
+            s3_client.put_object(Bucket=MINIO_BUCKET, Key="lru/big", Body=b"x" * 3_000)
+        cache.get(s3_client, MINIO_BUCKET, f"lru/{name}")
+        time.sleep(0.01)  # distinct mtimes
+
+    assert cache.evictions == 1  # "b" made room for "c"; "big" exceeds the budget and is not cached
+    assert sorted(p.stat().st_size for p in tmp_path.iterdir()) == [1_035, 1_035]
+    assert cache.get(s3_client, MINIO_BUCKET, "lru/a") == b"a" * 1_000
+    assert cache.get(s3_client, MINIO_BUCKET, "lru/c") == b"c" * 1_000
+    assert cache.hits == 3
+
+
+def test_state_store_reads_go_through_the_cache(s3_client, tmp_path):
+    store = StateStore.__new__(StateStore)
+    store.s3_client = s3_client
+    store.cache = LocalArtifactCache(str(tmp_path), max_bytes=2**20)
+    store.save_json_artifact("job-2", "quality_report.json", {"score": 0.9})
+
+    reads = [store.load_json_artifact("job-2", "quality_report.json") for _ in range(3)]
+
+    assert reads == [{"score": 0.9}] * 3
+    assert (store.cache.hits, store.cache.misses) == (2, 1)
+    assert store.load_json_artifact("job-2", "missing.json") is None
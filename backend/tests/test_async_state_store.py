@@ -0,0 +1,79 @@
+import asyncio
+import io
+from unittest.mock import AsyncMock
+
+import boto3
+import pandas as pd
+import pytest
+
+from backend.core.async_state_store import AsyncStateStore
+from backend.core.state_store import MINIO_ACCESS_KEY, MINIO_BUCKET, MINIO_SECRET_KEY
+
+
+@pytest.fixture(scope="module")
+def s3_endpoint():
+    moto_server = pytest.importorskip("moto.server")  # local S3 stand-in for MinIO
+    server = moto_server.ThreadedMotoServer(ip_address="127.0.0.1", port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    endpoint = f"http://{host}:{port}"
+    boto3.client(
+        "s3", endpoint_url=endpoint, aws_access_key_id=MINIO_ACCESS_KEY, aws_secret_access_key=MINIO_SECRET_KEY
+    ).create_bucket(Bucket=MINIO_BUCKET)
+    yield endpoint
+    server.stop()
+
+
+def test_artifacts_round_trip_through_the_pooled_client(s3_endpoint):
+    async def scenario():
+        store = await AsyncStateStore(s3_pool_size=4, endpoint_url=s3_endpoint).start()
+        try:
+            df = pd.DataFrame({"a": range(5), "b": list("vwxyz")})
+            await store.save_dataframe("job-1", df)
+            await store.save_json_artifact("job-1", "target.json", {"selected_target": "a"})
+            # More concurrent reads than pooled connections: they queue for a connection
+            loaded = await asyncio.gather(*(store.load_json_artifact("job-1", "target.json") for _ in range(16)))
+            return (
+                await store.load_dataframe("job-1"), loaded, await store.artifact_exists("job-1", "target.json"),
+                await store.load_json_artifact("job-1", "missing.json"), await store.delete_artifacts("job-1", ""),
+            )
+        finally:
+            await store.close()
+
+    df, loaded, exists, missing, deleted = asyncio.run(scenario())
+
+    pd.testing.assert_frame_equal(df, pd.DataFrame({"a": range(5), "b": list("vwxyz")}))
+    assert loaded == [{"selected_target": "a"}] * 16
+    assert exists and missing is None
+    assert deleted == 1
+
+
+def test_file_objects_are_streamed_in_parts(s3_endpoint):
+    payload = bytes(range(256)) * (11 * 2**20 // 256)  # three 5 MiB parts, the last one short
+
+    async def scenario():
+        store = await AsyncStateStore(endpoint_url=s3_endpoint).start()
+        try:
+            await store._put_stream("raw/job-2/big.bin", io.BytesIO(payload), part_size=5 * 2**20)
+            head = await store.s3_client.head_object(Bucket=MINIO_BUCKET, Key="raw/job-2/big.bin", PartNumber=1)
+            return head["PartsCount"], await store.load_object_bytes("raw/job-2/big.bin")
+        finally:
+            await store.close()
+
+    parts, stored = asyncio.run(scenario())
+
+    assert parts == 3
+    assert stored == payload
+
+
+def test_job_status_goes_through_the_async_redis_client():
+    store = AsyncStateStore()
+    store.redis_client = AsyncMock()
+    store.redis_client.get.return_value = '{"status": "running"}'
+
+    status = asyncio.run(store.load_job_status("job-1"))
+    asyncio.run(store.request_job_cancellation("job-1"))
+
+    assert status == {"status": "running"}
+    store.redis_client.get.assert_awaited_once_with("job_status:job-1")
+    assert store.redis_client.set.await_args.args == ("job_cancel:job-1", "1")
@@ -43,3 +43,24 @@ def test_automl_service_classification(mock_mlflow, mock_state_store):
     # Check that at least one model was tried
     assert len(summary["ranking"]) > 0
     print(f"Best model found: {summary['best_model_name']} with score {summary['best_model_score']:.4f}")
+
+@patch('backend.wpa.auto_ml.service.mlflow')
+def test_automl_service_parallel_matches_sequential(mock_mlflow, mock_state_store):
+    """
+    Training candidates in a process pool must produce the same ranking and winner
+    as training them one after another.
+    """
+    df = pd.DataFrame({
+        'feature1': [i % 17 for i in range(120)],
+        'feature2': [(i * 7) % 11 for i in range(120)],
+        'target': [1 if (i % 17) > 8 else 0 for i in range(120)]
+    })
+    automl_service = AutoMlService(mock_state_store)
+
+    sequential = automl_service.run_automl_pipeline("seq-job", df, "target", max_parallel_candidates=1)
+    parallel = automl_service.run_automl_pipeline("par-job", df, "target", max_parallel_candidates=3)
+
+    ranked_models = lambda artifacts: sorted(r["model"] for r in artifacts["summary"]["ranking"])
+    assert ranked_models(parallel) == ranked_models(sequential)
+    assert parallel["summary"]["best_model_name"] == sequential["summary"]["best_model_name"]
+    assert parallel["best_model"] is not None
@@ -0,0 +1,25 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from backend.core.cancellation import CancellationToken, JobCancelled
+
+
+def test_token_polls_the_store_at_most_once_per_interval_and_stays_cancelled():
+    store = MagicMock()
+    store.is_job_cancellation_requested.return_value = False
+    token = CancellationToken(store, "job-1", poll_interval=60)
+
+    assert not token.is_cancelled()
+    store.is_job_cancellation_requested.return_value = True
+    assert not token.is_cancelled()  # still within the poll interval
+    assert store.is_job_cancellation_requested.call_count == 1
+
+    token.poll_interval = 0
+    assert token.is_cancelled()
+    store.is_job_cancellation_requested.return_value = False
+    assert token.is_cancelled()  # sticky once observed
+
+    with pytest.raises(JobCancelled) as excinfo:
+        token.raise_if_cancelled()
+    assert excinfo.value.job_id == "job-1"
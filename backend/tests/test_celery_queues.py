@@ -0,0 +1,27 @@
+import pytest
+
+from backend.celery_worker import TASK_QUEUES, celery_app, worker_argv
+
+
+def test_heavy_and_light_tasks_are_routed_to_separate_queues():
+    def queue_of(task_name):
+        return celery_app.amqp.router.route({}, task_name)["queue"].name
+
+    assert queue_of("wpa.master_pipeline_task") == "ingest_eda"
+    assert queue_of("automl.run_full_automl") == "automl"
+    assert queue_of("automl.run_hpo_worker") == "hpo"
+    assert queue_of("automl.finalize_hpo_study") == "reports"
+    assert celery_app.conf.worker_prefetch_multiplier == 1
+    assert celery_app.conf.task_annotations["automl.run_full_automl"]["acks_late"] is True
+    assert "automl.finalize_hpo_study" not in celery_app.conf.task_annotations
+
+
+def test_worker_argv_combines_queue_settings():
+    argv = worker_argv(["automl", "hpo"])
+    concurrency = TASK_QUEUES["automl"]["concurrency"] + TASK_QUEUES["hpo"]["concurrency"]
+
+    assert "--queues=automl,hpo" in argv
+    assert f"--concurrency={concurrency}" in argv
+    assert "--prefetch-multiplier=1" in argv
+    with pytest.raises(ValueError):
+        worker_argv(["gpu"])
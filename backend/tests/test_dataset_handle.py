@@ -0,0 +1,67 @@
+import threading
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from backend.core.dataset_handle import DatasetHandle, DatasetWriter
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({"id": range(1_000), "amount": [i / 3 for i in range(1_000)], "region": ["n", "s"] * 500})
+
+
+def test_handle_is_a_zero_copy_memory_mapped_snapshot(frame, tmp_path):
+    handle = DatasetHandle.from_dataframe(frame, directory=str(tmp_path))
+    allocated = pa.total_allocated_bytes()
+
+    table = handle.table
+
+    assert pa.total_allocated_bytes() == allocated  # buffers live in the memory map, not the Arrow heap
+    assert handle.num_rows == 1_000
+    pd.testing.assert_frame_equal(handle.to_pandas(), frame)
+    handle.close()
+    assert not any(tmp_path.iterdir())
+    assert table.column("id")[999].as_py() == 999  # still mapped after the file is removed
+
+
+def test_writer_uploads_only_the_newest_snapshot(frame, tmp_path):
+    state_store = MagicMock()
+    durable = threading.Event()
+    writer = DatasetWriter(state_store, "job-1", on_durable=durable.set)
+    ingested = DatasetHandle.from_dataframe(frame, directory=str(tmp_path))
+    cleaned = DatasetHandle.from_dataframe(frame.assign(amount=frame["amount"].round(2)), directory=str(tmp_path))
+    cleaned_table = cleaned.table
+
+    writer.write("ingestion", ingested, defer=True)
+    assert not writer.is_durable("ingestion")
+    writer.write("cleaning", cleaned)
+    writer.flush()
+    writer.close()
+
+    state_store.save_arrow_table.assert_called_once()
+    job_id, table = state_store.save_arrow_table.call_args.args
+    assert job_id == "job-1" and table.equals(cleaned_table)
+    assert writer.is_durable("ingestion") and writer.is_durable("cleaning") and durable.is_set()
+    assert writer.uploads == 1
+    assert not any(tmp_path.iterdir())
+
+
+def test_deferred_snapshot_is_uploaded_on_flush_and_failures_surface(frame, tmp_path):
+    state_store = MagicMock()
+    writer = DatasetWriter(state_store, "job-2")
+    writer.write("ingestion", DatasetHandle.from_dataframe(frame, directory=str(tmp_path)), defer=True)
+    writer.flush()
+
+    failing_store = MagicMock()
+    failing_store.save_arrow_table.side_effect = ConnectionError("MinIO unavailable")
+    failing_writer = DatasetWriter(failing_store, "job-3")
+    failing_writer.write("cleaning", DatasetHandle.from_dataframe(frame, directory=str(tmp_path)))
+
+    assert state_store.save_arrow_table.call_count == 1 and writer.is_durable("ingestion")
+    with pytest.raises(ConnectionError):
+        failing_writer.flush()
+    assert not failing_writer.is_durable("cleaning")
+    writer.close(); failing_writer.close()
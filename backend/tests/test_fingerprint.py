@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.core import fingerprint
+from backend.core.fingerprint import FingerprintCache, dataset_digest, fingerprint_dataframe
+
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(0)
+    n = 1000
+    return pd.DataFrame({
+        "amount": rng.normal(size=n),
+        "count": rng.integers(0, 10, n),
+        "segment": rng.choice(["a", "b", "c"], n),
+    })
+
+
+def test_digest_depends_on_content_only(df):
+    assert dataset_digest(df) == dataset_digest(df.copy())
+
+    changed = df.copy()
+    changed.loc[500, "segment"] = "z"
+    assert dataset_digest(changed) != dataset_digest(df)
+    assert dataset_digest(df.rename(columns={"count": "n"})) != dataset_digest(df)
+    assert dataset_digest(df.astype({"count": "float64"})) != dataset_digest(df)
+
+
+def test_changed_column_only_rehashes_that_column(df, monkeypatch):
+    previous = fingerprint_dataframe(df, chunk_rows=128)
+    changed = df.assign(count=df["count"] + 1)
+
+    hashed = []
+    original = fingerprint._hash_chunks
+    monkeypatch.setattr(fingerprint, "_hash_chunks", lambda s, *a: hashed.append(s.name) or original(s, *a))
+
+    incremental = fingerprint_dataframe(changed, previous, changed_columns=["count"], chunk_rows=128)
+
+    assert hashed == ["count"]
+    assert incremental.digest == fingerprint_dataframe(changed, chunk_rows=128).digest
+    assert incremental.columns["amount"].chunks == previous.columns["amount"].chunks
+
+
+def test_appended_rows_only_rehash_the_tail_chunks(df):
+    previous = fingerprint_dataframe(df, chunk_rows=128)
+    grown = pd.concat([df, df.iloc[:300]], ignore_index=True)
+
+    incremental = fingerprint_dataframe(grown, previous, appended=True, chunk_rows=128)
+
+    assert incremental.digest == fingerprint_dataframe(grown, chunk_rows=128).digest
+    assert incremental.columns["amount"].chunks[:7] == previous.columns["amount"].chunks[:7]
+
+
+def test_cache_keeps_the_last_fingerprint_per_job(df):
+    cache = FingerprintCache(max_jobs=1)
+    first = cache.fingerprint("job-a", df)
+    assert cache.get("job-a") is first
+
+    cache.fingerprint("job-b", df)
+    assert cache.get("job-a") is None
+
+
+def test_builder_matches_fingerprinting_the_whole_frame(df):
+    builder = fingerprint.FingerprintBuilder(chunk_rows=128)
+    for start in range(0, len(df), 300):
+        builder.append(df.iloc[start:start + 300].reset_index(drop=True))
+
+    assert builder.fingerprint() == fingerprint_dataframe(df, chunk_rows=128)
+
+
+def test_cache_does_not_rehash_the_frame_it_fingerprinted(df, monkeypatch):
+    cache = FingerprintCache()
+    first = cache.fingerprint("job-a", df)
+
+    hashed = []
+    original = fingerprint._hash_chunks
+    monkeypatch.setattr(fingerprint, "_hash_chunks", lambda s, *a: hashed.append(s.name) or original(s, *a))
+
+    assert cache.fingerprint("job-a", df) is first
+    assert hashed == []
+    cache.fingerprint("job-a", df.copy())
+    assert len(hashed) == 4  # an equal but different frame is rehashed
+
+
+def test_cleaning_only_rehashes_the_columns_it_rewrote(df, monkeypatch):
+    from backend.mpa.etl.service import EtlService
+
+    raw = df.assign(segment=(df["segment"] + " ").astype(object))
+    cache = FingerprintCache()
+    cache.fingerprint("job-a", raw)
+    cleaned, changed_columns = EtlService(state_store=None).standardize_df_with_changes(raw)
+
+    hashed = []
+    original = fingerprint._hash_chunks
+    monkeypatch.setattr(fingerprint, "_hash_chunks", lambda s, *a: hashed.append(s.name) or original(s, *a))
+    incremental = cache.fingerprint("job-a", cleaned, changed_columns=changed_columns)
+
+    assert changed_columns == hashed == ["segment"]
+    assert incremental.digest == dataset_digest(cleaned)
@@ -0,0 +1,75 @@
+import os
+import subprocess
+import sys
+
+# Heavy model libraries that must only be imported when a model is actually trained.
+LAZY_ONLY_MODULES = {
+    "tensorflow", "keras", "prophet", "catboost", "sktime",
+    "xgboost", "lightgbm", "implicit",
+}
+
+# Modules on the API and Celery worker start-up path.
+STARTUP_MODULES = ["backend.wpa.tasks", "backend.wpa.auto_ml.api"]
+
+
+def _import_time_report(modules):
+    """
+    Imports `modules` in a fresh interpreter with `-X importtime` and returns
+    a list of (cumulative_us, module_name) tuples, one per imported module.
+    """
+    env = dict(os.environ, SECRET_KEY=os.environ.get("SECRET_KEY", "import-time-test"))
+    code = "; ".join(f"import {m}" for m in modules)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, env=env, timeout=300,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+
+    report = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        report.append((int(cumulative), name.strip()))
+    return report
+
+
+def test_startup_does_not_import_heavy_model_libraries():
+    """
+    Regression guard for the lazy model catalog: importing the pipeline task and the
+    AutoML API must not import TensorFlow, Prophet, CatBoost, sktime & co.
+    """
+    report = _import_time_report(STARTUP_MODULES)
+
+    slowest = sorted(report, reverse=True)[:15]
+    print("\nSlowest imports (cumulative us):")
+    for cumulative, name in slowest:
+        print(f"{cumulative:>10}  {name}")
+
+    imported_heavy = sorted({name for _, name in report if name.split(".")[0] in LAZY_ONLY_MODULES})
+    assert not imported_heavy, f"Heavy model libraries imported at start-up: {imported_heavy}"
+
+
+def test_model_catalog_resolves_on_demand():
+    """Catalog entries resolve to the estimator / wrapper class only when requested."""
+    from sklearn.linear_model import LogisticRegression
+    from backend.wpa.auto_ml.model_mapping import MODEL_MAP, load_model_class
+    from backend.wpa.auto_ml.model_registry import MODEL_REGISTRY
+
+    assert MODEL_MAP["xgboost_classifier"]["import_path"] == "xgboost.XGBClassifier"
+    assert load_model_class("logistic_regression") is LogisticRegression
+
+    wrapper_class = MODEL_REGISTRY.get("LogisticRegression")
+    assert wrapper_class.__name__ == "LogisticRegressionWrapper"
+    assert MODEL_REGISTRY.is_loaded("LogisticRegression")
+    assert MODEL_REGISTRY.get("not_a_model") is None
+
+
+def test_model_registry_views_resolve_wrapper_classes():
+    """values()/items() hand out classes, never the import-path placeholders."""
+    from backend.wpa.auto_ml.models._base import BaseModelWrapper
+    from backend.wpa.auto_ml.model_registry import MODEL_REGISTRY
+
+    assert "GaussianNB" in MODEL_REGISTRY and list(MODEL_REGISTRY) == list(MODEL_REGISTRY.keys())
+    assert dict(MODEL_REGISTRY.items())["GaussianNB"].__name__ == "GaussianNBWrapper"
+    assert all(isinstance(cls, type) and issubclass(cls, BaseModelWrapper) for cls in MODEL_REGISTRY.values())
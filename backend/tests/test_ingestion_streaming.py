@@ -0,0 +1,115 @@
+import asyncio
+import io
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import MagicMock
+from fastapi import UploadFile
+
+from backend.core.fingerprint import dataset_digest, get_fingerprint_cache
+from backend.mpa.ingestion.service import IngestionService
+
+
+@pytest.fixture
+def ingestion_service(tmp_path):
+    """Provides an IngestionService whose StateStore copies the Parquet upload to tmp_path."""
+    state_store = MagicMock()
+    state_store.save_parquet_file.side_effect = lambda job_id, path: shutil.copy(path, tmp_path / f"{job_id}.parquet")
+    quality_service = MagicMock()
+    return IngestionService(state_store, quality_service)
+
+
+def _upload(content: bytes, filename: str = "data.csv") -> UploadFile:
+    return UploadFile(filename=filename, file=io.BytesIO(content))
+
+
+def test_streaming_csv_matches_buffered_read(ingestion_service, tmp_path):
+    """
+    The streaming path must yield the same frame as a whole-file read, even when
+    dtypes only become apparent in later chunks (int -> float, int -> string).
+    """
+    df = pd.DataFrame({
+        "id": range(250),
+        "amount": [float(i) if i < 200 else np.nan for i in range(250)],
+        "code": [str(i) if i < 240 else f"x{i}" for i in range(250)],
+        "city": ["Bogotá", "Medellín", "Cali", "Pasto", "Cúcuta"] * 50,
+    })
+    content = df.to_csv(index=False, sep=";").encode("utf-8")
+
+    result = asyncio.run(
+        ingestion_service.process_uploaded_csv_streaming(_upload(content), "job-1", chunk_rows=50)
+    )
+
+    expected = pd.read_csv(io.BytesIO(content), sep=";", dtype={"code": object})
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+    assert result["amount"].dtype == np.float64
+    assert pd.read_parquet(tmp_path / "job-1.parquet").shape == (250, 4)
+    # Fingerprinted chunk by chunk while streaming, identical to hashing the frame
+    assert get_fingerprint_cache().fingerprint("job-1", result).digest == dataset_digest(result)
+
+
+def test_streaming_csv_falls_back_to_latin1(ingestion_service):
+    """A non-UTF-8 byte after the sniffed prefix must not abort the ingestion."""
+    content = ("name,value\n" + "plain,1\n" * 20000 + "señal,2\n").encode("latin-1")
+
+    result = asyncio.run(
+        ingestion_service.process_uploaded_csv_streaming(_upload(content), "job-2", chunk_rows=5000)
+    )
+
+    assert len(result) == 20001
+    assert result["name"].iloc[-1] == "señal"
+
+
+def test_process_uploaded_file_routes_large_csv_to_streaming(ingestion_service):
+    """`streaming=True` bypasses the buffered reader and the single-object save."""
+    content = b"a,b\n1,2\n3,4\n"
+
+    df = asyncio.run(ingestion_service.process_uploaded_file(_upload(content), "job-3", streaming=True))
+
+    assert df["a"].tolist() == [1, 3]
+    ingestion_service.state_store.save_parquet_file.assert_called_once()
+    ingestion_service.state_store.save_dataframe.assert_not_called()
+
+
+def test_dataframe_is_not_saved_when_the_caller_persists_it(ingestion_service):
+    content = b"a,b\n1,2\n3,4\n"
+
+    for streaming in (True, False):
+        df = asyncio.run(ingestion_service.process_uploaded_file(
+            _upload(content), "job-4", streaming=streaming, persist_dataframe=False
+        ))
+        assert df["a"].tolist() == [1, 3]
+
+    ingestion_service.state_store.save_parquet_file.assert_not_called()
+    ingestion_service.state_store.save_dataframe.assert_not_called()
+
+
+def test_read_sample_is_bounded_and_drawn_across_chunks(ingestion_service):
+    df = pd.DataFrame({"id": range(1000), "group": ["a", "b"] * 500})
+    content = df.to_csv(index=False).encode("utf-8")
+
+    sample = ingestion_service._sample_csv(io.BytesIO(content), max_rows=100, random_state=0, chunk_rows=64)
+
+    assert len(sample) == 100
+    assert list(sample.columns) == ["id", "group"]
+    assert sample["id"].is_unique
+    # Bottom-k sampling keeps rows from the whole file, not just the first chunks
+    assert sample["id"].max() > 900
+    assert ingestion_service.read_sample("data.csv", content, max_rows=5000).shape == df.shape
+
+
+def test_read_sample_reads_from_the_file_object(ingestion_service, tmp_path):
+    """The preview samples the upload's handle directly, so its bytes are never copied whole."""
+    df = pd.DataFrame({"id": range(300), "city": ["Bogotá", "Cúcuta", "Cali"] * 100})
+    content = df.to_csv(index=False).encode("latin-1")
+    (tmp_path / "data.csv").write_bytes(content)
+
+    from_bytes = ingestion_service.read_sample("data.csv", content, max_rows=50, random_state=1)
+    with open(tmp_path / "data.csv", "rb") as f:
+        from_file = ingestion_service.read_sample("data.csv", f, max_rows=50, random_state=1)
+        assert f.tell() == 0
+
+    pd.testing.assert_frame_equal(from_file, from_bytes)
+    assert len(from_file) == 50 and set(from_file["city"]) <= {"Bogotá", "Cúcuta", "Cali"}
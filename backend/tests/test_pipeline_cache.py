@@ -0,0 +1,60 @@
+import io
+from unittest.mock import MagicMock
+
+from backend.wpa.pipeline_cache import PipelineResultCache, pipeline_cache_key
+
+CONFIG = {"version": "1.0.0", "ml_engine": {"global": {"max_runtime_seconds": 900}}, "logging": {"log_level": "INFO"}}
+
+
+def test_cache_key_covers_file_content_type_and_pipeline_config():
+    key = pipeline_cache_key(b"a,b\n1,2\n", "data.csv", CONFIG)
+
+    assert pipeline_cache_key(b"a,b\n1,2\n", "other_name.CSV", CONFIG) == key
+    assert pipeline_cache_key(b"a,b\n1,3\n", "data.csv", CONFIG) != key
+    assert pipeline_cache_key(b"a,b\n1,2\n", "data.json", CONFIG) != key
+    changed = {**CONFIG, "ml_engine": {"global": {"max_runtime_seconds": 60}}}
+    assert pipeline_cache_key(b"a,b\n1,2\n", "data.csv", changed) != key
+    # Sections the pipeline results do not depend on are not part of the key
+    assert pipeline_cache_key(b"a,b\n1,2\n", "data.csv", {**CONFIG, "logging": {}}) == key
+
+
+def test_cache_key_of_a_file_object_matches_its_bytes(tmp_path, monkeypatch):
+    content = b"a,b\n" + b"1,2\n" * 1000
+    key = pipeline_cache_key(content, "data.csv", CONFIG)
+    (tmp_path / "data.csv").write_bytes(content)
+    monkeypatch.setattr("backend.wpa.pipeline_cache.RAW_FILE_READ_BYTES", 1000)
+
+    buffer = io.BytesIO(content)
+    assert pipeline_cache_key(buffer, "data.csv", CONFIG) == key
+    buffer.write(b"still writable")  # the buffer view was released
+    with open(tmp_path / "data.csv", "rb") as f:
+        f.seek(10)
+        assert pipeline_cache_key(f, "data.csv", CONFIG) == key
+        assert f.tell() == 10
+
+
+def test_lookup_only_returns_completed_jobs():
+    state_store = MagicMock()
+    state_store.load_pipeline_cache_entry.return_value = "job-1"
+    state_store.artifact_exists.return_value = True
+    cache = PipelineResultCache(state_store)
+
+    state_store.load_job_status.return_value = {"status": "completed"}
+    assert cache.lookup("key") == "job-1"
+
+    state_store.load_job_status.return_value = {"status": "failed"}
+    assert cache.lookup("key") is None
+    state_store.delete_pipeline_cache_entry.assert_called_once_with("key")
+
+
+def test_reuse_copies_artifacts_and_marks_the_manifest():
+    state_store = MagicMock()
+    state_store.copy_job_artifacts.return_value = 12
+    state_store.load_json_artifact.return_value = {"job_id": "job-1", "mlflow_run_id": "run-1", "steps": []}
+
+    manifest = PipelineResultCache(state_store).reuse("key", "job-1", "job-2")
+
+    state_store.copy_job_artifacts.assert_called_once_with("job-1", "job-2")
+    assert manifest["job_id"] == "job-2"
+    assert manifest["mlflow_run_id"] == "run-1"
+    assert manifest["cache"] == {"hit": True, "key": "key", "source_job_id": "job-1", "artifacts_copied": 12}
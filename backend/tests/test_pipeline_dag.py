@@ -0,0 +1,117 @@
+import threading
+
+import pytest
+
+from backend.wpa.pipeline_dag import PipelineCancelled, PipelineDAG, PipelineStageError, Stage
+
+
+def _stage(name, depends_on=(), inputs=(), outputs=(), fn=None):
+    return Stage(name, fn or (lambda ctx: {name: True}), depends_on=depends_on, inputs=inputs, outputs=outputs)
+
+
+def test_independent_branches_run_concurrently():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def meet(name):
+        def run(ctx):
+            barrier.wait()  # only passes when both branches are running at the same time
+            return {name: True}
+        return run
+
+    dag = PipelineDAG([
+        _stage("load", outputs=("data",)),
+        _stage("eda", ("load",), ("data",), fn=meet("eda")),
+        _stage("target", ("load",), ("data",), fn=meet("target")),
+        _stage("report", ("eda", "target")),
+    ])
+    updates = []
+    statuses = dag.run({}, max_workers=2, on_update=lambda s, running: updates.append(sorted(r.name for r in running)))
+
+    assert set(statuses.values()) == {"completed"}
+    assert ["eda", "target"] in updates
+    assert set(dag.durations) == {"load", "eda", "target", "report"}
+
+
+def test_failure_skips_downstream_stages_and_raises():
+    def boom(ctx):
+        raise ValueError("bad data")
+
+    dag = PipelineDAG([
+        _stage("load"),
+        _stage("target", ("load",), fn=boom),
+        _stage("automl", ("target",)),
+        _stage("eda", ("load",)),
+    ])
+    final = {}
+    with pytest.raises(PipelineStageError) as excinfo:
+        dag.run({}, max_workers=1, on_update=lambda s, running: final.update(s))
+
+    assert excinfo.value.stage == "target"
+    assert isinstance(excinfo.value.__cause__, ValueError)
+    assert final["target"] == "failed"
+    assert final["automl"] == "skipped"
+
+
+def test_inputs_must_be_written_upstream():
+    with pytest.raises(ValueError, match="no upstream stage writes"):
+        PipelineDAG([_stage("load", outputs=("data",)), _stage("report", inputs=("data",))])
+
+    with pytest.raises(ValueError, match="Cycle"):
+        PipelineDAG([_stage("a", ("b",)), _stage("b", ("a",))])
+
+
+def test_critical_path_follows_the_slowest_branch():
+    dag = PipelineDAG([_stage("load"), _stage("eda", ("load",)), _stage("automl", ("load",)), _stage("report", ("automl",))])
+
+    path, seconds = dag.critical_path({"load": 1, "eda": 10, "automl": 3, "report": 1})
+
+    assert path == ["load", "eda"]
+    assert seconds == 11
+
+
+def test_resume_restores_completed_stages_and_runs_the_rest():
+    ran, restored = [], []
+
+    def run(name):
+        def fn(ctx):
+            ran.append(name)
+            return {name: "computed"}
+        return fn
+
+    def restore_data(ctx):
+        restored.append("data")
+        return {"data": "from artifact"}
+
+    dag = PipelineDAG([
+        Stage("ingestion", run("ingestion"), restore=restore_data),
+        Stage("cleaning", run("cleaning"), depends_on=("ingestion",), restore=restore_data),
+        Stage("eda", run("eda"), depends_on=("cleaning",)),
+        Stage("automl", lambda ctx: ran.append("automl") or {"seen": ctx["data"]}, depends_on=("cleaning",)),
+    ])
+    context = {}
+    statuses = dag.run(context, completed={"ingestion", "cleaning", "eda"})
+
+    assert ran == ["automl"]
+    assert restored == ["data"]  # a restore shared by two stages runs once
+    assert context["seen"] == "from artifact"
+    assert set(statuses.values()) == {"completed"}
+
+
+def test_should_stop_lets_running_stages_finish_and_cancels_the_rest():
+    stop = threading.Event()
+
+    def load(ctx):
+        stop.set()  # cancellation requested while this stage runs
+        return {"data": True}
+
+    dag = PipelineDAG([
+        _stage("load", fn=load),
+        _stage("eda", ("load",)),
+        _stage("report", ("eda",)),
+    ])
+    final = {}
+    with pytest.raises(PipelineCancelled) as excinfo:
+        dag.run({}, max_workers=2, on_update=lambda s, running: final.update(s), should_stop=stop.is_set)
+
+    assert final == {"load": "completed", "eda": "cancelled", "report": "cancelled"}
+    assert sorted(excinfo.value.stages) == ["eda", "report"]
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import cross_val_score
+from unittest.mock import patch
+
+from backend.wpa.auto_ml.pipelines.builder import create_full_pipeline, create_preprocessor
+from backend.wpa.auto_ml.preprocessing_cache import PreprocessingCache, build_fitted_pipeline, dataset_hash
+from backend.wpa.auto_ml.trainer import train_model_with_cached_cv
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({
+        "num_a": rng.normal(size=120),
+        "num_b": rng.normal(size=120),
+        "cat": rng.choice(["x", "y", "z"], size=120),
+    })
+    X.loc[::7, "num_a"] = np.nan
+    y = pd.Series((X["num_b"] > 0).astype(int), name="target")
+    return X, y
+
+
+def test_preprocessor_is_fitted_once_and_memory_mapped(frame):
+    """A second lookup with the same key returns the cached matrices without refitting."""
+    X, y = frame
+    with PreprocessingCache() as cache:
+        key = PreprocessingCache.make_key(dataset_hash(X), ["num_a", "num_b"], ["cat"], {}, "holdout")
+        first = cache.get_or_compute(key, create_preprocessor(["num_a", "num_b"], ["cat"]), X, X.iloc[:10])
+        second = cache.get_or_compute(key, create_preprocessor(["num_a", "num_b"], ["cat"]), X, X.iloc[:10])
+
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert second is first
+        assert isinstance(first.X_train, np.memmap)
+        np.testing.assert_allclose(first.X_train, first.preprocessor.transform(X))
+
+        other_fold = PreprocessingCache.make_key(dataset_hash(X), ["num_a", "num_b"], ["cat"], {}, 0)
+        assert other_fold != key
+
+
+def test_cached_cv_matches_full_pipeline_cross_validation(frame):
+    """Scores from fold-cached matrices equal cross_val_score on the full pipeline."""
+    X, y = frame
+    features = (["num_a", "num_b"], ["cat"])
+    expected = cross_val_score(
+        create_full_pipeline(LogisticRegression(), "classification", *features), X, y, cv=5, scoring="accuracy"
+    )
+
+    with PreprocessingCache() as cache:
+        data_hash = dataset_hash(X)
+        cv_splits = cache.cv_splits(
+            lambda: create_preprocessor(*features), X, y, cv=5, classifier=True,
+            key_fn=lambda fold: PreprocessingCache.make_key(data_hash, *features, {}, fold),
+        )
+        full_split = cache.get_or_compute(
+            PreprocessingCache.make_key(data_hash, *features, {}, "full"), create_preprocessor(*features), X
+        )
+        with patch("backend.wpa.auto_ml.trainer.mlflow") as mock_mlflow:
+            result = train_model_with_cached_cv(LogisticRegression(), "classifier", cv_splits, full_split, y)
+
+    logged = {c.args[0]: c.args[1] for c in mock_mlflow.log_metric.call_args_list}
+    pipeline = result["model"]
+    assert result["status"] == "success"
+    assert logged["cv_mean_score"] == pytest.approx(expected.mean())
+    assert [name for name, _ in pipeline.steps] == ["preprocessor", "classifier"]
+    assert pipeline.predict(X.iloc[:5]).shape == (5,)
+
+
+def test_build_fitted_pipeline_predicts_on_raw_frame(frame):
+    X, y = frame
+    preprocessor = create_preprocessor(["num_a", "num_b"], ["cat"]).fit(X)
+    model = LogisticRegression().fit(preprocessor.transform(X), y)
+
+    pipeline = build_fitted_pipeline(preprocessor, model)
+
+    np.testing.assert_array_equal(pipeline.predict(X), model.predict(preprocessor.transform(X)))
+
+
+def test_cached_folds_run_in_parallel_within_the_allocation(frame, monkeypatch, tmp_path):
+    """The folds fan out over the job's allocated cores, never more, and score as the serial path does."""
+    import joblib
+    from backend.core import resource_manager
+    from backend.core.resource_manager import ResourceManager, cpu_allocation
+    from backend.wpa.auto_ml import trainer
+
+    X, y = frame
+    features = (["num_a", "num_b"], ["cat"])
+    monkeypatch.setattr(resource_manager, "_resource_manager", ResourceManager(
+        total_cores=3, max_cores_per_job=3, ledger_path=str(tmp_path / "ledger.json")
+    ))
+    n_jobs_used = []
+    original_parallel = joblib.Parallel
+    monkeypatch.setattr(trainer, "Parallel", lambda n_jobs: n_jobs_used.append(n_jobs) or original_parallel(n_jobs=n_jobs))
+
+    with PreprocessingCache() as cache:
+        data_hash = dataset_hash(X)
+        cv_splits = cache.cv_splits(
+            lambda: create_preprocessor(*features), X, y, cv=5, classifier=True,
+            key_fn=lambda fold: PreprocessingCache.make_key(data_hash, *features, {}, fold),
+        )
+        serial = trainer.score_on_cached_folds(LogisticRegression(), cv_splits, y)
+        with cpu_allocation("job-folds"):
+            parallel = trainer.score_on_cached_folds(LogisticRegression(), cv_splits, y)
+
+    assert n_jobs_used == [1, 3]
+    np.testing.assert_allclose(parallel, serial)
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from backend.wpa.preview import stratified_sample
+
+
+def test_stratified_sample_keeps_class_proportions_and_rare_classes():
+    y = ["a"] * 9000 + ["b"] * 990 + ["c"] * 10
+    df = pd.DataFrame({"x": range(len(y)), "y": y})
+
+    sample = stratified_sample(df, "y", max_rows=500, random_state=0)
+
+    assert len(sample) == 500
+    counts = sample["y"].value_counts()
+    assert abs(counts["a"] - 450) <= 2
+    assert abs(counts["b"] - 49) <= 2
+    assert counts["c"] >= 1
+    assert sample["x"].is_unique
+
+
+def test_stratified_sample_bins_continuous_targets_and_falls_back_to_uniform():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"x": rng.normal(size=20000), "y": rng.exponential(size=20000)})
+
+    sample = stratified_sample(df, "y", max_rows=1000, random_state=0)
+    assert len(sample) == 1000
+    assert abs(sample["y"].median() - df["y"].median()) < 0.05
+
+    assert len(stratified_sample(df, None, max_rows=1000)) == 1000
+    assert stratified_sample(df.head(10), "y", max_rows=1000).equals(df.head(10))
+
+
+def test_stratified_sample_never_exceeds_max_rows_with_many_small_classes():
+    # 45 rare classes each get a one-row floor, which the large class pays for
+    y = ["big"] * 1000 + [f"rare{i}" for i in range(45) for _ in range(3)]
+    df = pd.DataFrame({"x": range(len(y)), "y": y})
+
+    sample = stratified_sample(df, "y", max_rows=60, random_state=0)
+    assert len(sample) == 60
+    assert sample["y"].nunique() == 46
+    assert sample["x"].is_unique
+
+    # More classes than rows: the sample is still bounded
+    assert len(stratified_sample(df, "y", max_rows=20, random_state=0)) == 20
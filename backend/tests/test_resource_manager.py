@@ -0,0 +1,75 @@
+import json
+
+import pytest
+from joblib.parallel import get_active_backend
+from prometheus_client import REGISTRY
+from threadpoolctl import threadpool_info
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.naive_bayes import GaussianNB
+from sklearn.pipeline import Pipeline
+
+from backend.core import resource_manager
+from backend.core.resource_manager import (
+    ResourceManager, allocated_cores, configure_estimator_threads, cpu_allocation
+)
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    manager = ResourceManager(total_cores=8, max_cores_per_job=6, ledger_path=str(tmp_path / "ledger.json"))
+    monkeypatch.setattr(resource_manager, "_resource_manager", manager)
+    return manager
+
+
+def test_allocations_share_the_node_budget(manager):
+    first = manager.allocate("job-a")
+    second = manager.allocate("job-b")
+    third = manager.allocate("job-c", requested_cores=2)
+
+    assert (first.cores, second.cores, third.cores) == (6, 2, 1)
+    assert REGISTRY.get_sample_value("cpu_budget_cores_allocated") == 9
+
+    manager.release(first)
+    assert manager.allocations() == {"job-b": 2, "job-c": 1}
+
+
+def test_allocations_of_dead_processes_are_reclaimed(manager):
+    with open(manager.ledger_path, "w") as f:
+        json.dump({"999999999:ghost": {"pid": 999999999, "job_id": "ghost", "cores": 8}}, f)
+
+    assert manager.allocate("job-a").cores == 6
+
+
+def test_cpu_allocation_applies_to_joblib_and_estimators(manager):
+    assert allocated_cores() == 1
+    with cpu_allocation("job-a") as allocation:
+        assert allocated_cores() == allocation.cores == 6
+        assert get_active_backend()[1] == 6
+        with cpu_allocation("nested") as nested:
+            assert nested is allocation
+
+        pipeline = configure_estimator_threads(
+            Pipeline([("scale", "passthrough"), ("model", RandomForestClassifier())])
+        )
+        assert pipeline.get_params()["model__n_jobs"] == 6
+        assert allocation.worker_env(n_workers=4)["OMP_NUM_THREADS"] == "1"
+
+    assert manager.allocations() == {}
+    # Estimators without a thread parameter are left alone
+    assert configure_estimator_threads(GaussianNB(), 2).get_params() == GaussianNB().get_params()
+    assert configure_estimator_threads(LogisticRegression(), 2).get_params()["n_jobs"] == 2
+
+
+def _native_threads():
+    return [pool["num_threads"] for pool in threadpool_info()]
+
+
+def test_process_wide_thread_limits_are_opt_in(manager):
+    before = _native_threads()
+    with cpu_allocation("stage-a"):
+        # Another stage may run on another thread of this process: leave the process-wide pools alone
+        assert _native_threads() == before
+    with cpu_allocation("task", requested_cores=1, process_thread_limits=True):
+        assert all(n == 1 for n in _native_threads())
+    assert _native_threads() == before
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+from prometheus_client import REGISTRY
+
+from backend.core.stage_metrics import StageMonitor, record_bytes_written
+from backend.wpa.pipeline_dag import PipelineDAG, PipelineStageError, Stage
+
+
+def test_monitor_records_every_stage_and_exports_histograms():
+    def load(ctx):
+        record_bytes_written(1000)
+        return {"df": pd.DataFrame(np.zeros((50, 3)))}
+
+    def train(ctx):
+        record_bytes_written(24)
+        sum(i * i for i in range(200_000))  # some CPU work
+
+    dag = PipelineDAG([Stage("load_m", load), Stage("train_m", train, depends_on=("load_m",))])
+    monitor = StageMonitor(trace_allocations=True)
+    monitor.instrument(dag)
+    with monitor:
+        dag.run({})
+
+    load_metrics, train_metrics = monitor.results["load_m"], monitor.results["train_m"]
+    assert load_metrics["input_rows"] is None and load_metrics["artifact_bytes_written"] == 1000
+    assert (train_metrics["input_rows"], train_metrics["input_columns"]) == (50, 3)
+    assert train_metrics["artifact_bytes_written"] == 24
+    assert train_metrics["cpu_seconds"] > 0 and train_metrics["peak_rss_bytes"] > 0
+    assert train_metrics["tracemalloc_peak_bytes"] > 0
+    assert REGISTRY.get_sample_value(
+        "pipeline_stage_wall_seconds_count", {"stage": "train_m", "status": "completed"}
+    ) == 1
+    assert REGISTRY.get_sample_value("pipeline_stage_artifact_bytes_sum", {"stage": "load_m"}) == 1000
+
+
+def test_monitor_records_failed_stages():
+    def boom(ctx):
+        raise ValueError("bad data")
+
+    dag = PipelineDAG([Stage("boom_m", boom)])
+    monitor = StageMonitor()
+    monitor.instrument(dag)
+    with monitor, pytest.raises(PipelineStageError):
+        dag.run({})
+
+    assert monitor.results["boom_m"]["status"] == "failed"
+    assert monitor.results["boom_m"]["tracemalloc_peak_bytes"] is None
+    record_bytes_written(10)  # outside a stage: ignored
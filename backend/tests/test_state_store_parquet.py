@@ -0,0 +1,115 @@
+import io
+
+import boto3
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from backend.core.state_store import MINIO_ACCESS_KEY, MINIO_BUCKET, MINIO_SECRET_KEY, S3MultipartWriter, StateStore
+
+
+@pytest.fixture(scope="module")
+def state_store():
+    moto_server = pytest.importorskip("moto.server")  # local S3 stand-in for MinIO
+    server = moto_server.ThreadedMotoServer(ip_address="127.0.0.1", port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    s3_client = boto3.client(
+        "s3", endpoint_url=f"http://{host}:{port}",
+        aws_access_key_id=MINIO_ACCESS_KEY, aws_secret_access_key=MINIO_SECRET_KEY
+    )
+    s3_client.create_bucket(Bucket=MINIO_BUCKET)
+    # Only the MinIO client is needed; skip the Redis/Postgres connections of __init__
+    store = StateStore.__new__(StateStore)
+    store.s3_client = s3_client
+    yield store
+    server.stop()
+
+
+@pytest.fixture(scope="module")
+def small_row_groups():
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("backend.core.state_store.PARQUET_ROW_GROUP_ROWS", 5_000)
+        yield
+
+
+@pytest.fixture(scope="module")
+def saved_frame(state_store, small_row_groups):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "id": np.arange(50_000),
+        "amount": rng.random(50_000),
+        "region": rng.choice(["north", "south"], 50_000),
+        "notes": [rng.bytes(32).hex() for _ in range(50_000)],  # wide, incompressible column
+    })
+    state_store.save_dataframe("job-1", df)
+    return df
+
+
+def test_projection_filters_and_limit_fetch_only_what_they_need(state_store, saved_frame):
+    full = state_store.load_dataframe("job-1")
+    projected = state_store.load_dataframe("job-1", columns=["id", "amount"])
+    filtered = state_store.load_dataframe("job-1", filters=[("id", ">=", 45_000), ("region", "==", "north")])
+    head = state_store.load_dataframe("job-1", limit=5)
+
+    pd.testing.assert_frame_equal(full, saved_frame)
+    pd.testing.assert_frame_equal(projected, saved_frame[["id", "amount"]])
+    expected = saved_frame[(saved_frame["id"] >= 45_000) & (saved_frame["region"] == "north")].reset_index(drop=True)
+    pd.testing.assert_frame_equal(filtered, expected)
+    pd.testing.assert_frame_equal(head, saved_frame.head(5))
+
+    object_bytes = full.attrs["state_store_read"]["object_bytes"]
+    assert full.attrs["state_store_read"]["bytes_fetched"] == object_bytes
+    for df in (projected, filtered, head):
+        assert df.attrs["state_store_read"]["object_bytes"] == object_bytes
+        assert df.attrs["state_store_read"]["bytes_fetched"] < object_bytes / 2
+
+
+def test_no_matching_rows_and_missing_objects(state_store, saved_frame):
+    empty = state_store.load_dataframe("job-1", columns=["id"], filters=[("id", "<", 0)], limit=10)
+
+    assert list(empty.columns) == ["id"] and empty.empty
+    assert state_store.load_dataframe("missing-job", limit=5) is None
+    assert state_store.load_dataframe_schema("missing-job") is None
+
+
+def test_schema_is_read_from_the_footer(state_store, saved_frame):
+    schema = state_store.load_dataframe_schema("job-1")
+
+    assert schema["columns"] == ["id", "amount", "region", "notes"]
+    assert schema["num_rows"] == 50_000
+    assert schema["bytes_fetched"] < schema["object_bytes"] / 10
+
+
+def test_large_objects_are_uploaded_in_parts(state_store, saved_frame):
+    part_size = 5 * 2**20  # the smallest part S3 accepts
+    payload = np.random.default_rng(1).bytes(2 * part_size + 123)
+
+    with S3MultipartWriter(state_store.s3_client, MINIO_BUCKET, "raw/job-2/big.bin", part_size=part_size) as sink:
+        for i in range(0, len(payload), 1_000_000):
+            sink.write(payload[i:i + 1_000_000])
+    state_store.save_raw_file("job-3", "small.csv", io.BytesIO(b"a,b\n1,2\n"))
+
+    head = state_store.s3_client.head_object(Bucket=MINIO_BUCKET, Key="raw/job-2/big.bin", PartNumber=1)
+    assert head["PartsCount"] == 3
+    assert state_store.load_object_bytes("raw/job-2/big.bin") == payload
+    assert state_store.load_raw_file("job-3", "small.csv").read() == b"a,b\n1,2\n"
+
+
+def test_failed_upload_is_aborted(state_store):
+    with pytest.raises(RuntimeError):
+        with S3MultipartWriter(state_store.s3_client, MINIO_BUCKET, "raw/job-4/big.bin", part_size=5 * 2**20) as sink:
+            sink.write(b"\0" * (6 * 2**20))
+            raise RuntimeError("serialization failed")
+
+    uploads = state_store.s3_client.list_multipart_uploads(Bucket=MINIO_BUCKET, Prefix="raw/job-4/")
+    assert not uploads.get("Uploads")
+    assert state_store.load_object_bytes("raw/job-4/big.bin") is None
+
+
+def test_arrow_table_round_trips_as_the_job_dataframe(state_store):
+    df = pd.DataFrame({"id": range(10), "region": list("nsnsnsnsns"), "amount": np.linspace(0, 1, 10)})
+    state_store.save_arrow_table("job-5", pa.Table.from_pandas(df, preserve_index=False))
+
+    pd.testing.assert_frame_equal(state_store.load_dataframe("job-5"), df)
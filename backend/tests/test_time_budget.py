@@ -0,0 +1,97 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from unittest.mock import MagicMock, patch
+
+from backend.wpa.auto_ml.service import AutoMlService
+from backend.wpa.auto_ml.time_budget import (
+    TimeBudget, expected_cost, order_by_expected_cost, run_candidates_within_budget
+)
+
+
+def _sleep_for(candidate, seconds_by_candidate):
+    time.sleep(seconds_by_candidate[candidate])
+    return {"model": candidate, "status": "success"}
+
+
+def test_candidates_are_ordered_cheapest_first():
+    ordered = order_by_expected_cost(["svm_classifier", "logistic_regression", "random_forest_classifier", "SVC"])
+
+    assert ordered == ["logistic_regression", "random_forest_classifier", "svm_classifier", "SVC"]
+    assert expected_cost("lstm") > expected_cost("xgboost_classifier") > expected_cost("naive_bayes")
+
+
+def test_unlimited_budget_runs_every_candidate():
+    budget = TimeBudget(None)
+    results = run_candidates_within_budget(_sleep_for, ["a", "b", "c"], ({"a": 0, "b": 0, "c": 0},), 2, budget)
+
+    assert [r["model"] for r in results] == ["a", "b", "c"]
+    assert not budget.exhausted
+
+
+def test_overrunning_fit_is_cancelled_and_later_candidates_are_not_launched():
+    budget = TimeBudget(12.0, reserve_fraction=0.0)  # room for the fresh pool's worker startup
+    seconds = {"fast": 0.1, "slow": 60, "never": 0.1}
+
+    start = time.monotonic()
+    results = run_candidates_within_budget(_sleep_for, ["fast", "slow", "never"], (seconds,), 1, budget)
+
+    assert time.monotonic() - start < 30
+    assert budget.exhausted
+    assert {r["model"]: r["status"] for r in results} == {"fast": "success", "slow": "timeout"}
+
+
+def _mark_started_then_sleep(candidate, seconds_by_candidate, marker_dir):
+    open(os.path.join(marker_dir, candidate), "w").close()
+    return _sleep_for(candidate, seconds_by_candidate)
+
+
+def test_cancellation_kills_running_fits_and_drops_pending_candidates(tmp_path):
+    seconds = {"fast": 0.1, "slow": 60, "never": 0.1}
+
+    start = time.monotonic()
+    results = run_candidates_within_budget(
+        _mark_started_then_sleep, ["fast", "slow", "never"], (seconds, str(tmp_path)), 1, TimeBudget(None),
+        should_stop=lambda: (tmp_path / "slow").exists()
+    )
+
+    assert time.monotonic() - start < 10
+    assert {r["model"]: r["status"] for r in results} == {"fast": "success", "slow": "cancelled"}
+
+
+@patch('backend.wpa.auto_ml.service.mlflow')
+def test_automl_service_reports_budget_exhausted(mock_mlflow):
+    df = pd.DataFrame({
+        'feature1': [i % 17 for i in range(120)],
+        'feature2': [(i * 7) % 11 for i in range(120)],
+        'target': [1 if (i % 17) > 8 else 0 for i in range(120)]
+    })
+    automl_service = AutoMlService(MagicMock())
+
+    unbounded = automl_service.run_automl_pipeline("job", df, "target", max_runtime_seconds=600)
+    exhausted = automl_service.run_automl_pipeline("job", df, "target", max_runtime_seconds=1e-9)
+
+    assert unbounded["summary"]["budget_exhausted"] is False
+    assert exhausted["summary"]["budget_exhausted"] is True
+    assert exhausted["summary"]["ranking"] == []
+
+
+def _sum_of_matrix(candidate, path):
+    from backend.wpa.auto_ml.preprocessing_cache import load_matrix
+    matrix = load_matrix(path)
+    return {"model": candidate, "status": "success", "sum": float(matrix.sum()), "mmap": isinstance(matrix, np.memmap)}
+
+
+def test_private_pool_leaves_joblib_parallel_usable(tmp_path):
+    path = str(tmp_path / "X.npy")
+    np.save(path, np.arange(10.0))
+
+    results = run_candidates_within_budget(_sum_of_matrix, ["a", "b"], (path,), 2, TimeBudget(None))
+    # A killed pool must not take joblib's process-wide executor down with it
+    run_candidates_within_budget(_sleep_for, ["slow"], ({"slow": 60},), 1, TimeBudget(1.0, reserve_fraction=0.0))
+
+    assert [(r["sum"], r["mmap"]) for r in results] == [(45.0, True), (45.0, True)]
+    assert Parallel(n_jobs=2)(delayed(abs)(-i) for i in range(4)) == [0, 1, 2, 3]
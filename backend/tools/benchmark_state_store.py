@@ -0,0 +1,155 @@
+"""
+Concurrent-request benchmark of the synchronous vs. the async StateStore.
+
+Serves two `async def` endpoints from one in-process FastAPI app (one event loop,
+as in a single uvicorn worker) that each download the same artifact from a local
+MinIO stand-in (a moto server in its own process, so it does not share the GIL):
+
+  * `/sync`  calls `StateStore.load_artifact_as_bytes` (boto3, blocks the loop);
+  * `/async` awaits `AsyncStateStore.load_artifact_as_bytes` (aiobotocore).
+
+`--concurrency` clients download the artifact `--requests` times in total while a
+probe sends a trivial `/ping` request every 10 ms. Reported per variant: download
+throughput and the `/ping` latency (from when the ping was due), i.e. how long
+light requests wait behind the downloads.
+
+    pip install "moto[server]"
+    python -m backend.tools.benchmark_state_store --artifact-mb 16 --concurrency 16 --requests 64
+"""
+import argparse
+import asyncio
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import boto3
+import httpx
+from botocore.client import Config
+from fastapi import FastAPI
+
+from backend.core.async_state_store import AsyncStateStore
+from backend.core.state_store import MINIO_ACCESS_KEY, MINIO_BUCKET, MINIO_SECRET_KEY, StateStore
+
+JOB_ID = "benchmark"
+ARTIFACT = "artifact.bin"
+PING_INTERVAL_SECONDS = 0.01
+
+
+def build_app(sync_store, async_store: AsyncStateStore) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/sync")
+    async def load_sync():
+        return {"bytes": len(sync_store.load_artifact_as_bytes(JOB_ID, ARTIFACT))}
+
+    @app.get("/async")
+    async def load_async():
+        return {"bytes": len(await async_store.load_artifact_as_bytes(JOB_ID, ARTIFACT))}
+
+    @app.get("/ping")
+    async def ping():
+        return {}
+
+    return app
+
+
+async def run_variant(client: httpx.AsyncClient, path: str, concurrency: int, n_requests: int):
+    queue = asyncio.Queue()
+    for _ in range(n_requests):
+        queue.put_nowait(None)
+    ping_latencies = []
+    done = asyncio.Event()
+
+    async def download():
+        while not queue.empty():
+            queue.get_nowait()
+            (await client.get(path)).raise_for_status()
+
+    async def probe():
+        # Latency is measured from when the ping was due, so time spent waiting for a
+        # blocked event loop to even send it counts too.
+        due = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            await client.get("/ping")
+            ping_latencies.append(time.perf_counter() - due)
+            due += PING_INTERVAL_SECONDS
+        return due
+
+    probe_task = asyncio.create_task(probe())
+    started = time.perf_counter()
+    await asyncio.gather(*(download() for _ in range(concurrency)))
+    finished = time.perf_counter()
+    elapsed = finished - started
+    done.set()
+    due = await probe_task
+    # Pings that fell due before the downloads finished but were never sent waited at least until then
+    while due < finished:
+        ping_latencies.append(finished - due)
+        due += PING_INTERVAL_SECONDS
+
+    ping_latencies.sort()
+    return {
+        "requests_per_second": n_requests / elapsed,
+        "ping_p50_ms": 1000 * statistics.median(ping_latencies),
+        "ping_p95_ms": 1000 * ping_latencies[int(0.95 * (len(ping_latencies) - 1))],
+        "ping_max_ms": 1000 * ping_latencies[-1],
+        "pings": len(ping_latencies),
+    }
+
+
+def start_moto_server():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = subprocess.Popen([sys.executable, "-m", "moto.server", "-H", "127.0.0.1", "-p", str(port)],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return server, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError("moto server did not start")
+
+
+async def main(args):
+    server, endpoint = start_moto_server()
+    try:
+        s3_client = boto3.client(
+            's3', endpoint_url=endpoint, aws_access_key_id=MINIO_ACCESS_KEY, aws_secret_access_key=MINIO_SECRET_KEY,
+            config=Config(signature_version='s3v4', max_pool_connections=args.concurrency)
+        )
+        s3_client.create_bucket(Bucket=MINIO_BUCKET)
+        s3_client.put_object(Bucket=MINIO_BUCKET, Key=f"processed/{JOB_ID}/{ARTIFACT}",
+                             Body=b"\0" * (args.artifact_mb * 2**20))
+
+        async_store = await AsyncStateStore(s3_pool_size=args.concurrency, endpoint_url=endpoint).start()
+        try:
+            # Only the MinIO client is needed; skip the Redis/Postgres connections of __init__
+            sync_store = StateStore.__new__(StateStore)
+            sync_store.s3_client = s3_client
+            app = build_app(sync_store, async_store)
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench",
+                                         timeout=None) as client:
+                for path in ("/sync", "/async"):
+                    await client.get(path)  # warm up connections
+                    result = await run_variant(client, path, args.concurrency, args.requests)
+                    print(f"{path:>6}: {result['requests_per_second']:7.1f} downloads/s | /ping "
+                          f"p50 {result['ping_p50_ms']:7.1f} ms, p95 {result['ping_p95_ms']:7.1f} ms, "
+                          f"max {result['ping_max_ms']:7.1f} ms ({result['pings']} pings)")
+        finally:
+            await async_store.close()
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--artifact-mb", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=64)
+    asyncio.run(main(parser.parse_args()))
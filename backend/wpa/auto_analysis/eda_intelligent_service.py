@@ -1,20 +1,24 @@
 import pandas as pd
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from scipy import stats
 import os
 import json
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from backend.mpa.profiling.service import build_column_profile, describe_from_profile
+
 class EDAIntelligentService:
     """
     Performs automated Exploratory Data Analysis (EDA) on a given dataset,
     returning reports and visualizations as artifacts.
     """
 
-    def __init__(self, dataframe: pd.DataFrame, inferred_types: Dict[str, str]):
+    def __init__(self, dataframe: pd.DataFrame, inferred_types: Dict[str, str],
+                 column_profile: Optional[Dict[str, Any]] = None):
         self.df = dataframe
         self.inferred_types = inferred_types
+        self.column_profile = column_profile or build_column_profile(dataframe)
         self.classified_types = self._classify_variables()
 
     def _classify_variables(self) -> Dict[str, str]:
@@ -22,7 +26,7 @@ class EDAIntelligentService:
         classified = {}
         for col, base_type in self.inferred_types.items():
             if base_type == 'numeric':
-                unique_count = self.df[col].nunique()
+                unique_count = self.column_profile["columns"][str(col)]["n_unique"]
                 if unique_count == 2:
                     classified[col] = 'binary'
                 elif unique_count < 20:
@@ -62,17 +66,18 @@ class EDAIntelligentService:
         """Generates a summary of descriptive statistics."""
         stats = {}
         for col, var_type in self.classified_types.items():
-            if var_type.startswith('numeric') or var_type == 'binary':
-                stats[col] = self.df[col].describe().to_dict()
-            elif var_type.startswith('categorical'):
-                stats[col] = self.df[col].describe().to_dict()
+            if var_type.startswith('numeric') or var_type == 'binary' or var_type.startswith('categorical'):
+                summary = describe_from_profile(self.column_profile["columns"][str(col)])
+                stats[col] = summary if summary is not None else self.df[col].describe().to_dict()
         return stats
 
     def missing_report(self) -> (Dict[str, Any], plt.Figure):
         """Generates a JSON report and a heatmap for missing values."""
-        missing_count = self.df.isnull().sum()
-        missing_percent = (missing_count / len(self.df)) * 100
-        report = {col: {"count": int(missing_count[col]), "percentage": missing_percent[col]} for col in self.df.columns}
+        columns = self.column_profile["columns"]
+        report = {
+            col: {"count": columns[str(col)]["null_count"], "percentage": (columns[str(col)]["null_count"] / len(self.df)) * 100}
+            for col in self.df.columns
+        }
 
         fig = None
         try:
@@ -168,5 +173,5 @@ def run_eda(df: pd.DataFrame, inferred_types: Dict[str, str], job_id: str):
     """
     Entrypoint function to run the full automated EDA process.
     """
-    service = EDAIntelligentService(df, inferred_types, job_id)
+    service = EDAIntelligentService(df, inferred_types)
     service.run_automated_eda()
@@ -1,10 +1,12 @@
 import pandas as pd
-import hashlib
 import json
 import mlflow
 import os
 import tempfile
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+
+from backend.core.fingerprint import dataset_digest
+from backend.mpa.profiling.service import build_column_profile
 
 class IngestionAdapter:
     """
@@ -12,10 +14,17 @@ class IngestionAdapter:
     and data versioning for traceability in MLflow.
     """
 
-    def __init__(self, dataframe: pd.DataFrame):
+    def __init__(self, dataframe: pd.DataFrame, column_profile: Optional[Dict[str, Any]] = None):
         if not isinstance(dataframe, pd.DataFrame):
             raise TypeError("Input must be a pandas DataFrame.")
         self.df = dataframe.copy()
+        self._column_profile = column_profile
+
+    @property
+    def column_profile(self) -> Dict[str, Any]:
+        if self._column_profile is None:
+            self._column_profile = build_column_profile(self.df)
+        return self._column_profile
 
     def schema_validator(self) -> bool:
         if self.df.empty:
@@ -24,12 +33,12 @@ class IngestionAdapter:
         return True
 
     def _calculate_data_hash(self) -> str:
-        """Calculates a SHA-256 hash of the DataFrame to version the input data."""
-        data_bytes = self.df.to_numpy().tobytes()
-        return hashlib.sha256(data_bytes).hexdigest()
+        """Calculates the dataset fingerprint of the DataFrame to version the input data."""
+        return dataset_digest(self.df)
 
     def metadata_extractor(self) -> Dict[str, Any]:
         """Extracts key metadata from the DataFrame for logging."""
+        columns = self.column_profile["columns"]
         metadata = {
             "num_rows": len(self.df),
             "num_columns": len(self.df.columns),
@@ -37,11 +46,11 @@ class IngestionAdapter:
             "inferred_types": self.column_type_inference(),
             "data_hash": self._calculate_data_hash(),
             "null_percentages": {
-                col: (self.df[col].isnull().sum() / len(self.df)) * 100
+                col: (columns[str(col)]["null_count"] / len(self.df)) * 100
                 for col in self.df.columns
             },
             "cardinality": {
-                col: self.df[col].nunique() for col in self.df.columns
+                col: columns[str(col)]["n_unique"] for col in self.df.columns
             },
             "potential_risks": self._identify_risks()
         }
@@ -63,7 +72,7 @@ class IngestionAdapter:
 
     def _identify_risks(self) -> List[str]:
         risks = []
-        if self.df.duplicated().any():
+        if self.column_profile["duplicate_rows"] > 0:
             risks.append("Duplicate rows detected.")
         pii_keywords = ['email', 'phone', 'ssn', 'address', 'nombre', 'id']
         for col in self.df.columns:
@@ -72,12 +81,12 @@ class IngestionAdapter:
         print(f"Risk identification complete. Found {len(risks)} potential risks.")
         return risks
 
-def strengthen_ingestion(df: pd.DataFrame) -> Dict[str, Any]:
+def strengthen_ingestion(df: pd.DataFrame, column_profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     Entrypoint function to run the ingestion strengthening process and log
     data versioning artifacts and parameters to the active MLflow run.
     """
-    adapter = IngestionAdapter(df)
+    adapter = IngestionAdapter(df, column_profile)
     adapter.schema_validator()
     metadata = adapter.metadata_extractor()
 
@@ -4,10 +4,12 @@ import math
 import time
 import hashlib
 import warnings
+from dataclasses import dataclass, replace
 from typing import Dict, List, Any, Optional
 
 import pandas as pd
 import numpy as np
+from joblib import Parallel, delayed
 
 # sklearn imports used in quick predict
 from sklearn.model_selection import cross_val_score, StratifiedKFold, KFold
@@ -23,6 +25,9 @@ from sklearn.utils import resample
 from sklearn.feature_selection import mutual_info_classif, mutual_info_regression
 from scipy import stats
 
+from backend.core.fingerprint import get_fingerprint_cache
+from backend.core.resource_manager import allocated_cores, cpu_allocation
+
 warnings.filterwarnings("ignore")
 
 # --------------------------
@@ -38,6 +43,16 @@ DEFAULT_CONFIG = {
         "cv_folds": 3,
         "random_state": 42
     },
+    # Two-phase scoring: the cheap components are computed for every column, the
+    # CV-based predictability (P) only for the `top_k_candidates` columns with the
+    # best optimistic score, in a pool of processes. top_k_candidates=None runs the
+    # predictability check for every column. n_jobs=None sizes the pool by the job's
+    # CPU allocation from the resource manager (ml_engine.global.max_cores_per_job,
+    # SADI_CPU_BUDGET); a number only lowers that cap, 1 runs the checks serially.
+    "pruning": {
+        "top_k_candidates": 10,
+        "n_jobs": None
+    },
     "limits": {
         "max_unique_as_id_fraction": 0.95,
         "max_id_string_length": 3
@@ -45,6 +60,15 @@ DEFAULT_CONFIG = {
     "semantic_keywords": ["target", "label", "y", "outcome", "resultado", "respuesta", "churn", "venta", "price", "amount", "score", "value"]
 }
 
+# Scores and correlations are ranked at this precision. The profile-based scorers
+# are numerically equivalent to the per-column ones only within floating-point
+# tolerance (~1e-15), so near-ties are ranked as ties, which the stable sorts
+# break by column order: both paths then pick the same candidates and predictors.
+RANK_DECIMALS = 9
+
+def _rank_value(value: float) -> float:
+    return round(float(value), RANK_DECIMALS)
+
 # --------------------------
 # Utilities
 # --------------------------
@@ -64,15 +88,99 @@ def save_json_atomic(path: str, obj: Any):
 def safe_mkdir(path: str):
     os.makedirs(path, exist_ok=True)
 
+# --------------------------
+# Shared precomputation
+# --------------------------
+@dataclass
+class DetectionProfile:
+    """
+    Everything the per-column scorers need that depends on more than one column,
+    computed once per dataset instead of once per candidate column.
+    """
+    numeric_cols: List[str]
+    nunique: pd.Series
+    pct_missing: pd.Series
+    variances: pd.Series # nanvar of every non-empty numeric column
+    loo_median_variance: pd.Series # median variance of the *other* non-empty numeric columns
+    corr: pd.DataFrame # pairwise Pearson correlation of the numeric columns
+    numeric_filled: pd.DataFrame # numeric columns with NaN -> 0 (mutual information input)
+    sample: Optional[pd.DataFrame] # the deterministic quick_predict sample
+    sample_corr: Optional[pd.DataFrame] # numeric correlation matrix of the sample
+
+def _leave_one_out_medians(values: np.ndarray) -> np.ndarray:
+    """For every element, the median of all the other elements (exact, vectorized)."""
+    m = len(values)
+    out = np.full(m, np.nan)
+    if m < 2:
+        return out
+    order = np.argsort(values, kind="stable")
+    sorted_vals = values[order]
+    rank = np.empty(m, dtype=int)
+    rank[order] = np.arange(m)
+
+    def kth_without_self(k):
+        # k-th smallest of the remaining m - 1 values: skip the element's own slot
+        return sorted_vals[np.where(k < rank, k, k + 1)]
+
+    remaining = m - 1
+    if remaining % 2 == 1:
+        out = kth_without_self(remaining // 2)
+    else:
+        out = (kth_without_self(remaining // 2 - 1) + kth_without_self(remaining // 2)) / 2
+    return out
+
+def build_detection_profile(df: pd.DataFrame, config: Dict = DEFAULT_CONFIG,
+                            column_profile: Optional[Dict[str, Any]] = None) -> DetectionProfile:
+    """
+    Single pass over the dataset: correlation matrix, per-column variances,
+    missingness, nunique and the shared quick_predict sample. nunique and
+    missingness are read from the dataset's `column_profile` when given.
+    """
+    numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+    numeric = df[numeric_cols]
+
+    counts = numeric.count()
+    non_empty = [c for c in numeric_cols if counts[c] > 0]
+    variances = pd.Series({c: float(np.nanvar(numeric[c].dropna())) for c in non_empty}, dtype=float)
+    loo = _leave_one_out_medians(variances.values) if not variances.isna().any() else np.full(len(variances), np.nan)
+
+    qcfg = config["quick_predict"]
+    sample, sample_corr = None, None
+    if len(df) > 0 and len(df) >= qcfg["min_sample_for_pred"]:
+        sample = df.sample(n=min(qcfg["max_sample_for_pred"], len(df)), random_state=qcfg["random_state"])
+        sample_corr = sample[numeric_cols].corr()
+
+    if column_profile is not None:
+        columns = column_profile["columns"]
+        nunique = pd.Series([columns[str(c)]["n_unique"] for c in df.columns], index=df.columns)
+        pct_missing = pd.Series([columns[str(c)]["null_count"] / len(df) if len(df) > 0 else 1.0 for c in df.columns],
+                                index=df.columns)
+    else:
+        nunique = df.nunique(dropna=True)
+        pct_missing = df.isna().mean() if len(df) > 0 else pd.Series(1.0, index=df.columns)
+
+    return DetectionProfile(
+        numeric_cols=numeric_cols,
+        nunique=nunique,
+        pct_missing=pct_missing,
+        variances=variances,
+        loo_median_variance=pd.Series(loo, index=variances.index),
+        corr=numeric.corr(),
+        numeric_filled=numeric.fillna(0),
+        sample=sample,
+        sample_corr=sample_corr,
+    )
+
 # --------------------------
 # Column heuristics
 # --------------------------
-def is_id_column(series: pd.Series, config: Dict = DEFAULT_CONFIG) -> bool:
+def is_id_column(series: pd.Series, config: Dict = DEFAULT_CONFIG, nunique: Optional[int] = None) -> bool:
     """Detects columns type ID: high uniqueness and long values or integers with high cardinality."""
     n = len(series)
     if n == 0:
         return False
-    nunique = series.nunique(dropna=True)
+    if nunique is None:
+        nunique = series.nunique(dropna=True)
     unique_frac = nunique / float(n)
     # If too many unique values -> likely ID
     if unique_frac >= config["limits"]["max_unique_as_id_fraction"]:
@@ -95,16 +203,17 @@ def semantic_boost(col_name: str, config: Dict = DEFAULT_CONFIG) -> float:
 # --------------------------
 # Scoring components
 # --------------------------
-def availability_score(series: pd.Series) -> float:
-    pct_missing = series.isna().mean() if len(series) > 0 else 1.0
+def availability_score(series: pd.Series, pct_missing: Optional[float] = None) -> float:
+    if pct_missing is None:
+        pct_missing = series.isna().mean() if len(series) > 0 else 1.0
     return max(0.0, 1.0 - pct_missing)
 
-def type_score(series: pd.Series) -> float:
+def type_score(series: pd.Series, nunique: Optional[int] = None) -> float:
     if pd.api.types.is_numeric_dtype(series):
-        n_unique = series.nunique(dropna=True)
+        n_unique = series.nunique(dropna=True) if nunique is None else nunique
         return 1.0 if n_unique > 10 else 0.6
     if pd.api.types.is_categorical_dtype(series) or pd.api.types.is_object_dtype(series):
-        n_unique = series.nunique(dropna=True)
+        n_unique = series.nunique(dropna=True) if nunique is None else nunique
         if 2 <= n_unique <= 50:
             return 1.0
         elif n_unique > 50:
@@ -113,8 +222,22 @@ def type_score(series: pd.Series) -> float:
             return 0.2
     return 0.1
 
-def variability_score(series: pd.Series, df: pd.DataFrame) -> float:
-    """Normalized variability score for numeric or categorical."""
+def variability_score(series: pd.Series, df: pd.DataFrame, profile: Optional[DetectionProfile] = None) -> float:
+    """
+    Normalized variability score for numeric or categorical. With a `profile` the
+    variances come from the precomputed ones instead of being recomputed for
+    every numeric column; the score is numerically equivalent within floating-point
+    tolerance, not bit for bit (see RANK_DECIMALS).
+    """
+    name = series.name
+    if (profile is not None and pd.api.types.is_numeric_dtype(series)
+            and name in profile.variances.index and not np.isnan(profile.loo_median_variance[name])):
+        if len(profile.numeric_cols) <= 1:
+            return 0.5
+        var_col = float(profile.variances[name])
+        median_var = float(profile.loo_median_variance[name])
+        score = var_col / (var_col + median_var + 1e-12)
+        return float(max(0.0, min(1.0, score)))
     if pd.api.types.is_numeric_dtype(series):
         var_col = float(np.nanvar(series.dropna()))
         # median var across numeric features
@@ -132,9 +255,25 @@ def variability_score(series: pd.Series, df: pd.DataFrame) -> float:
         score = 1.0 - float(vc.iloc[0]) # 1 - proportion of largest class
         return float(max(0.0, min(1.0, score)))
 
-def correlation_signal(df: pd.DataFrame, col: str, top_k: int = 20) -> float:
-    """Compute a normalized correlation signal (0..1) with other features."""
+def _profile_correlation_signal(profile: DetectionProfile, col: str, top_k: int) -> float:
+    row = profile.corr[col].to_numpy()
+    others = np.abs(np.delete(row, profile.numeric_cols.index(col)))
+    corrs = others[~np.isnan(others)]
+    if corrs.size == 0:
+        return 0.0
+    corrs = -np.sort(-corrs)[:top_k]
+    med = float(np.median(corrs))
+    return float(max(0.0, min(1.0, med)))
+
+def correlation_signal(df: pd.DataFrame, col: str, top_k: int = 20, profile: Optional[DetectionProfile] = None) -> float:
+    """
+    Compute a normalized correlation signal (0..1) with other features. With a
+    `profile` the numeric case reads the precomputed correlation matrix, which
+    agrees with the per-pair `Series.corr` values within floating-point tolerance.
+    """
     s = df[col]
+    if profile is not None and col in profile.numeric_cols:
+        return _profile_correlation_signal(profile, col, top_k)
     numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
     # if target numeric: use pearson absolute values
     try:
@@ -158,7 +297,10 @@ def correlation_signal(df: pd.DataFrame, col: str, top_k: int = 20) -> float:
             # categorical: mutual information with numeric and categorical predictors
             # use mutual_info_classif/regression heuristics
             # fallback to 0 if fails
-            X = df.drop(columns=[col]).select_dtypes(include=[np.number]).fillna(0)
+            if profile is not None:
+                X = profile.numeric_filled.drop(columns=[col], errors="ignore")
+            else:
+                X = df.drop(columns=[col]).select_dtypes(include=[np.number]).fillna(0)
             y = pd.factorize(df[col].astype(str))[0]
             if X.shape[1] == 0:
                 return 0.0
@@ -174,13 +316,15 @@ def correlation_signal(df: pd.DataFrame, col: str, top_k: int = 20) -> float:
     except Exception:
         return 0.0
 
-def operational_penalty(series: pd.Series, col_name: str) -> float:
+def operational_penalty(series: pd.Series, col_name: str, pct_missing: Optional[float] = None,
+                        nunique: Optional[int] = None) -> float:
     """Penalize if PII suspected, huge missingness, too high cardinality for categorical, etc."""
     penalty = 0.0
     n = len(series)
     if n == 0:
         return 1.0
-    pct_missing = series.isna().mean()
+    if pct_missing is None:
+        pct_missing = series.isna().mean()
     if pct_missing > 0.5:
         penalty += 0.2
     # PII heuristics (very simple; should be improved with a dedicated detector)
@@ -188,7 +332,7 @@ def operational_penalty(series: pd.Series, col_name: str) -> float:
     if any(x in name for x in ["email", "ssn", "dni", "passport", "phone", "telefono"]):
         penalty += 0.6
     # high cardinality categorical
-    if pd.api.types.is_object_dtype(series) and series.nunique(dropna=True) > 1000:
+    if pd.api.types.is_object_dtype(series) and (series.nunique(dropna=True) if nunique is None else nunique) > 1000:
         penalty += 0.2
     return float(max(0.0, min(1.0, penalty)))
 
@@ -223,13 +367,22 @@ def select_top_k_predictors(df: pd.DataFrame, target: pd.Series, k: int = 10) ->
             corrs[c] = 0.0 if np.isnan(corr) else float(corr)
         except Exception:
             corrs[c] = 0.0
-    sorted_cols = sorted(corrs.items(), key=lambda x: x[1], reverse=True)
+    sorted_cols = sorted(corrs.items(), key=lambda x: _rank_value(x[1]), reverse=True)
     return [c for c, _ in sorted_cols[:k]]
 
-def quick_predictability_estimate(df: pd.DataFrame, col: str, config: Dict = DEFAULT_CONFIG) -> Dict[str, Any]:
+def _profile_top_k_predictors(profile: DetectionProfile, col: str, k: int) -> List[str]:
+    """select_top_k_predictors over the precomputed correlation matrix of the sample."""
+    others = [c for c in profile.numeric_cols if c != col]
+    corrs = np.abs(profile.sample_corr.loc[others, col].to_numpy()) if others else np.array([])
+    corrs = np.round(np.where(np.isnan(corrs), 0.0, corrs), RANK_DECIMALS)
+    order = np.argsort(-corrs, kind="stable")[:k]
+    return [others[i] for i in order]
+
+def quick_predictability_estimate(df: pd.DataFrame, col: str, config: Dict = DEFAULT_CONFIG,
+                                  profile: Optional[DetectionProfile] = None) -> Dict[str, Any]:
     """
     Cheap predictive estimate:
-      - sample up to max_sample_for_pred
+      - sample up to max_sample_for_pred (the profile's shared sample when given)
       - select top-k predictors
       - run 3-fold CV on lightweight models (DecisionTree + Logistic/Ridge)
     Returns: {"metric": "auc"|"r2"|"na", "value": 0..1, "raw": raw_metric}
@@ -245,14 +398,18 @@ def quick_predictability_estimate(df: pd.DataFrame, col: str, config: Dict = DEF
         # not enough data to estimate reliably
         return {"metric": "na", "value": 0.0, "note": "insufficient_rows"}
 
-    # sample deterministically
-    sample = df.sample(n=sample_n, random_state=qcfg["random_state"])
+    # sample deterministically (the same rows for every column)
+    sample = profile.sample if profile is not None and profile.sample is not None else \
+        df.sample(n=sample_n, random_state=qcfg["random_state"])
     y = sample[col]
     X = sample.drop(columns=[col])
 
     # select predictors
     num_X = X.select_dtypes(include=[np.number])
-    top_preds = select_top_k_predictors(pd.concat([num_X, y], axis=1), y, k=qcfg["top_k_predictors"])
+    if profile is not None and profile.sample_corr is not None and col in profile.numeric_cols:
+        top_preds = _profile_top_k_predictors(profile, col, qcfg["top_k_predictors"])
+    else:
+        top_preds = select_top_k_predictors(pd.concat([num_X, y], axis=1), y, k=qcfg["top_k_predictors"])
     if len(top_preds) == 0:
         # fallback: use all numeric columns if none selected
         top_preds = num_X.columns.tolist()[:qcfg["top_k_predictors"]]
@@ -325,13 +482,56 @@ def weighted_score(components: Dict[str, float], config: Dict = DEFAULT_CONFIG)
     final = score - penalty
     return float(max(0.0, min(1.0, final)))
 
-def detect_target(df: pd.DataFrame, job_id: str, config: Dict = DEFAULT_CONFIG) -> Dict[str, Any]:
+def optimistic_score(components: Dict[str, float], config: Dict = DEFAULT_CONFIG) -> float:
+    """Upper bound of weighted_score for a column whose predictability (P) is not known yet."""
+    return weighted_score({**components, "P": 1.0}, config)
+
+def _predictability_check(df: pd.DataFrame, col: str, config: Dict, profile: Optional[DetectionProfile]) -> Dict[str, Any]:
+    try:
+        return quick_predictability_estimate(df, col, config, profile)
+    except Exception as e:
+        return {"metric": "na", "value": 0.0, "error": str(e)}
+
+def run_predictability_checks(df: pd.DataFrame, cols: List[str], config: Dict = DEFAULT_CONFIG,
+                              profile: Optional[DetectionProfile] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Runs quick_predictability_estimate for `cols`, in a process pool when there is
+    more than one column to check. The pool has as many workers as the active
+    `cpu_allocation` has cores, or `config["pruning"]["n_jobs"]` if that is lower;
+    outside an allocation the checks run serially. The workers only receive the
+    shared sample, not the full dataset.
+    """
+    n_jobs = config.get("pruning", DEFAULT_CONFIG["pruning"]).get("n_jobs")
+    cores = allocated_cores()
+    n_jobs = min(n_jobs, cores) if n_jobs is not None and n_jobs > 0 else cores
+    if profile is not None and profile.sample is not None and n_jobs > 1 and len(cols) > 1:
+        # quick_predictability_estimate only reads the sample (and its size) once the profile has one
+        worker_profile = replace(profile, numeric_filled=None, corr=None)
+        results = Parallel(n_jobs=min(n_jobs, len(cols)))(
+            delayed(_predictability_check)(profile.sample, col, config, worker_profile) for col in cols
+        )
+        return dict(zip(cols, results))
+    return {col: _predictability_check(df, col, config, profile) for col in cols}
+
+def detect_target(df: pd.DataFrame, job_id: str, config: Dict = DEFAULT_CONFIG,
+                  column_profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     Main entry point. Reads a DataFrame, computes scores for each non-ID column,
     runs quick predictability checks, and returns all results as a dictionary.
+
+    Scoring runs in two phases: the cheap components (A, T, V, R, S, O) for every
+    column, then the quick predictability check (P) only for the top
+    `pruning.top_k_candidates` columns by optimistic score. Pruned columns keep P=0.
+    `column_profile` is the dataset's shared column profile, if already computed.
     """
     # Calculate dataset hash from DataFrame content
-    dataset_hash = hashlib.sha256(pd.util.hash_pandas_object(df, index=True).values).hexdigest()
+    if column_profile is not None:
+        dataset_hash = column_profile["dataset_hash"]
+    else:
+        dataset_hash = get_fingerprint_cache().fingerprint(job_id, df).digest
+
+    # Everything that spans several columns is computed once, not once per column
+    profile = build_detection_profile(df, config, column_profile)
 
     eda_summary = {
         "n_rows": len(df),
@@ -346,38 +546,47 @@ def detect_target(df: pd.DataFrame, job_id: str, config: Dict = DEFAULT_CONFIG)
         col_summary = {
             "name": col,
             "dtype": str(series.dtype),
-            "n_unique": int(series.nunique(dropna=True)),
-            "pct_missing": float(series.isna().mean())
+            "n_unique": int(profile.nunique[col]),
+            "pct_missing": float(profile.pct_missing[col])
         }
         eda_summary["columns"].append(col_summary)
 
-        if is_id_column(series, config):
+        if is_id_column(series, config, nunique=profile.nunique[col]):
             continue
 
-        A = availability_score(series)
-        T = type_score(series)
-        V = variability_score(series, df)
-        R = correlation_signal(df, col)
+        A = availability_score(series, pct_missing=profile.pct_missing[col])
+        T = type_score(series, nunique=profile.nunique[col])
+        V = variability_score(series, df, profile)
+        R = correlation_signal(df, col, profile=profile)
         S = semantic_boost(col, config)
-        O = operational_penalty(series, col)
+        O = operational_penalty(series, col, pct_missing=profile.pct_missing[col], nunique=profile.nunique[col])
 
-        try:
-            P_res = quick_predictability_estimate(df, col, config)
-            P = float(P_res.get("value", 0.0))
-        except Exception as e:
-            P_res = {"metric": "na", "value": 0.0, "error": str(e)}
-            P = 0.0
-
-        comps = {"A": A, "T": T, "V": V, "R": R, "P": P, "S": S, "O": O}
-        score = weighted_score(comps, config)
         candidates.append({
             "col": col,
-            "score": score,
+            "components": {"A": A, "T": T, "V": V, "R": R, "P": 0.0, "S": S, "O": O}
+        })
+
+    # Phase 2: predictability only for the most promising columns
+    top_k = config.get("pruning", DEFAULT_CONFIG["pruning"]).get("top_k_candidates")
+    ranked = sorted(candidates, key=lambda c: _rank_value(optimistic_score(c["components"], config)), reverse=True)
+    survivors = ranked if top_k is None else ranked[:top_k]
+    # The checks' worker pool is sized by (and accounted to) the job's CPU allocation
+    with cpu_allocation(job_id):
+        estimates = run_predictability_checks(df, [c["col"] for c in survivors], config, profile)
+
+    scored = []
+    for candidate in candidates:
+        P_res = estimates.get(candidate["col"], {"metric": "na", "value": 0.0, "note": "pruned"})
+        comps = {**candidate["components"], "P": float(P_res.get("value", 0.0))}
+        scored.append({
+            "col": candidate["col"],
+            "score": weighted_score(comps, config),
             "components": comps,
             "predict_estimate": P_res
         })
+    candidates = scored
 
-    candidates = sorted(candidates, key=lambda x: x["score"], reverse=True)
+    candidates = sorted(candidates, key=lambda x: _rank_value(x["score"]), reverse=True)
     top = candidates[:5]
 
     decision = {
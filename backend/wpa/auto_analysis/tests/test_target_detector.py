@@ -83,3 +83,113 @@ def test_detect_target_integration(synthetic_dataset):
     candidate_cols = {c["col"] for c in target_data["candidates"]}
     assert "user_id" not in candidate_cols
     assert "another_id" not in candidate_cols
+
+def test_profile_scores_match_per_column_scores():
+    """Scoring against the precomputed profile gives the same components as the per-column path."""
+    import numpy as np
+    from backend.wpa.auto_analysis.target_detector import (
+        DEFAULT_CONFIG, build_detection_profile, variability_score, correlation_signal,
+        quick_predictability_estimate, availability_score, type_score, operational_penalty,
+    )
+
+    rng = np.random.default_rng(0)
+    n = 400
+    df = pd.DataFrame({
+        'age': rng.integers(18, 80, n).astype(float),
+        'tenure': rng.integers(1, 10, n),
+        'monthly_spend': rng.normal(70, 20, n),
+        'constant': np.ones(n),
+        'empty': np.full(n, np.nan),
+        'segment': rng.choice(['a', 'b', 'c'], n),
+        'is_active': rng.random(n) > 0.5,
+    })
+    df.loc[::7, 'age'] = np.nan
+    df['churn'] = ((df['monthly_spend'] > 80) & (df['tenure'] > 5)).astype(int)
+
+    profile = build_detection_profile(df, DEFAULT_CONFIG)
+    for col in df.columns:
+        series = df[col]
+        assert availability_score(series, pct_missing=profile.pct_missing[col]) == availability_score(series)
+        assert type_score(series, nunique=profile.nunique[col]) == type_score(series)
+        assert operational_penalty(series, col, profile.pct_missing[col], profile.nunique[col]) == \
+            operational_penalty(series, col)
+        assert variability_score(series, df, profile) == pytest.approx(variability_score(series, df), abs=1e-12)
+        if col in profile.numeric_cols:
+            assert correlation_signal(df, col, profile=profile) == pytest.approx(correlation_signal(df, col), abs=1e-12)
+        if col != 'empty':
+            assert quick_predictability_estimate(df, col, DEFAULT_CONFIG, profile) == \
+                quick_predictability_estimate(df, col, DEFAULT_CONFIG)
+
+def test_profile_and_per_column_paths_rank_near_ties_identically():
+    """Correlations that differ only by floating-point noise are ties broken by column order."""
+    import numpy as np
+    from backend.wpa.auto_analysis.target_detector import (
+        DEFAULT_CONFIG, build_detection_profile, select_top_k_predictors, _profile_top_k_predictors,
+    )
+
+    rng = np.random.default_rng(1)
+    n = 300
+    base = rng.normal(0, 1, n)
+    df = pd.DataFrame({
+        'target': base + rng.normal(0, 0.5, n),
+        # Same information at different scales: equal correlations up to rounding noise.
+        'b_scaled': base * 3.0 + 1e-3,
+        'a_copy': base,
+        'c_shifted': base + 7.0,
+        'noise': rng.normal(0, 1, n),
+    })
+
+    profile = build_detection_profile(df, DEFAULT_CONFIG)
+    expected = ['b_scaled', 'a_copy', 'c_shifted']
+    assert select_top_k_predictors(df, df['target'], k=3) == expected
+    assert _profile_top_k_predictors(profile, 'target', 3) == expected
+
+def test_detect_target_prunes_predictability_to_top_k():
+    """Only the top-K columns by optimistic score get the CV predictability check."""
+    import copy
+    import numpy as np
+    from backend.wpa.auto_analysis.target_detector import DEFAULT_CONFIG
+
+    rng = np.random.default_rng(1)
+    n = 300
+    df = pd.DataFrame({f"f{i}": rng.integers(0, 50, n) for i in range(6)})
+    df['churn'] = (df['f0'] + df['f1'] > 50).astype(int)
+
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    config["pruning"] = {"top_k_candidates": 2, "n_jobs": 2}
+    pruned = detect_target(df, "job", config)["target_decision"]["candidates"]
+
+    checked = [c for c in pruned if c["predict_estimate"].get("note") != "pruned"]
+    assert len(checked) == 2
+    assert all(set(c) == {"col", "score", "components", "predict_estimate"} for c in pruned)
+
+    config["pruning"] = {"top_k_candidates": None, "n_jobs": 1}
+    full = {c["col"]: c for c in detect_target(df, "job", config)["target_decision"]["candidates"]}
+    for c in checked:
+        assert c["predict_estimate"] == full[c["col"]]["predict_estimate"]
+
+def test_predictability_pool_is_bounded_by_the_cpu_allocation(monkeypatch, tmp_path):
+    """The configured worker count is capped by the job's allocated cores, not taken as is."""
+    import numpy as np
+    from joblib import Parallel
+    from backend.core import resource_manager
+    from backend.core.resource_manager import ResourceManager
+    from backend.wpa.auto_analysis import target_detector
+
+    monkeypatch.setattr(resource_manager, "_resource_manager", ResourceManager(
+        total_cores=2, max_cores_per_job=2, ledger_path=str(tmp_path / "ledger.json")
+    ))
+    pools = []
+    monkeypatch.setattr(target_detector, "Parallel", lambda n_jobs: pools.append(n_jobs) or Parallel(n_jobs=n_jobs))
+
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame({f"f{i}": rng.integers(0, 50, 300) for i in range(6)})
+    df['churn'] = (df['f0'] + df['f1'] > 50).astype(int)
+    config = dict(target_detector.DEFAULT_CONFIG, pruning={"top_k_candidates": 4, "n_jobs": 4})
+
+    detect_target(df, "job-cpu", config)
+    detect_target(df, "job-cpu", dict(config, pruning={"top_k_candidates": 4, "n_jobs": None}))
+    target_detector.run_predictability_checks(df, ["f0", "f1"], config, target_detector.build_detection_profile(df, config))
+
+    assert target_detector.DEFAULT_CONFIG["pruning"]["n_jobs"] is None  # derived from the allocation
+    assert pools == [2, 2]  # outside an allocation the checks run serially
@@ -25,6 +25,8 @@ from sklearn.preprocessing import LabelEncoder
 from sklearn.feature_selection import mutual_info_classif, mutual_info_regression
 from scipy import stats
 
+from backend.mpa.profiling.service import build_column_profile
+
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
@@ -141,9 +143,11 @@ class AutoMLRecommender:
     def __init__(self, verbose: bool = False):
         self.verbose = verbose
 
-    def recommend(self, df: pd.DataFrame, max_samples: int = 3000) -> Dict[str, Any]:
+    def recommend(self, df: pd.DataFrame, max_samples: int = 3000,
+                  column_profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
-        Produces a recommendation dict:
+        Produces a recommendation dict (column statistics are read from
+        `column_profile` when the caller already has the dataset's profile):
          - charts: per column or pair recommended chart type(s)
          - kpis: suggested KPI computations
          - candidate_targets: list of best columns to be used as target (with predictability)
@@ -162,15 +166,16 @@ class AutoMLRecommender:
         }
 
         # basic column profiling
+        column_profile = column_profile or build_column_profile(df)
         profile = {}
         for col in df.columns:
-            s = df[col]
+            c = column_profile["columns"][str(col)]
             profile[col] = {
-                "dtype": str(s.dtype),
-                "n_unique": int(s.nunique(dropna=True)),
-                "pct_missing": float(s.isna().mean()),
-                "skew": skewness(s) if is_numeric_series(s) else None,
-                "cardinality": cardinality(s)
+                "dtype": c["dtype"],
+                "n_unique": c["n_unique"],
+                "pct_missing": float(c["null_count"] / nrows) if nrows else float("nan"),
+                "skew": c["skew"] if is_numeric_series(df[col]) else None,
+                "cardinality": c["n_unique"]
             }
 
         # Suggest charts per column
@@ -227,12 +232,12 @@ class AutoMLRecommender:
         # Rank columns by: not-high-missing, adequate cardinality, predictability quick test, semantic boost
         candidate_scores = []
         for col in df.columns:
-            s = df[col]
+            info = profile[col]
             # skip ID-like
-            unique_frac = s.nunique(dropna=True) / max(1, len(s))
+            unique_frac = info["n_unique"] / max(1, nrows)
             if unique_frac > 0.95:
                 continue
-            if pct_missing(s) > 0.6:
+            if info["pct_missing"] > 0.6:
                 continue
             # compute quick predictability
             try:
@@ -246,7 +251,7 @@ class AutoMLRecommender:
             for kw in ["target","label","y","churn","outcome","sales","revenue","price","amount"]:
                 if kw in low:
                     boost += 0.08
-            score = 0.3 * (1 - pct_missing(s)) + 0.4 * metric + 0.3 * (1 - unique_frac) + boost
+            score = 0.3 * (1 - info["pct_missing"]) + 0.4 * metric + 0.3 * (1 - unique_frac) + boost
             candidate_scores.append((col, float(score), qp))
 
         candidate_scores.sort(key=lambda x: x[1], reverse=True)
@@ -258,7 +263,7 @@ class AutoMLRecommender:
         if res["candidate_targets"]:
             top_target = res["candidate_targets"][0]
             tcol = top_target["col"]
-            if is_categorical_series(df[tcol]) or (is_numeric_series(df[tcol]) and cardinality(df[tcol]) <= 15):
+            if is_categorical_series(df[tcol]) or (is_numeric_series(df[tcol]) and profile[tcol]["cardinality"] <= 15):
                 # classification
                 models = [
                     {"family": "tree_ensemble", "examples": ["xgboost","lightgbm","random_forest"], "reason": "handles heterogenous features, robust to missing"},
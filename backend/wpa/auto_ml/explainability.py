@@ -2,7 +2,9 @@ import pandas as pd
 import shap
 import numpy as np
 import matplotlib.pyplot as plt
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, Optional
+
+from backend.core.cancellation import JobCancelled
 
 SUPPORTED_TREE_MODELS = (
     "RandomForestClassifier", "RandomForestRegressor",
@@ -11,12 +13,31 @@ SUPPORTED_TREE_MODELS = (
     "DecisionTreeClassifier", "DecisionTreeRegressor"
 )
 
+# SHAP values are computed this many rows at a time so a cancellation is noticed
+# between batches.
+SHAP_BATCH_ROWS = 1000
+
+def _batched_shap_values(explainer, X, should_stop: Optional[Callable[[], bool]]):
+    batches = []
+    for start in range(0, X.shape[0], SHAP_BATCH_ROWS):
+        if should_stop is not None and should_stop():
+            raise JobCancelled("")
+        batches.append(explainer.shap_values(X[start:start + SHAP_BATCH_ROWS]))
+    if len(batches) == 1:
+        return batches[0]
+    if isinstance(batches[0], list):
+        return [np.concatenate(per_class, axis=0) for per_class in zip(*batches)]
+    return np.concatenate(batches, axis=0)
+
 def explain_model(
     pipeline,
-    X_train: pd.DataFrame
+    X_train: pd.DataFrame,
+    should_stop: Optional[Callable[[], bool]] = None
 ) -> Optional[Dict[str, Any]]:
     """
     Generates SHAP explainability artifacts and returns them in-memory.
+    `should_stop` is checked between batches of SHAP_BATCH_ROWS rows; once it
+    returns True, JobCancelled is raised.
     """
     artifacts = {"json_artifacts": {}, "figure_artifacts": {}}
     try:
@@ -43,7 +64,7 @@ def explain_model(
         model_type = type(model).__name__
         if model_type in SUPPORTED_TREE_MODELS:
             explainer = shap.TreeExplainer(model)
-            shap_values = explainer.shap_values(X_train_transformed)
+            shap_values = _batched_shap_values(explainer, X_train_transformed, should_stop)
         else:
             # For KernelExplainer, create a wrapper for predict_proba
             def predict_proba_wrapper(X):
@@ -52,7 +73,7 @@ def explain_model(
 
             X_train_sample = shap.sample(X_train_transformed, 50)
             explainer = shap.KernelExplainer(predict_proba_wrapper, X_train_sample)
-            shap_values = explainer.shap_values(X_train_transformed)
+            shap_values = _batched_shap_values(explainer, X_train_transformed, should_stop)
 
         # For classifiers, shap_values can be a list (one per class).
         # We'll use the values for the "positive" class for summaries.
@@ -89,6 +110,8 @@ def explain_model(
 
         return artifacts
 
+    except JobCancelled:
+        raise
     except Exception as e:
         print(f"SHAP explainability failed: {e}")
         # Ensure all created figures are closed on failure
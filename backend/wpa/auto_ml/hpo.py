@@ -1,33 +1,61 @@
+from celery import chord
 from backend.celery_worker import celery_app
-from backend.wpa.auto_ml.hpo_service import HPOService
+from backend.wpa.auto_ml.hpo_service import HPOService, create_pruner, get_study_storage
 from backend.core.state_store import StateStore
+from backend.core.cancellation import CancellationToken
+from backend.core.resource_manager import cpu_allocation
 from backend.wpa.auto_ml.model_registry import get_model
+import optuna
 import pandas as pd
 import io
 import mlflow
 
+def _load_training_data(state_store: StateStore, job_id: str):
+    X_train_bytes = state_store.load_artifact_as_bytes(job_id, "X_train.parquet")
+    X_train_df = pd.read_parquet(io.BytesIO(X_train_bytes))
+
+    y_train_bytes = state_store.load_artifact_as_bytes(job_id, "y_train.parquet")
+    y_train_df = pd.read_parquet(io.BytesIO(y_train_bytes))
+
+    return X_train_df, y_train_df.squeeze()
+
+def _study_name(job_id: str, model_name: str) -> str:
+    return f"hpo_{job_id}_{model_name}"
+
 @celery_app.task(name="automl.run_hpo_study")
 def run_hpo_study(job_id: str, request: dict):
     """
     Celery task to run an HPO study.
+
+    With `n_workers > 1` this task only coordinates: it creates the study in the
+    shared Optuna storage and fans out `n_workers` `run_hpo_worker` tasks that pull
+    trials from it concurrently; `finalize_hpo_study` then aggregates the result.
+    A cancelled job stops the study; the best parameters found so far are saved.
     """
     state_store = StateStore()
+    cancel_token = CancellationToken(state_store, job_id)
 
     try:
-        # Load data from StateStore
-        X_train_bytes = state_store.load_artifact_as_bytes(job_id, "X_train.parquet")
-        X_train_df = pd.read_parquet(io.BytesIO(X_train_bytes))
-
-        y_train_bytes = state_store.load_artifact_as_bytes(job_id, "y_train.parquet")
-        y_train_df = pd.read_parquet(io.BytesIO(y_train_bytes))
+        n_workers = request.get('n_workers', 1)
+        if n_workers > 1:
+            study_name = _study_name(job_id, request['model_name'])
+            optuna.create_study(
+                direction='maximize', study_name=study_name, storage=get_study_storage(),
+                pruner=create_pruner(request.get('pruner', 'median')), load_if_exists=True
+            )
+            state_store.save_job_status(job_id, {"status": "running", "stage": "hpo", "hpo_workers": n_workers})
+            result = chord(
+                run_hpo_worker.s(job_id, request, study_name, worker_index) for worker_index in range(n_workers)
+            )(finalize_hpo_study.s(job_id, request, study_name))
+            return {"status": "DISTRIBUTED", "study_name": study_name, "finalize_task_id": result.id}
 
-        y_train = y_train_df.squeeze()
+        X_train_df, y_train = _load_training_data(state_store, job_id)
 
         # Get model wrapper
         model_wrapper = get_model(request['model_name'])
 
         # Start MLflow run
-        with mlflow.start_run(run_name=f"hpo_study_{job_id}_{request['model_name']}") as parent_run:
+        with cpu_allocation(job_id, process_thread_limits=True), mlflow.start_run(run_name=f"hpo_study_{job_id}_{request['model_name']}") as parent_run:
             mlflow.log_param("job_id", job_id)
             mlflow.log_param("model_name", request['model_name'])
 
@@ -37,7 +65,10 @@ def run_hpo_study(job_id: str, request: dict):
                 X=X_train_df,
                 y=y_train,
                 n_trials=request['n_trials'],
-                scoring=request['scoring']
+                scoring=request['scoring'],
+                timeout=request.get('max_runtime_seconds'),
+                pruner=request.get('pruner', 'median'),
+                cancel_token=cancel_token
             )
             best_params = hpo_service.optimize()
 
@@ -46,9 +77,76 @@ def run_hpo_study(job_id: str, request: dict):
 
             # Save results
             state_store.save_json_artifact(job_id, f"hpo_results_{request['model_name']}.json", best_params)
-            state_store.save_job_status(job_id, {"status": "completed", "stage": "hpo"})
+            status = "cancelled" if hpo_service.cancelled else "completed"
+            state_store.save_job_status(job_id, {"status": status, "stage": "hpo"})
+
+        return {"status": "CANCELLED" if hpo_service.cancelled else "SUCCESS", "best_params": best_params}
+
+    except Exception as e:
+        state_store.save_job_status(job_id, {"status": "failed", "stage": "hpo", "error": str(e)})
+        return {"status": "FAILURE", "error": str(e)}
+
+@celery_app.task(name="automl.run_hpo_worker")
+def run_hpo_worker(job_id: str, request: dict, study_name: str, worker_index: int):
+    """
+    Celery task that pulls trials from a shared study until the study as a whole
+    reaches `n_trials`. Several of these run concurrently on different workers.
+    """
+    state_store = StateStore()
+
+    try:
+        X_train_df, y_train = _load_training_data(state_store, job_id)
+
+        with cpu_allocation(f"{job_id}:hpo_worker_{worker_index}", process_thread_limits=True), \
+                mlflow.start_run(run_name=f"hpo_worker_{job_id}_{request['model_name']}_{worker_index}"):
+            mlflow.log_param("job_id", job_id)
+            mlflow.log_param("model_name", request['model_name'])
+            mlflow.log_param("study_name", study_name)
+
+            hpo_service = HPOService(
+                model_wrapper=get_model(request['model_name']),
+                X=X_train_df,
+                y=y_train,
+                n_trials=request['n_trials'],
+                scoring=request['scoring'],
+                timeout=request.get('max_runtime_seconds'),
+                study_name=study_name,
+                storage=get_study_storage(),
+                pruner=request.get('pruner', 'median'),
+                cancel_token=CancellationToken(state_store, job_id)
+            )
+            hpo_service.optimize()
+
+        return {"status": "CANCELLED" if hpo_service.cancelled else "SUCCESS", "worker_index": worker_index}
+
+    except Exception as e:
+        return {"status": "FAILURE", "worker_index": worker_index, "error": str(e)}
+
+@celery_app.task(name="automl.finalize_hpo_study")
+def finalize_hpo_study(worker_results: list, job_id: str, request: dict, study_name: str):
+    """
+    Chord callback of a distributed HPO study: reads the best trial from the shared
+    storage and saves it to `hpo_results_<model>.json`. If the job was cancelled, the
+    best trial finished before the cancellation is saved and the job is `cancelled`.
+    """
+    state_store = StateStore()
+
+    try:
+        study = optuna.load_study(study_name=study_name, storage=get_study_storage())
+        best_params = study.best_params
+
+        with mlflow.start_run(run_name=f"hpo_study_{job_id}_{request['model_name']}"):
+            mlflow.log_param("job_id", job_id)
+            mlflow.log_param("model_name", request['model_name'])
+            mlflow.log_param("n_workers", len(worker_results))
+            mlflow.log_params({"best_params": best_params})
+            mlflow.log_metric("best_value", study.best_value)
+            mlflow.log_metric("n_trials_completed", len(study.get_trials(states=(optuna.trial.TrialState.COMPLETE,))))
 
-        return {"status": "SUCCESS", "best_params": best_params}
+        state_store.save_json_artifact(job_id, f"hpo_results_{request['model_name']}.json", best_params)
+        cancelled = CancellationToken(state_store, job_id).is_cancelled()
+        state_store.save_job_status(job_id, {"status": "cancelled" if cancelled else "completed", "stage": "hpo"})
+        return {"status": "CANCELLED" if cancelled else "SUCCESS", "best_params": best_params, "workers": worker_results}
 
     except Exception as e:
         state_store.save_job_status(job_id, {"status": "failed", "stage": "hpo", "error": str(e)})
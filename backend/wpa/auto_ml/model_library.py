@@ -1,20 +1,38 @@
-# This file is used to import all the model wrappers so that they can be
-# registered in the MODEL_REGISTRY.
+# This file declares every model wrapper that can be registered in the
+# MODEL_REGISTRY, keyed by registry name, together with the module that defines
+# it. The modules are not imported here: MODEL_REGISTRY imports a module (and so
+# runs its @register_model decorators) only when one of its models is requested,
+# which keeps LightGBM and XGBoost out of the API and worker start-up path.
 
-# Classifiers
-from backend.wpa.auto_ml.models.linear_models import LogisticRegressionWrapper
-from backend.wpa.auto_ml.models.tree_models import RandomForestClassifierWrapper, DecisionTreeClassifierWrapper
-from backend.wpa.auto_ml.models.ensemble_models import GradientBoostingClassifierWrapper
-from backend.wpa.auto_ml.models.svm_models import SVCWrapper
-from backend.wpa.auto_ml.models.knn import KNeighborsClassifierWrapper
-from backend.wpa.auto_ml.models.naive_bayes import GaussianNBWrapper
-from backend.wpa.auto_ml.models.ensemble_models import LightGBMClassifierWrapper, XGBoostClassifierWrapper
+MODEL_LIBRARY = {
+    # Classifiers
+    "LogisticRegression": "backend.wpa.auto_ml.models.linear_models",
+    "RandomForestClassifier": "backend.wpa.auto_ml.models.tree_models",
+    "DecisionTreeClassifier": "backend.wpa.auto_ml.models.tree_models",
+    "GradientBoostingClassifier": "backend.wpa.auto_ml.models.ensemble_models",
+    "SVC": "backend.wpa.auto_ml.models.svm_models",
+    "KNeighborsClassifier": "backend.wpa.auto_ml.models.knn",
+    "GaussianNB": "backend.wpa.auto_ml.models.naive_bayes",
+    "LightGBMClassifier": "backend.wpa.auto_ml.models.ensemble_models",
+    "XGBoostClassifier": "backend.wpa.auto_ml.models.ensemble_models",
 
-# Regressors
-from backend.wpa.auto_ml.models.linear_models import LinearRegressionWrapper, ElasticNetWrapper, LassoWrapper, RidgeWrapper
-from backend.wpa.auto_ml.models.tree_models import RandomForestRegressorWrapper, ExtraTreesRegressorWrapper
-from backend.wpa.auto_ml.models.svm_models import SVRWrapper
-from backend.wpa.auto_ml.models.ensemble_models import GradientBoostingRegressorWrapper, LightGBMRegressorWrapper, XGBoostRegressorWrapper
+    # Regressors
+    "LinearRegression": "backend.wpa.auto_ml.models.linear_models",
+    "ElasticNet": "backend.wpa.auto_ml.models.linear_models",
+    "Lasso": "backend.wpa.auto_ml.models.linear_models",
+    "Ridge": "backend.wpa.auto_ml.models.linear_models",
+    "RandomForestRegressor": "backend.wpa.auto_ml.models.tree_models",
+    "ExtraTreesRegressor": "backend.wpa.auto_ml.models.tree_models",
+    "SVR": "backend.wpa.auto_ml.models.svm_models",
+    "GradientBoostingRegressor": "backend.wpa.auto_ml.models.ensemble_models",
+    "LightGBMRegressor": "backend.wpa.auto_ml.models.ensemble_models",
+    "XGBoostRegressor": "backend.wpa.auto_ml.models.ensemble_models",
 
-# Clustering
-from backend.wpa.auto_ml.models.clustering import KMeansWrapper, DBSCANWrapper, AgglomerativeClusteringWrapper, BirchWrapper, GaussianMixtureWrapper, MiniBatchKMeansWrapper
+    # Clustering
+    "kmeans": "backend.wpa.auto_ml.models.clustering",
+    "dbscan": "backend.wpa.auto_ml.models.clustering",
+    "agglomerative_clustering": "backend.wpa.auto_ml.models.clustering",
+    "birch": "backend.wpa.auto_ml.models.clustering",
+    "gaussian_mixture": "backend.wpa.auto_ml.models.clustering",
+    "minibatch_kmeans": "backend.wpa.auto_ml.models.clustering",
+}
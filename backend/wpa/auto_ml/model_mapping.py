@@ -1,98 +1,88 @@
-from sklearn.linear_model import (
-    LogisticRegression, LinearRegression, Ridge, Lasso, ElasticNet,
-    BayesianRidge, HuberRegressor, PassiveAggressiveClassifier,
-    SGDClassifier, Perceptron
-)
-from sklearn.ensemble import (
-    RandomForestClassifier, RandomForestRegressor, GradientBoostingClassifier,
-    AdaBoostClassifier, IsolationForest
-)
-from sklearn.svm import SVR, SVC
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.naive_bayes import GaussianNB
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
-from sklearn.decomposition import PCA
-from sklearn.manifold import TSNE
-from sklearn.cluster import (
-    KMeans, DBSCAN, AgglomerativeClustering, Birch, OPTICS,
-    MeanShift, SpectralClustering, AffinityPropagation
-)
-from sklearn.mixture import GaussianMixture
-from xgboost import XGBClassifier, XGBRegressor
-from lightgbm import LGBMClassifier, LGBMRegressor
-from catboost import CatBoostClassifier, CatBoostRegressor
-from prophet import Prophet
-from statsmodels.tsa.arima.model import ARIMA
-from statsmodels.tsa.statespace.sarimax import SARIMAX
-from statsmodels.tsa.vector_ar.var_model import VAR
-from sktime.forecasting.theta import ThetaForecaster
-from implicit.als import AlternatingLeastSquares
+"""
+Lazy catalog of the models available to `AutoMlService`.
 
-# Import the wrappers for Deep Learning models
-from backend.wpa.auto_ml.wrappers import (
-    DenseNeuralNetworkClassifier, LSTMForecaster, GRUForecaster,
-    TransformerForecaster, CNNClassifier, Autoencoder, RNNForecaster,
-    BidirectionalLSTMForecaster
-)
+Each entry holds the dotted import path of the estimator class plus its metadata.
+Nothing is imported when this module is loaded; the estimator class is resolved
+with `load_model_class` only when a model is actually trained, so API replicas and
+Celery workers no longer pay the import cost of TensorFlow, Prophet, CatBoost,
+sktime and friends at boot.
+"""
+import importlib
+from functools import lru_cache
+from typing import Any, Dict
 
-MODEL_MAP = {
+MODEL_MAP: Dict[str, Dict[str, str]] = {
     # Classification
-    "logistic_regression": {"model": LogisticRegression, "type": "classification"},
-    "random_forest_classifier": {"model": RandomForestClassifier, "type": "classification"},
-    "decision_tree_classifier": {"model": DecisionTreeClassifier, "type": "classification"},
-    "svm_classifier": {"model": SVC, "type": "classification"},
-    "gradient_boosting_classifier": {"model": GradientBoostingClassifier, "type": "classification"},
-    "adaboost": {"model": AdaBoostClassifier, "type": "classification"},
-    "k_nearest_neighbors": {"model": KNeighborsClassifier, "type": "classification"},
-    "naive_bayes": {"model": GaussianNB, "type": "classification"},
-    "xgboost_classifier": {"model": XGBClassifier, "type": "classification"},
-    "lightgbm_classifier": {"model": LGBMClassifier, "type": "classification"},
-    "catboost_classifier": {"model": CatBoostClassifier, "type": "classification"},
-    "passive_aggressive_classifier": {"model": PassiveAggressiveClassifier, "type": "classification"},
-    "sgd_classifier": {"model": SGDClassifier, "type": "classification"},
-    "perceptron": {"model": Perceptron, "type": "classification"},
-    "dense_neural_network": {"model": DenseNeuralNetworkClassifier, "type": "classification"},
-    "convolutional_neural_network": {"model": CNNClassifier, "type": "classification"},
+    "logistic_regression": {"import_path": "sklearn.linear_model.LogisticRegression", "type": "classification"},
+    "random_forest_classifier": {"import_path": "sklearn.ensemble.RandomForestClassifier", "type": "classification"},
+    "decision_tree_classifier": {"import_path": "sklearn.tree.DecisionTreeClassifier", "type": "classification"},
+    "svm_classifier": {"import_path": "sklearn.svm.SVC", "type": "classification"},
+    "gradient_boosting_classifier": {"import_path": "sklearn.ensemble.GradientBoostingClassifier", "type": "classification"},
+    "adaboost": {"import_path": "sklearn.ensemble.AdaBoostClassifier", "type": "classification"},
+    "k_nearest_neighbors": {"import_path": "sklearn.neighbors.KNeighborsClassifier", "type": "classification"},
+    "naive_bayes": {"import_path": "sklearn.naive_bayes.GaussianNB", "type": "classification"},
+    "xgboost_classifier": {"import_path": "xgboost.XGBClassifier", "type": "classification"},
+    "lightgbm_classifier": {"import_path": "lightgbm.LGBMClassifier", "type": "classification"},
+    "catboost_classifier": {"import_path": "catboost.CatBoostClassifier", "type": "classification"},
+    "passive_aggressive_classifier": {"import_path": "sklearn.linear_model.PassiveAggressiveClassifier", "type": "classification"},
+    "sgd_classifier": {"import_path": "sklearn.linear_model.SGDClassifier", "type": "classification"},
+    "perceptron": {"import_path": "sklearn.linear_model.Perceptron", "type": "classification"},
+    "dense_neural_network": {"import_path": "backend.wpa.auto_ml.wrappers.DenseNeuralNetworkClassifier", "type": "classification"},
+    "convolutional_neural_network": {"import_path": "backend.wpa.auto_ml.wrappers.CNNClassifier", "type": "classification"},
 
     # Regression
-    "linear_regression": {"model": LinearRegression, "type": "regression"},
-    "ridge_regression": {"model": Ridge, "type": "regression"},
-    "lasso_regression": {"model": Lasso, "type": "regression"},
-    "elasticnet_regression": {"model": ElasticNet, "type": "regression"},
-    "svm_regressor": {"model": SVR, "type": "regression"},
-    "random_forest_regressor": {"model": RandomForestRegressor, "type": "regression"},
-    "xgboost_regressor": {"model": XGBRegressor, "type": "regression"},
-    "lightgbm_regressor": {"model": LGBMRegressor, "type": "regression"},
-    "bayesian_ridge": {"model": BayesianRidge, "type": "regression"},
-    "huber_regressor": {"model": HuberRegressor, "type": "regression"},
+    "linear_regression": {"import_path": "sklearn.linear_model.LinearRegression", "type": "regression"},
+    "ridge_regression": {"import_path": "sklearn.linear_model.Ridge", "type": "regression"},
+    "lasso_regression": {"import_path": "sklearn.linear_model.Lasso", "type": "regression"},
+    "elasticnet_regression": {"import_path": "sklearn.linear_model.ElasticNet", "type": "regression"},
+    "svm_regressor": {"import_path": "sklearn.svm.SVR", "type": "regression"},
+    "random_forest_regressor": {"import_path": "sklearn.ensemble.RandomForestRegressor", "type": "regression"},
+    "xgboost_regressor": {"import_path": "xgboost.XGBRegressor", "type": "regression"},
+    "lightgbm_regressor": {"import_path": "lightgbm.LGBMRegressor", "type": "regression"},
+    "bayesian_ridge": {"import_path": "sklearn.linear_model.BayesianRidge", "type": "regression"},
+    "huber_regressor": {"import_path": "sklearn.linear_model.HuberRegressor", "type": "regression"},
 
     # Unsupervised: Clustering, Anomaly Detection, Dimensionality Reduction
-    "kmeans": {"model": KMeans, "type": "clustering"},
-    "dbscan": {"model": DBSCAN, "type": "clustering"},
-    "agglomerative_clustering": {"model": AgglomerativeClustering, "type": "clustering"},
-    "birch": {"model": Birch, "type": "clustering"},
-    "optics": {"model": OPTICS, "type": "clustering"},
-    "meanshift": {"model": MeanShift, "type": "clustering"},
-    "spectral_clustering": {"model": SpectralClustering, "type": "clustering"},
-    "affinity_propagation": {"model": AffinityPropagation, "type": "clustering"},
-    "gaussian_mixture_models": {"model": GaussianMixture, "type": "clustering"},
-    "isolation_forest": {"model": IsolationForest, "type": "unsupervised"},
-    "linear_discriminant_analysis": {"model": LinearDiscriminantAnalysis, "type": "unsupervised"},
-    "principal_component_analysis": {"model": PCA, "type": "unsupervised"},
-    "als_factorization": {"model": AlternatingLeastSquares, "type": "unsupervised"},
-    "autoencoder": {"model": Autoencoder, "type": "unsupervised"},
-    "t_sne": {"model": TSNE, "type": "unsupervised"},
+    "kmeans": {"import_path": "sklearn.cluster.KMeans", "type": "clustering"},
+    "dbscan": {"import_path": "sklearn.cluster.DBSCAN", "type": "clustering"},
+    "agglomerative_clustering": {"import_path": "sklearn.cluster.AgglomerativeClustering", "type": "clustering"},
+    "birch": {"import_path": "sklearn.cluster.Birch", "type": "clustering"},
+    "optics": {"import_path": "sklearn.cluster.OPTICS", "type": "clustering"},
+    "meanshift": {"import_path": "sklearn.cluster.MeanShift", "type": "clustering"},
+    "spectral_clustering": {"import_path": "sklearn.cluster.SpectralClustering", "type": "clustering"},
+    "affinity_propagation": {"import_path": "sklearn.cluster.AffinityPropagation", "type": "clustering"},
+    "gaussian_mixture_models": {"import_path": "sklearn.mixture.GaussianMixture", "type": "clustering"},
+    "isolation_forest": {"import_path": "sklearn.ensemble.IsolationForest", "type": "unsupervised"},
+    "linear_discriminant_analysis": {"import_path": "sklearn.discriminant_analysis.LinearDiscriminantAnalysis", "type": "unsupervised"},
+    "principal_component_analysis": {"import_path": "sklearn.decomposition.PCA", "type": "unsupervised"},
+    "als_factorization": {"import_path": "implicit.als.AlternatingLeastSquares", "type": "unsupervised"},
+    "autoencoder": {"import_path": "backend.wpa.auto_ml.wrappers.Autoencoder", "type": "unsupervised"},
+    "t_sne": {"import_path": "sklearn.manifold.TSNE", "type": "unsupervised"},
 
     # Timeseries
-    "prophet": {"model": Prophet, "type": "timeseries"},
-    "arima": {"model": ARIMA, "type": "timeseries"},
-    "sarimax": {"model": SARIMAX, "type": "timeseries"},
-    "vector_autoregression": {"model": VAR, "type": "timeseries"},
-    "theta_forecaster": {"model": ThetaForecaster, "type": "timeseries"},
-    "lstm": {"model": LSTMForecaster, "type": "timeseries"},
-    "gru": {"model": GRUForecaster, "type": "timeseries"},
-    "transformer": {"model": TransformerForecaster, "type": "timeseries"},
-    "recurrent_neural_network": {"model": RNNForecaster, "type": "timeseries"},
-    "bidirectional_lstm": {"model": BidirectionalLSTMForecaster, "type": "timeseries"},
+    "prophet": {"import_path": "prophet.Prophet", "type": "timeseries"},
+    "arima": {"import_path": "statsmodels.tsa.arima.model.ARIMA", "type": "timeseries"},
+    "sarimax": {"import_path": "statsmodels.tsa.statespace.sarimax.SARIMAX", "type": "timeseries"},
+    "vector_autoregression": {"import_path": "statsmodels.tsa.vector_ar.var_model.VAR", "type": "timeseries"},
+    "theta_forecaster": {"import_path": "sktime.forecasting.theta.ThetaForecaster", "type": "timeseries"},
+    "lstm": {"import_path": "backend.wpa.auto_ml.wrappers.LSTMForecaster", "type": "timeseries"},
+    "gru": {"import_path": "backend.wpa.auto_ml.wrappers.GRUForecaster", "type": "timeseries"},
+    "transformer": {"import_path": "backend.wpa.auto_ml.wrappers.TransformerForecaster", "type": "timeseries"},
+    "recurrent_neural_network": {"import_path": "backend.wpa.auto_ml.wrappers.RNNForecaster", "type": "timeseries"},
+    "bidirectional_lstm": {"import_path": "backend.wpa.auto_ml.wrappers.BidirectionalLSTMForecaster", "type": "timeseries"},
 }
+
+def import_from_path(import_path: str) -> Any:
+    """Imports and returns the attribute named by a dotted path, e.g. 'xgboost.XGBClassifier'."""
+    module_path, _, attr_name = import_path.rpartition(".")
+    return getattr(importlib.import_module(module_path), attr_name)
+
+@lru_cache(maxsize=None)
+def load_model_class(model_name: str) -> type:
+    """
+    Resolves the estimator class of a MODEL_MAP entry, importing its library on first use.
+
+    Raises:
+        KeyError: If `model_name` is not in MODEL_MAP.
+    """
+    return import_from_path(MODEL_MAP[model_name]["import_path"])
@@ -1,8 +1,57 @@
-from typing import Dict, Type, Any
+import importlib
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, Mapping, Optional, Type, Any
 from backend.wpa.auto_ml.models._base import BaseModelWrapper
+from backend.wpa.auto_ml.model_library import MODEL_LIBRARY
+
+class LazyModelRegistry(MutableMapping):
+    """
+    A registry whose entries are either registered wrapper classes or, until first
+    access, the dotted path of the module that registers them.
+
+    Looking a model up imports its module on demand; the module's @register_model
+    decorators then replace the placeholder with the wrapper class. Every way of
+    reading a value (`[]`, `get`, `values`, `items`) goes through that lookup, so
+    callers only ever see classes. Membership tests and key listings never import
+    anything.
+    """
+
+    def __init__(self, entries: Optional[Mapping[str, Any]] = None):
+        self._entries: Dict[str, Any] = dict(entries or {})
+
+    def __getitem__(self, name: str) -> Type[BaseModelWrapper]:
+        entry = self._entries[name]
+        if isinstance(entry, str):
+            importlib.import_module(entry)
+            entry = self._entries[name]
+            if isinstance(entry, str):
+                raise ImportError(f"Module '{entry}' did not register model '{name}'.")
+        return entry
+
+    def __setitem__(self, name: str, cls: Type[BaseModelWrapper]):
+        self._entries[name] = cls
+
+    def __delitem__(self, name: str):
+        del self._entries[name]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._entries!r})"
+
+    def is_loaded(self, name: str) -> bool:
+        """Returns True if the wrapper class of `name` has already been imported."""
+        return not isinstance(self._entries.get(name), str)
 
 # The MODEL_REGISTRY will store mappings from a model's string key to its wrapper class.
-MODEL_REGISTRY: Dict[str, Type[BaseModelWrapper]] = {}
+MODEL_REGISTRY: Dict[str, Type[BaseModelWrapper]] = LazyModelRegistry(MODEL_LIBRARY)
 
 def register_model(name: str):
     """
@@ -23,7 +72,7 @@ def register_model(name: str):
             ...
     """
     def decorator(cls: Type[BaseModelWrapper]):
-        if name in MODEL_REGISTRY:
+        if name in MODEL_REGISTRY and MODEL_REGISTRY.is_loaded(name):
             raise ValueError(f"Model with name '{name}' is already registered.")
         if not issubclass(cls, BaseModelWrapper):
             raise TypeError("Registered class must be a subclass of BaseModelWrapper.")
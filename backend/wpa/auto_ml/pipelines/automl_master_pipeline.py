@@ -1,8 +1,7 @@
 import mlflow
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import os
 import pandas as pd
-import hashlib
 import git
 import matplotlib.pyplot as plt
 import json
@@ -11,16 +10,33 @@ import json
 import backend.wpa.auto_ml.model_library
 
 # Use absolute imports to fix module resolution issues in tests
-from backend.wpa.auto_ml.trainer import train_model_with_cv
+from backend.wpa.auto_ml.trainer import train_model_with_cached_cv, score_on_cached_folds
 from backend.wpa.auto_ml.evaluator import evaluate_model
 from backend.wpa.auto_ml.explainability import explain_model
 from backend.wpa.auto_ml.exporter import export_model
 from backend.wpa.auto_ml.model_card import create_model_card
-from backend.wpa.auto_ml.selection_engine import select_best_model
+from backend.wpa.auto_ml.selection_engine import select_best_model, halving_schedule, successive_halving
 from backend.wpa.auto_ml.data_utils import get_output_dir
-from backend.wpa.auto_ml.pipelines.builder import create_full_pipeline
+from backend.wpa.auto_ml.pipelines.builder import create_preprocessor
+from backend.wpa.auto_ml.preprocessing_cache import PreprocessingCache, dataset_hash
+from backend.wpa.auto_ml.time_budget import TimeBudget, order_by_expected_cost
 from backend.wpa.auto_ml.model_registry import MODEL_REGISTRY
 from backend.core.state_store import StateStore
+from backend.core.cancellation import JobCancelled
+from backend.core.resource_manager import cpu_allocation
+from sklearn.model_selection import train_test_split
+
+HALVING_CV_FOLDS = 3
+
+def _subsample_rows(X: pd.DataFrame, y: pd.Series, fraction: float, problem_type: str):
+    """Deterministic (stratified for classification) subsample of the training rows."""
+    stratify = y if problem_type == "classification" else None
+    try:
+        X_sub, _, y_sub, _ = train_test_split(X, y, train_size=fraction, stratify=stratify, random_state=42)
+    except ValueError:
+        # Too few rows per class to stratify at this fraction
+        X_sub, _, y_sub, _ = train_test_split(X, y, train_size=fraction, random_state=42)
+    return X_sub, y_sub
 
 def run_automl_orchestration(
     job_id: str,
@@ -32,101 +48,186 @@ def run_automl_orchestration(
     categorical_features: List[str],
     model_candidates: List[str],
     scoring: str,
-    use_hpo: bool = False
+    use_hpo: bool = False,
+    selection_mode: str = "full",
+    halving_eta: int = 3,
+    halving_min_fraction: float = 0.1,
+    max_runtime_seconds: Optional[float] = None,
+    cancel_token=None,
+    process_thread_limits: bool = False
 ) -> Dict[str, Any]:
     """
     Orchestrates the full end-to-end AutoML process.
+
+    With `selection_mode="successive_halving"` the candidates are first cross-validated
+    on growing subsamples of the training rows (fractions from `halving_min_fraction`
+    up, `halving_eta` times larger per rung, with fewer folds) and only the top
+    1/`halving_eta` of each rung is promoted. Just the survivors get the full 5-fold
+    CV, evaluation and explainability; the promotion ladder is logged to the parent run.
+
+    `max_runtime_seconds` bounds the run: finalists are trained cheapest first, no new
+    halving rung, candidate (or explainability run) starts once the budget is nearly
+    spent, and the best trial so far is returned with `budget_exhausted` set.
+
+    With a `cancel_token`, a cancelled job scores no further candidate on a halving
+    rung, starts no further finalist and interrupts a running SHAP computation; the
+    trials finished so far (and their exported models) are kept and `cancelled` is set.
+
+    `process_thread_limits` limits the BLAS/OpenMP threads of the whole process to the
+    job's CPU allocation (see `cpu_allocation`); pass it when the caller owns the process.
     """
+    budget = TimeBudget(max_runtime_seconds)
+    if selection_mode not in ("full", "successive_halving"):
+        raise ValueError(f"Unknown selection_mode '{selection_mode}'.")
     mlflow.set_experiment("SADI/auto_ml")
 
     # --- Standardized Metadata ---
-    dataset_hash = hashlib.sha256(pd.util.hash_pandas_object(X_train, index=True).values).hexdigest()
+    data_hash = dataset_hash(X_train, job_id)
     try:
         repo = git.Repo(search_parent_directories=True)
         git_commit = repo.head.object.hexsha
     except (git.InvalidGitRepositoryError, ValueError):
         git_commit = "unknown"
 
-    with mlflow.start_run(run_name=f"automl_job_{job_id}") as parent_run:
+    with cpu_allocation(job_id, process_thread_limits=process_thread_limits) as allocation, \
+            mlflow.start_run(run_name=f"automl_job_{job_id}") as parent_run:
         mlflow.log_param("job_id", job_id)
         mlflow.log_param("problem_type", problem_type)
         mlflow.set_tag("user_id", user_id)
         mlflow.set_tag("git_commit", git_commit)
-        mlflow.set_tag("dataset_hash", dataset_hash)
+        mlflow.set_tag("dataset_hash", data_hash)
+        mlflow.log_param("cpu_cores", allocation.cores)
 
         all_results = []
 
-        for model_key in model_candidates:
-            with mlflow.start_run(run_name=f"trial_{model_key}", nested=True) as child_run:
-                run_id = child_run.info.run_id
-                mlflow.log_param("model_key", model_key)
-
- 
-                model_class = MODEL_REGISTRY.get(model_key)
-                if not model_class:
+        # Preprocessing is identical for every candidate: fit it once per CV fold
+        # (and once on the full training set) and share the transformed matrices.
+        with PreprocessingCache() as preprocessing_cache:
+            make_key = lambda fold: PreprocessingCache.make_key(
+                data_hash, numeric_features, categorical_features, {"builder": "create_preprocessor"}, fold
+            )
+            preprocessor_factory = lambda: create_preprocessor(numeric_features, categorical_features)
+            cv_splits = preprocessing_cache.cv_splits(
+                preprocessor_factory, X_train, y_train, cv=5,
+                classifier=problem_type == "classification", key_fn=make_key
+            )
+            full_split = preprocessing_cache.get_or_compute(make_key("full"), preprocessor_factory(), X_train)
+
+            should_stop = cancel_token.is_cancelled if cancel_token is not None else None
+            halving_ladder = []
+            if selection_mode == "successive_halving":
+                mlflow.log_param("selection_mode", selection_mode)
+                mlflow.log_param("halving_eta", halving_eta)
+                mlflow.log_param("halving_min_fraction", halving_min_fraction)
+
+                rung_splits = {}
+
+                def score_on_fraction(model_key: str, fraction: float) -> float:
+                    if fraction not in rung_splits:
+                        X_sub, y_sub = _subsample_rows(X_train, y_train, fraction, problem_type)
+                        rung_splits[fraction] = (y_sub, preprocessing_cache.cv_splits(
+                            preprocessor_factory, X_sub, y_sub, cv=HALVING_CV_FOLDS,
+                            classifier=problem_type == "classification",
+                            key_fn=lambda fold: make_key(f"halving_{fraction:.6f}_{fold}")
+                        ))
+                    y_sub, splits = rung_splits[fraction]
+                    model = MODEL_REGISTRY[model_key]().get_model()
+                    return score_on_cached_folds(model, splits, y_sub, scoring=scoring).mean()
+
+                known_candidates = [m for m in model_candidates if m in MODEL_REGISTRY]
+                for model_key in set(model_candidates) - set(known_candidates):
                     print(f"Model key {model_key} not found in registry. Skipping.")
-                    continue
-
-                model_wrapper = model_class()
-                sklearn_model = model_wrapper.get_model()
-
-                pipeline = create_full_pipeline(
-                    model=sklearn_model,
-                    problem_type=problem_type,
-                    numeric_features=numeric_features,
-                    categorical_features=categorical_features
+                # The rungs are the costliest part of halving mode, so they stop on a spent
+                # budget (which flags it as exhausted) or a cancellation too; the finalist
+                # loop then starts nothing
+                model_candidates, halving_ladder = successive_halving(
+                    known_candidates, score_on_fraction,
+                    halving_schedule(halving_min_fraction, halving_eta), eta=halving_eta,
+                    can_start=budget.can_start, should_stop=should_stop
                 )
+                for rung in halving_ladder:
+                    for model_key, score in rung["scores"].items():
+                        mlflow.log_metric(f"halving_score_{model_key}", score, step=rung["rung"])
+                mlflow.log_dict({"rungs": halving_ladder, "finalists": model_candidates}, "successive_halving_ladder.json")
+
+            cancelled = False
+            for model_key in order_by_expected_cost(model_candidates):
+                if should_stop is not None and should_stop():
+                    print(f"Job {job_id} cancelled; skipping {model_key} and the remaining candidates.")
+                    cancelled = True
+                    break
+                if not budget.can_start():
+                    print(f"Time budget nearly spent; skipping {model_key} and the remaining candidates.")
+                    break
+                with mlflow.start_run(run_name=f"trial_{model_key}", nested=True) as child_run:
+                    run_id = child_run.info.run_id
+                    mlflow.log_param("model_key", model_key)
+
  
+                    model_class = MODEL_REGISTRY.get(model_key)
+                    if not model_class:
+                        print(f"Model key {model_key} not found in registry. Skipping.")
+                        continue
 
-                training_result = train_model_with_cv(pipeline, X_train, y_train, scoring=scoring)
+                    model_wrapper = model_class()
+                    sklearn_model = model_wrapper.get_model()
 
-                if training_result["status"] != "success":
-                    all_results.append(training_result)
-                    continue
+                    estimator_step_name = 'classifier' if problem_type == 'classification' else 'regressor'
+                    training_result = train_model_with_cached_cv(
+                        sklearn_model, estimator_step_name, cv_splits, full_split, y_train, scoring=scoring
+                    )
 
-                mlflow.log_metric("cv_mean_score", training_result["cv_mean_score"])
-                mlflow.log_metric("cv_std_score", training_result["cv_std_score"])
-                mlflow.log_metric("fit_time", training_result["fit_time"])
+                    if training_result["status"] != "success":
+                        all_results.append(training_result)
+                        continue
 
-                trained_pipeline = training_result["model"]
-                evaluation_results = evaluate_model(trained_pipeline, X_test, y_test, problem_type)
-                mlflow.log_metrics(evaluation_results["metrics"])
-                mlflow.log_metrics(evaluation_results.get("fairness_metrics", {}))
+                    mlflow.log_metric("cv_mean_score", training_result["cv_mean_score"])
+                    mlflow.log_metric("cv_std_score", training_result["cv_std_score"])
+                    mlflow.log_metric("fit_time", training_result["fit_time"])
+
+                    trained_pipeline = training_result["model"]
+                    evaluation_results = evaluate_model(trained_pipeline, X_test, y_test, problem_type)
+                    mlflow.log_metrics(evaluation_results["metrics"])
+                    mlflow.log_metrics(evaluation_results.get("fairness_metrics", {}))
 
  
-                shap_artifacts = explain_model(trained_pipeline, X_train)
-                if shap_artifacts:
-                    # Save artifacts to state store
-                    for name, fig in shap_artifacts.get("figure_artifacts", {}).items():
-                        state_store.save_figure_artifact(job_id, f"explainability/{run_id}/{name}", fig)
-                        plt.close(fig) # Close figure to free memory
-                    for name, data in shap_artifacts.get("json_artifacts", {}).items():
-                         state_store.save_json_artifact(job_id, f"explainability/{run_id}/{name}", data)
-
-                    # Log to MLflow
-                    temp_dir = f"/tmp/{run_id}"
-                    os.makedirs(temp_dir, exist_ok=True)
-                    for name, data in shap_artifacts.get("json_artifacts", {}).items():
-                        with open(os.path.join(temp_dir, name), 'w') as f:
-                            json.dump(data, f)
-                    mlflow.log_artifacts(temp_dir, artifact_path="explainability")
-
-
-                exported_path = export_model(trained_pipeline, model_key, get_output_dir(job_id), run_id)
+                    try:
+                        shap_artifacts = explain_model(trained_pipeline, X_train, should_stop) if budget.can_start() else None
+                    except JobCancelled:
+                        print(f"Job {job_id} cancelled; skipping explainability for {model_key}.")
+                        shap_artifacts = None
+                    if shap_artifacts:
+                        # Save artifacts to state store
+                        for name, fig in shap_artifacts.get("figure_artifacts", {}).items():
+                            state_store.save_figure_artifact(job_id, f"explainability/{run_id}/{name}", fig)
+                            plt.close(fig) # Close figure to free memory
+                        for name, data in shap_artifacts.get("json_artifacts", {}).items():
+                             state_store.save_json_artifact(job_id, f"explainability/{run_id}/{name}", data)
+
+                        # Log to MLflow
+                        temp_dir = f"/tmp/{run_id}"
+                        os.makedirs(temp_dir, exist_ok=True)
+                        for name, data in shap_artifacts.get("json_artifacts", {}).items():
+                            with open(os.path.join(temp_dir, name), 'w') as f:
+                                json.dump(data, f)
+                        mlflow.log_artifacts(temp_dir, artifact_path="explainability")
+
+
+                    exported_path = export_model(trained_pipeline, model_key, get_output_dir(job_id), run_id)
  
-                model_card = create_model_card(
-                    model_key, training_result, evaluation_results, shap_artifacts
-                )
-
-                trial_result = {
-                    **training_result,
-                    "evaluation": evaluation_results,
-                    "model_card": model_card,
-                    "exported_path": exported_path,
-                    "mlflow_run_id": run_id,
-                    "model_key": model_key
-                }
-                all_results.append(trial_result)
+                    model_card = create_model_card(
+                        model_key, training_result, evaluation_results, shap_artifacts
+                    )
+
+                    trial_result = {
+                        **training_result,
+                        "evaluation": evaluation_results,
+                        "model_card": model_card,
+                        "exported_path": exported_path,
+                        "mlflow_run_id": run_id,
+                        "model_key": model_key
+                    }
+                    all_results.append(trial_result)
 
  
         best_model_trial = select_best_model(all_results, metric_to_optimize=f"cv_mean_score")
@@ -135,8 +236,14 @@ def run_automl_orchestration(
         if best_model_trial:
             mlflow.set_tag("best_model", best_model_trial["model_key"])
             mlflow.log_metric("best_model_score", best_model_trial["cv_mean_score"])
+        mlflow.set_tag("budget_exhausted", budget.exhausted)
+        mlflow.set_tag("cancelled", cancelled)
 
         return {
             "all_results": all_results,
-            "best_model_trial": best_model_trial
+            "best_model_trial": best_model_trial,
+            "selection_mode": selection_mode,
+            "halving_ladder": halving_ladder,
+            "budget_exhausted": budget.exhausted,
+            "cancelled": cancelled
         }
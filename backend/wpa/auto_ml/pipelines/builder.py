@@ -5,33 +5,16 @@ from sklearn.impute import SimpleImputer
 from sklearn.feature_extraction.text import TfidfVectorizer
 from typing import List, Dict, Any
 
-def create_full_pipeline(
-    model: Any,
-    problem_type: str,
+def create_preprocessor(
     numeric_features: List[str],
     categorical_features: List[str],
-    text_features: List[str] = None,
-    feature_engineering_config: Dict[str, Any] = None
-) -> Pipeline:
+    text_features: List[str] = None
+) -> ColumnTransformer:
     """
-    Creates a full scikit-learn pipeline for a given model, with configurable
-    feature engineering steps.
-
-    Args:
-        model: The scikit-learn compatible estimator instance.
-        problem_type: The type of problem, e.g., 'classification' or 'regression'.
-                      Determines the final step name in the pipeline.
-        numeric_features: List of names of numeric columns.
-        categorical_features: List of names of categorical columns.
-        text_features: List of names of text columns.
-        feature_engineering_config: A dictionary defining feature engineering steps.
-
-    Returns:
-        A scikit-learn Pipeline object.
+    Creates the (unfitted) ColumnTransformer shared by every candidate pipeline:
+    median imputation + scaling for numeric columns, most-frequent imputation +
+    one-hot encoding for categorical columns and optional TF-IDF for text.
     """
-    if feature_engineering_config is None:
-        feature_engineering_config = {}
-
     # --- Define standard transformers ---
     numeric_transformer = Pipeline(steps=[
         ('imputer', SimpleImputer(strategy='median')),
@@ -56,7 +39,36 @@ def create_full_pipeline(
         ])
         transformers.append(('text', text_transformer, text_features[0])) # Assuming one text feature for now
 
-    preprocessor = ColumnTransformer(transformers=transformers, remainder='passthrough')
+    return ColumnTransformer(transformers=transformers, remainder='passthrough')
+
+def create_full_pipeline(
+    model: Any,
+    problem_type: str,
+    numeric_features: List[str],
+    categorical_features: List[str],
+    text_features: List[str] = None,
+    feature_engineering_config: Dict[str, Any] = None
+) -> Pipeline:
+    """
+    Creates a full scikit-learn pipeline for a given model, with configurable
+    feature engineering steps.
+
+    Args:
+        model: The scikit-learn compatible estimator instance.
+        problem_type: The type of problem, e.g., 'classification' or 'regression'.
+                      Determines the final step name in the pipeline.
+        numeric_features: List of names of numeric columns.
+        categorical_features: List of names of categorical columns.
+        text_features: List of names of text columns.
+        feature_engineering_config: A dictionary defining feature engineering steps.
+
+    Returns:
+        A scikit-learn Pipeline object.
+    """
+    if feature_engineering_config is None:
+        feature_engineering_config = {}
+
+    preprocessor = create_preprocessor(numeric_features, categorical_features, text_features)
 
     # --- Define main pipeline steps ---
     pipeline_steps = [('preprocessor', preprocessor)]
@@ -0,0 +1,201 @@
+"""
+Fit-once preprocessing cache shared by all AutoML candidates of a job.
+
+Every candidate pipeline starts with the same ColumnTransformer (impute + scale +
+one-hot encode). Instead of re-fitting it for every model and every CV fold, the
+transformer is fitted once per (dataset hash, feature lists, preprocessing config,
+fold) key and the transformed train/test matrices are written to disk and loaded
+memory-mapped, so worker processes read them without copying (joblib memmaps them
+itself; for a plain process pool pass `train_path` / `test_path` and open them in
+the worker with `load_matrix`). Candidates then
+only fit their estimator; `build_fitted_pipeline` reassembles the full fitted
+`Pipeline` for the winner.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.base import clone
+from sklearn.model_selection import check_cv
+from sklearn.pipeline import Pipeline
+
+from backend.core.fingerprint import dataset_digest, get_fingerprint_cache
+
+
+@dataclass
+class TransformedSplit:
+    """A fitted preprocessor and the matrices it produced for one split."""
+    preprocessor: Any
+    X_train: Any
+    X_test: Optional[Any] = None
+    train_index: Optional[np.ndarray] = None
+    test_index: Optional[np.ndarray] = None
+    train_path: Optional[str] = None
+    test_path: Optional[str] = None
+
+
+def dataset_hash(df: pd.DataFrame, job_id: Optional[str] = None) -> str:
+    """
+    Dataset fingerprint digest, the same one run_automl_orchestration logs. With
+    `job_id` it goes through the job's fingerprint cache (under a key of its own,
+    as the training split is a different frame than the job's dataset), so the
+    same frame is hashed only once.
+    """
+    if job_id is None:
+        return dataset_digest(df)
+    return get_fingerprint_cache().fingerprint(f"{job_id}/train", df).digest
+
+
+def load_matrix(path: str):
+    """Opens a cached matrix: `.npy` memory-mapped read-only, `.npz` as sparse, `.pkl` via joblib."""
+    if path.endswith(".npz"):
+        return sp.load_npz(path)
+    if path.endswith(".pkl"):
+        return joblib.load(path)
+    return np.load(path, mmap_mode="r")
+
+
+def build_fitted_pipeline(preprocessor: Any, estimator: Any, step_name: str = "model") -> Pipeline:
+    """Combines an already-fitted preprocessor and estimator into an exportable Pipeline."""
+    return Pipeline(steps=[("preprocessor", preprocessor), (step_name, estimator)])
+
+
+class PreprocessingCache:
+    """
+    Content-keyed store of fitted preprocessors and their transformed matrices.
+
+    Entries live in `cache_dir`; when it is not given a temporary directory is
+    created and removed by `cleanup()` (or on leaving the `with` block). Passing a
+    persistent directory lets later runs on the same data reuse the entries.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self._owns_dir = cache_dir is None
+        self.cache_dir = cache_dir or tempfile.mkdtemp(prefix="sadi_preprocessing_")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._entries: Dict[str, TransformedSplit] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __enter__(self) -> "PreprocessingCache":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cleanup()
+
+    @staticmethod
+    def make_key(
+        data_hash: str,
+        numeric_features: List[str],
+        categorical_features: List[str],
+        preprocessing_config: Dict[str, Any],
+        fold: Any,
+    ) -> str:
+        """Builds the cache key from the dataset, feature lists, config and fold index."""
+        payload = json.dumps({
+            "dataset_hash": data_hash,
+            "numeric_features": list(numeric_features),
+            "categorical_features": list(categorical_features),
+            "preprocessing_config": preprocessing_config,
+            "fold": fold,
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _save_matrix(self, path: str, matrix) -> str:
+        if sp.issparse(matrix):
+            sp.save_npz(path + ".npz", matrix.tocsr())
+            return path + ".npz"
+        matrix = np.asarray(matrix)
+        if matrix.dtype == object:
+            # Object arrays (e.g. passthrough datetime columns) cannot be memory-mapped.
+            joblib.dump(matrix, path + ".pkl")
+            return path + ".pkl"
+        np.save(path + ".npy", matrix)
+        return path + ".npy"
+
+    def _find_matrix(self, path: str) -> Optional[str]:
+        for ext in (".npy", ".npz", ".pkl"):
+            if os.path.exists(path + ext):
+                return path + ext
+        return None
+
+    def get_or_compute(
+        self,
+        key: str,
+        preprocessor: Any,
+        X_train: pd.DataFrame,
+        X_test: Optional[pd.DataFrame] = None,
+        y_train: Optional[pd.Series] = None,
+    ) -> TransformedSplit:
+        """
+        Returns the cached split for `key`, fitting a clone of `preprocessor` on
+        `X_train` and transforming `X_train` / `X_test` only on a miss.
+        """
+        if key in self._entries:
+            self.hits += 1
+            return self._entries[key]
+
+        base = os.path.join(self.cache_dir, key)
+        preprocessor_path = base + "_preprocessor.joblib"
+        train_path = self._find_matrix(base + "_train")
+        test_path = self._find_matrix(base + "_test")
+        if os.path.exists(preprocessor_path) and train_path and (X_test is None or test_path):
+            self.hits += 1
+            split = TransformedSplit(
+                preprocessor=joblib.load(preprocessor_path),
+                X_train=load_matrix(train_path),
+                X_test=load_matrix(test_path) if X_test is not None else None,
+            )
+        else:
+            self.misses += 1
+            fitted = clone(preprocessor)
+            train_path = self._save_matrix(base + "_train", fitted.fit_transform(X_train, y_train))
+            if X_test is not None:
+                test_path = self._save_matrix(base + "_test", fitted.transform(X_test))
+            joblib.dump(fitted, preprocessor_path)
+            split = TransformedSplit(
+                preprocessor=fitted,
+                X_train=load_matrix(train_path),
+                X_test=load_matrix(test_path) if X_test is not None else None,
+            )
+
+        split.train_path, split.test_path = train_path, test_path if X_test is not None else None
+        self._entries[key] = split
+        return split
+
+    def cv_splits(
+        self,
+        preprocessor_factory: Callable[[], Any],
+        X: pd.DataFrame,
+        y: pd.Series,
+        cv: int,
+        classifier: bool,
+        key_fn: Callable[[Any], str],
+    ) -> List[TransformedSplit]:
+        """
+        Transforms every fold of the same splitter `cross_val_score(cv=cv)` would use,
+        once per fold. `key_fn(fold_index)` returns the cache key for each fold.
+        """
+        splitter = check_cv(cv, y, classifier=classifier)
+        splits = []
+        for fold, (train_index, test_index) in enumerate(splitter.split(X, y)):
+            split = self.get_or_compute(
+                key_fn(fold), preprocessor_factory(), X.iloc[train_index], X.iloc[test_index]
+            )
+            split.train_index, split.test_index = train_index, test_index
+            splits.append(split)
+        return splits
+
+    def cleanup(self):
+        """Drops the in-process entries and, if the cache created it, its directory."""
+        self._entries.clear()
+        if self._owns_dir:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
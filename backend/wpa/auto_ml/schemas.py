@@ -2,7 +2,7 @@
 This module contains the Pydantic models (schemas) for the AutoML API.
 """
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Literal
 
 class AutoMLRequest(BaseModel):
     """Payload for the POST /submit endpoint."""
@@ -10,6 +10,10 @@ class AutoMLRequest(BaseModel):
     target: Optional[str] = Field(None, description="The target variable for supervised learning. If None, it's inferred from the target detection step.")
     models_to_run: Optional[List[str]] = Field(None, description="Optional list of model keys to run. If None, a default selection is used.")
     perform_hpo: bool = Field(False, description="Whether to perform Hyperparameter Optimization.")
+    selection_mode: Literal["full", "successive_halving"] = Field("full", description="'full' cross-validates every candidate on all rows; 'successive_halving' starts all candidates on small subsamples and promotes only the best to larger ones.")
+    halving_eta: int = Field(3, ge=2, description="Successive halving rate: 1/eta of the candidates are promoted to an eta times larger subsample.")
+    halving_min_fraction: float = Field(0.1, gt=0, le=1, description="Fraction of the training rows used by the first successive-halving rung.")
+    max_runtime_seconds: Optional[float] = Field(None, gt=0, description="Wall-clock budget for the run. Defaults to ml_engine.global.max_runtime_seconds.")
 
 class AutoMLSubmitResponse(BaseModel):
     """Response from the POST /submit endpoint."""
@@ -23,6 +27,9 @@ class HPORequest(BaseModel):
     model_name: str = Field(..., description="The name of the model to optimize.")
     n_trials: int = Field(50, description="The number of HPO trials to run.")
     scoring: str = Field("accuracy", description="The scoring metric to optimize for.")
+    max_runtime_seconds: Optional[float] = Field(None, gt=0, description="Wall-clock budget for the study; no new trial starts once it is spent.")
+    n_workers: int = Field(1, ge=1, description="Number of Celery workers pulling trials concurrently from a study in shared storage. 1 runs the study in a single task.")
+    pruner: Literal["none", "median", "successive_halving", "hyperband"] = Field("median", description="Optuna pruner that stops unpromising trials from their fold-level and boosting-round intermediate scores.")
 
 class HPOSubmitResponse(BaseModel):
     """Response from the POST /hpo/submit endpoint."""
@@ -1,4 +1,5 @@
-from typing import List, Dict, Any, Optional
+import math
+from typing import List, Dict, Any, Optional, Callable, Tuple
 
 def select_best_model(
     all_results: List[Dict[str, Any]],
@@ -37,3 +38,89 @@ def select_best_model(
     )
 
     return sorted_results[0]
+
+def halving_schedule(min_fraction: float, eta: int = 3) -> List[float]:
+    """
+    Returns the data fractions of the successive-halving rungs, smallest first.
+
+    The last rung is always 1.0 (the full training set); each earlier rung uses
+    `eta` times less data than the next one, down to at least `min_fraction`.
+    """
+    if eta < 2:
+        raise ValueError("eta must be at least 2.")
+    if not 0 < min_fraction <= 1:
+        raise ValueError("min_fraction must be in (0, 1].")
+
+    n_rungs = int(math.floor(math.log(1 / min_fraction, eta) + 1e-9)) + 1
+    return [float(eta) ** (rung - n_rungs + 1) for rung in range(n_rungs)]
+
+def successive_halving(
+    candidates: List[str],
+    score_fn: Callable[[str, float], float],
+    fractions: List[float],
+    eta: int = 3,
+    can_start: Optional[Callable[[], bool]] = None,
+    should_stop: Optional[Callable[[], bool]] = None
+) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """
+    Runs successive halving over the low-fidelity rungs of `fractions`.
+
+    Every surviving candidate is scored with `score_fn(candidate, fraction)` on each
+    rung below 1.0 and only the best `ceil(n / eta)` are promoted to the next rung.
+    Candidates whose scoring raises or yields a non-finite score (e.g. NaN from a
+    failed CV fold) are dropped. The full-data rung is left to the
+    caller, which evaluates the returned survivors as usual.
+
+    `can_start` (e.g. `TimeBudget.can_start`) and `should_stop` (e.g. a cancel
+    token's `is_cancelled`) are checked before every rung and every candidate.
+    Once the budget is spent or the job is cancelled, nothing more is scored or
+    promoted and the survivors of the last completed rung are returned.
+
+    Args:
+        candidates: The candidate keys to start with.
+        score_fn: Returns the score of a candidate on a fraction of the data
+                  (higher is better).
+        fractions: The rung fractions, as returned by `halving_schedule`.
+        eta: The halving rate; 1/eta of the candidates survive each rung.
+        can_start: Returns False once no further scoring fits the time budget.
+        should_stop: Returns True once the job has been cancelled.
+
+    Returns:
+        The surviving candidates and the promotion ladder (one entry per rung
+        with its fraction, the scores and the promoted candidates).
+    """
+    def stopped() -> bool:
+        return (should_stop is not None and should_stop()) or (can_start is not None and not can_start())
+
+    survivors = list(candidates)
+    ladder = []
+    for rung, fraction in enumerate(f for f in fractions if f < 1.0):
+        if len(survivors) <= 1 or stopped():
+            break
+
+        scores = {}
+        for candidate in survivors:
+            if stopped():
+                print(f"Successive halving: stopping at rung {rung}, budget spent or job cancelled.")
+                return survivors, ladder
+            try:
+                score = float(score_fn(candidate, fraction))
+            except Exception as e:
+                print(f"Successive halving: dropping {candidate} at rung {rung}: {e}")
+                continue
+            if not math.isfinite(score):
+                print(f"Successive halving: dropping {candidate} at rung {rung}: non-finite score {score}")
+                continue
+            scores[candidate] = score
+
+        n_promoted = max(1, math.ceil(len(survivors) / eta))
+        ranked = sorted(scores, key=lambda c: scores[c], reverse=True)
+        survivors = ranked[:n_promoted]
+        ladder.append({
+            "rung": rung,
+            "fraction": fraction,
+            "scores": scores,
+            "promoted": survivors,
+        })
+
+    return survivors, ladder
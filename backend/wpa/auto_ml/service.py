@@ -1,6 +1,10 @@
 import pandas as pd
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import json
+import os
+import time
+import tempfile
+import joblib
 from sklearn.model_selection import train_test_split
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
@@ -13,7 +17,77 @@ from sklearn.metrics import (
 import mlflow
 import numpy as np
 
-from backend.wpa.auto_ml.model_mapping import MODEL_MAP
+from backend.wpa.auto_ml.model_mapping import MODEL_MAP, load_model_class
+from backend.wpa.auto_ml.preprocessing_cache import PreprocessingCache, build_fitted_pipeline, dataset_hash, load_matrix
+from backend.wpa.auto_ml.time_budget import TimeBudget, order_by_expected_cost, run_candidates_within_budget
+from backend.core.resource_manager import cpu_allocation, configure_estimator_threads
+
+def train_candidate(
+    model_name: str, problem_type: str,
+    X_train, y_train: Optional[pd.Series],
+    X_test, y_test: Optional[pd.Series],
+    artifact_dir: str, n_threads: int = 1
+) -> Dict[str, Any]:
+    """
+    Fits and evaluates a single AutoML candidate on already-preprocessed matrices.
+    `X_train` / `X_test` may be PreprocessingCache file paths, which are opened
+    memory-mapped here instead of being pickled to the worker. Runs in a worker
+    process, so it must not touch MLflow or the StateStore: the fitted estimator is
+    dumped to `artifact_dir` and only its path is reported back with the metrics.
+    The model uses `n_threads` threads, its worker's share of the job's CPU allocation.
+    """
+    start_time = time.time()
+    try:
+        if isinstance(X_train, str):
+            X_train = load_matrix(X_train)
+        if isinstance(X_test, str):
+            X_test = load_matrix(X_test)
+        model = configure_estimator_threads(load_model_class(model_name)(), n_threads)
+        model.fit(X_train, y_train) # y_train will be None for clustering
+
+        metrics, score = {}, None
+        if problem_type == "classification":
+            y_pred = model.predict(X_test)
+            # Handling binary vs multiclass for metrics like roc_auc
+            is_multiclass = len(np.unique(y_train)) > 2
+            average_method = 'weighted' if is_multiclass else 'binary'
+
+            metrics = {
+                "accuracy": accuracy_score(y_test, y_pred),
+                "f1_score": f1_score(y_test, y_pred, average=average_method),
+                "precision": precision_score(y_test, y_pred, average=average_method, zero_division=0),
+                "recall": recall_score(y_test, y_pred, average=average_method, zero_division=0),
+            }
+            # roc_auc_score requires predict_proba for multiclass
+            if hasattr(model, "predict_proba"):
+                y_proba = model.predict_proba(X_test)
+                if is_multiclass:
+                    metrics["roc_auc"] = roc_auc_score(y_test, y_proba, multi_class='ovr')
+                else:
+                    metrics["roc_auc"] = roc_auc_score(y_test, y_proba[:, 1])
+
+            score = metrics["f1_score"] # Use F1 as the primary score for ranking
+        elif problem_type == "regression":
+            y_pred = model.predict(X_test)
+            metrics = {
+                "r2_score": r2_score(y_test, y_pred),
+                "rmse": np.sqrt(mean_squared_error(y_test, y_pred)),
+                "mae": mean_absolute_error(y_test, y_pred),
+            }
+            score = metrics["r2_score"] # Use R2 as the primary score for ranking
+
+        artifact_path = os.path.join(artifact_dir, f"{model_name}.joblib")
+        joblib.dump(model, artifact_path)
+        return {
+            "model": model_name,
+            "status": "success",
+            "score": score,
+            "metrics": {k: float(v) for k, v in metrics.items()},
+            "artifact_path": artifact_path,
+            "fit_time": time.time() - start_time,
+        }
+    except Exception as e:
+        return {"model": model_name, "status": "failed", "error": str(e)}
 
 class AutoMlService:
     """
@@ -40,11 +114,36 @@ class AutoMlService:
         else:
             return "regression"
 
-    def run_automl_pipeline(self, job_id: str, df: pd.DataFrame, target_variable: str) -> Dict[str, Any]:
+    def run_automl_pipeline(
+        self, job_id: str, df: pd.DataFrame, target_variable: str,
+        max_parallel_candidates: Optional[int] = None,
+        max_runtime_seconds: Optional[float] = None,
+        max_candidates: Optional[int] = None,
+        cancel_token=None
+    ) -> Dict[str, Any]:
         """
         Orchestrates the AutoML process: problem detection, model training,
         evaluation, and selection.
+
+        Candidates are trained concurrently in a process pool of at most
+        `max_parallel_candidates` workers (defaults to
+        `ml_engine.global.max_parallel_candidates`; 1 trains them one by one),
+        capped by the job's CPU allocation from the ResourceManager.
+        The preprocessor is fitted once through the PreprocessingCache and the
+        winner is exported as the full fitted Pipeline (preprocessor + model).
+
+        The run is bounded by `max_runtime_seconds` (defaults to
+        `ml_engine.global.max_runtime_seconds`): candidates are launched cheapest
+        first, no new candidate starts once the budget is nearly spent and fits still
+        running at the deadline are killed. The best result found so far is returned
+        and `summary.budget_exhausted` tells whether the budget cut the run short.
+        `max_candidates` keeps only that many of the cheapest candidates (preview runs).
+        With a `cancel_token`, a cancelled job kills the running fits; the ranking of
+        the fits finished so far is returned with `summary.cancelled` set.
         """
+        if max_runtime_seconds is None:
+            max_runtime_seconds = self.config['global'].get('max_runtime_seconds')
+        budget = TimeBudget(max_runtime_seconds)
         print(f"[{job_id}] Starting AutoML pipeline for target: {target_variable}")
 
         y = None
@@ -94,87 +193,78 @@ class AutoMlService:
             remainder='passthrough'
         )
 
+        candidates = order_by_expected_cost([
+            model_name for model_name, params in self.config['algorithms'].items()
+            if params['enabled'] and MODEL_MAP.get(model_name, {}).get('type') == problem_type
+        ])
+        if max_candidates is not None:
+            candidates = candidates[:max_candidates]
+        if max_parallel_candidates is None:
+            max_parallel_candidates = self.config['global'].get('max_parallel_candidates', 1)
+        n_jobs = max(1, min(max_parallel_candidates, len(candidates) or 1))
+
         results = []
         best_model_pipeline = None
-        best_score = -1
-
-        for model_name, params in self.config['algorithms'].items():
-            if not params['enabled']:
-                continue
-
-            model_info = MODEL_MAP.get(model_name)
-            if not model_info or model_info['type'] != problem_type:
-                continue
-
-            with mlflow.start_run(run_name=f"{job_id}_{model_name}", nested=True):
-                mlflow.log_param("model_name", model_name)
-                mlflow.log_param("problem_type", problem_type)
-
-                try:
-                    print(f"[{job_id}] Training {model_name}...")
-
-                    # Create a full pipeline with preprocessing and the model
-                    model_pipeline = Pipeline(steps=[
-                        ('preprocessor', preprocessor),
-                        ('model', model_info['model']())
-                    ])
-
-                    model_pipeline.fit(X_train, y_train) # y_train will be None for clustering
-
-                    if problem_type in ["classification", "regression"]:
-                        y_pred = model_pipeline.predict(X_test)
-
-                        metrics = {}
-                        score = 0
-
-                        if problem_type == "classification":
-                            # Handling binary vs multiclass for metrics like roc_auc
-                            is_multiclass = len(np.unique(y_train)) > 2
-                            average_method = 'weighted' if is_multiclass else 'binary'
-
-                            metrics = {
-                                "accuracy": accuracy_score(y_test, y_pred),
-                                "f1_score": f1_score(y_test, y_pred, average=average_method),
-                                "precision": precision_score(y_test, y_pred, average=average_method, zero_division=0),
-                                "recall": recall_score(y_test, y_pred, average=average_method, zero_division=0),
-                            }
-                            # roc_auc_score requires predict_proba for multiclass
-                            if hasattr(model_pipeline, "predict_proba"):
-                                y_proba = model_pipeline.predict_proba(X_test)
-                                if is_multiclass:
-                                    metrics["roc_auc"] = roc_auc_score(y_test, y_proba, multi_class='ovr')
-                                else:
-                                    metrics["roc_auc"] = roc_auc_score(y_test, y_proba[:, 1])
-
-                            score = metrics["f1_score"] # Use F1 as the primary score for ranking
-
-                        else: # regression
-                            metrics = {
-                                "r2_score": r2_score(y_test, y_pred),
-                                "rmse": np.sqrt(mean_squared_error(y_test, y_pred)),
-                                "mae": mean_absolute_error(y_test, y_pred),
-                            }
-                            score = metrics["r2_score"] # Use R2 as the primary score for ranking
-
-                        mlflow.log_metrics(metrics)
-                        print(f"[{job_id}] ... {model_name} score: {score:.4f}")
-                        results.append({"model": model_name, "score": score, "metrics": metrics})
-
-                        if score > best_score:
-                            best_score = score
-                            best_model_pipeline = model_pipeline
-                            mlflow.sklearn.log_model(model_pipeline, "best-model-pipeline")
+        with cpu_allocation(job_id) as allocation, \
+                tempfile.TemporaryDirectory(prefix=f"automl_{job_id}_") as artifact_dir, \
+                PreprocessingCache(cache_dir=os.path.join(artifact_dir, "preprocessing")) as preprocessing_cache:
+            # Never run more worker processes than the job has cores; each worker
+            # gets its share of the allocation as estimator/BLAS threads.
+            n_jobs = min(n_jobs, allocation.cores)
+            print(f"[{job_id}] Training {len(candidates)} candidates with up to {n_jobs} in parallel "
+                  f"on {allocation.cores} allocated cores.")
+
+            # The preprocessor is fitted once; every candidate reads the same memory-mapped matrices.
+            cache_key = PreprocessingCache.make_key(
+                dataset_hash(X_train, job_id), numeric_features, categorical_features,
+                self.config.get('preprocessing', {}), "holdout"
+            )
+            split = preprocessing_cache.get_or_compute(cache_key, preprocessor, X_train, X_test)
+
+            # Candidates are fitted in worker processes (loky also works inside Celery's
+            # daemonic prefork workers), which memory-map the cached matrices from their
+            # paths. MLflow logging stays in this process.
+            candidate_results = run_candidates_within_budget(
+                train_candidate, candidates,
+                (problem_type, split.train_path, y_train, split.test_path, y_test, artifact_dir,
+                 allocation.worker_threads(n_jobs)),
+                n_jobs=n_jobs, budget=budget, env=allocation.worker_env(n_jobs),
+                should_stop=cancel_token.is_cancelled if cancel_token is not None else None
+            )
+
+            # The winner is selected once every candidate has reported back.
+            winner = None
+            successful = [c for c in candidate_results if c["status"] == "success"]
+            if successful:
+                if problem_type in ["classification", "regression"]:
+                    winner = max(successful, key=lambda c: c["score"])
+                else:
+                    # For clustering, we can consider the first model as the "best" for now
+                    winner = successful[0]
+
+            for candidate in candidate_results:
+                model_name = candidate["model"]
+                with mlflow.start_run(run_name=f"{job_id}_{model_name}", nested=True):
+                    mlflow.log_param("model_name", model_name)
+                    mlflow.log_param("problem_type", problem_type)
+                    if candidate["status"] != "success":
+                        print(f"[{job_id}] Failed to train {model_name}. Error: {candidate['error']}")
+                        mlflow.log_param("error", candidate["error"])
+                        continue
+                    mlflow.log_metric("fit_time", candidate["fit_time"])
+                    if candidate["metrics"]:
+                        mlflow.log_metrics(candidate["metrics"])
+                        print(f"[{job_id}] ... {model_name} score: {candidate['score']:.4f}")
+                        results.append({"model": model_name, "score": candidate["score"], "metrics": candidate["metrics"]})
                     else: # clustering
                         print(f"[{job_id}] ... {model_name} fitted.")
                         results.append({"model": model_name, "score": "N/A"})
-                        # For clustering, we can consider the first model as the "best" for now
-                        if best_model_pipeline is None:
-                            best_model_pipeline = model_pipeline
-                            mlflow.sklearn.log_model(model_pipeline, "best-model-pipeline")
 
-                except Exception as e:
-                    print(f"[{job_id}] Failed to train {model_name}. Error: {e}")
-                    mlflow.log_param("error", str(e))
+                    if candidate is winner:
+                        best_model_pipeline = build_fitted_pipeline(
+                            split.preprocessor, joblib.load(candidate["artifact_path"])
+                        )
+                        mlflow.sklearn.log_model(best_model_pipeline, "best-model-pipeline")
 
         results.sort(key=lambda x: x.get('score', -1), reverse=True)
         best_result = results[0] if results else {}
@@ -186,6 +276,9 @@ class AutoMlService:
                 "best_model_score": best_result.get('score', -1),
                 "best_model_metrics": best_result.get('metrics', {}),
                 "ranking": results,
+                "budget_exhausted": budget.exhausted,
+                "elapsed_seconds": budget.elapsed(),
+                "cancelled": cancel_token is not None and cancel_token.is_cancelled(),
             },
             "best_model": best_model_pipeline,
             "feature_importance": None # Placeholder
@@ -3,6 +3,8 @@ from backend.celery_worker import celery_app
  
 from backend.wpa.auto_ml.pipelines.automl_master_pipeline import run_automl_orchestration
 from backend.core.state_store import StateStore
+from backend.core.cancellation import CancellationToken
+from backend.core.config_loader import Config
 import pandas as pd
  
 
@@ -56,12 +58,19 @@ def run_full_automl(job_id: str, request: dict):
             numeric_features=numeric_features,
             categorical_features=categorical_features,
             model_candidates=model_candidates,
-            scoring=scoring
+            scoring=scoring,
+            selection_mode=request.get("selection_mode", "full"),
+            halving_eta=request.get("halving_eta", 3),
+            halving_min_fraction=request.get("halving_min_fraction", 0.1),
+            max_runtime_seconds=request.get("max_runtime_seconds") or Config.load()["ml_engine"]["global"].get("max_runtime_seconds"),
+            cancel_token=CancellationToken(state_store, job_id),
+            process_thread_limits=True  # the Celery task owns this worker process
         )
 
-        # Store results
+        # Store results (the trials finished so far, if the job was cancelled)
         state_store.save_json_artifact(job_id, "automl_results.json", results)
-        state_store.save_job_status(job_id, {"status": "completed", "stage": "automl"})
+        status = "cancelled" if results.get("cancelled") else "completed"
+        state_store.save_job_status(job_id, {"status": status, "stage": "automl"})
 
         return {"status": "SUCCESS", "results_summary": f"Best model: {results.get('best_model_trial', {}).get('model_key')}"}
 
@@ -1,7 +1,9 @@
 import unittest
 import pandas as pd
 import mlflow
-from backend.wpa.auto_ml.hpo_service import HPOService
+from unittest.mock import patch
+import optuna
+from backend.wpa.auto_ml.hpo_service import MAX_BOOSTING_ROUNDS_PER_FOLD, HPOService, create_pruner, get_study_storage
 from backend.wpa.auto_ml.models.tree_models import RandomForestClassifierWrapper
 from sklearn.datasets import make_classification
 import backend.wpa.auto_ml.model_library
@@ -39,5 +41,90 @@ class TestHPOService(unittest.TestCase):
             )
             self.assertEqual(len(child_runs), 3)
 
+@patch('backend.wpa.auto_ml.hpo_service.mlflow')
+def test_workers_share_a_study_in_journal_storage(mock_mlflow, tmp_path):
+    """Two services on the same journal-backed study stop once n_trials have run in total."""
+    X, y = make_classification(n_samples=60, n_features=5, n_informative=3, n_redundant=0, random_state=42)
+    X, y = pd.DataFrame(X, columns=[f'f{i}' for i in range(5)]), pd.Series(y)
+    storage = get_study_storage(f"journal:{tmp_path / 'study.log'}")
+
+    for _ in range(2):
+        HPOService(
+            RandomForestClassifierWrapper(), X, y, n_trials=3, scoring='accuracy',
+            study_name='shared', storage=storage
+        ).optimize()
+
+    study = optuna.load_study(study_name='shared', storage=get_study_storage(f"journal:{tmp_path / 'study.log'}"))
+    assert len(study.trials) == 3
+    assert 'n_estimators' in study.best_params
+
+def _classification_frame():
+    X, y = make_classification(n_samples=90, n_features=5, n_informative=3, n_redundant=0, random_state=0)
+    return pd.DataFrame(X, columns=[f'f{i}' for i in range(5)]), pd.Series(y)
+
+@patch('backend.wpa.auto_ml.hpo_service.mlflow')
+def test_cross_validate_reports_every_fold(mock_mlflow):
+    X, y = _classification_frame()
+    service = HPOService(RandomForestClassifierWrapper(), X, y, n_trials=1, scoring='accuracy', pruner='none')
+    study = optuna.create_study(direction='maximize')
+    trial = study.ask()
+
+    score = service._cross_validate(trial, RandomForestClassifierWrapper({'n_estimators': 10}).get_model())
+
+    intermediate = study.trials[0].intermediate_values
+    assert sorted(intermediate) == [0, 1, 2]
+    assert intermediate[2] == pytest.approx(score)
+
+@pytest.mark.parametrize("wrapper_name, params", [
+    ("LightGBMClassifierWrapper", {'n_estimators': 5, 'verbose': -1}),
+    ("XGBoostClassifierWrapper", {'n_estimators': 5}),
+])
+@patch('backend.wpa.auto_ml.hpo_service.mlflow')
+def test_boosting_models_report_every_round(mock_mlflow, wrapper_name, params):
+    from backend.wpa.auto_ml.models import ensemble_models
+    wrapper_class = getattr(ensemble_models, wrapper_name)
+    X, y = _classification_frame()
+    service = HPOService(wrapper_class(), X, y, n_trials=1, scoring='accuracy', pruner='none')
+    study = optuna.create_study(direction='maximize')
+    trial = study.ask()
+
+    service._cross_validate(trial, wrapper_class(params).get_model())
+
+    # 3 folds x 5 rounds, at steps fold * MAX_BOOSTING_ROUNDS_PER_FOLD + iteration
+    assert sorted(study.trials[0].intermediate_values) == [
+        fold * MAX_BOOSTING_ROUNDS_PER_FOLD + i for fold in range(3) for i in range(5)
+    ]
+
+@patch('backend.wpa.auto_ml.hpo_service.mlflow')
+def test_boosting_steps_line_up_across_trials_with_different_n_estimators(mock_mlflow):
+    from backend.wpa.auto_ml.models.ensemble_models import LightGBMClassifierWrapper
+    X, y = _classification_frame()
+    service = HPOService(LightGBMClassifierWrapper(), X, y, n_trials=2, scoring='accuracy', pruner='none')
+    study = optuna.create_study(direction='maximize')
+
+    for n_estimators in (3, 8):
+        model = LightGBMClassifierWrapper({'n_estimators': n_estimators, 'verbose': -1}).get_model()
+        service._cross_validate(study.ask(), model)
+
+    short, long = (set(t.intermediate_values) for t in study.trials)
+    # Every step of the 3-round trial is the same fold and round in the 8-round trial
+    assert short < long
+    assert min(long - short) == 3 and MAX_BOOSTING_ROUNDS_PER_FOLD in short
+
+def test_pruned_trials_are_recorded():
+    X, y = _classification_frame()
+    study = optuna.create_study(direction='maximize', pruner=create_pruner('median'))
+    for value in (0.9, 0.9, 0.9, 0.9, 0.9):
+        study.add_trial(optuna.trial.create_trial(
+            value=value, intermediate_values={0: value, 1: value}, distributions={}, params={}
+        ))
+    trial = study.ask()
+    trial.report(0.1, 0)
+    trial.report(0.1, 1)
+
+    assert trial.should_prune()
+    with pytest.raises(ValueError):
+        create_pruner('bogus')
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,5 +1,8 @@
 import unittest
-from backend.wpa.auto_ml.selection_engine import select_best_model
+from unittest.mock import MagicMock
+from backend.core.cancellation import CancellationToken
+from backend.wpa.auto_ml.time_budget import TimeBudget
+from backend.wpa.auto_ml.selection_engine import select_best_model, halving_schedule, successive_halving
 
 class TestSelectionEngine(unittest.TestCase):
 
@@ -16,6 +19,79 @@ class TestSelectionEngine(unittest.TestCase):
     def test_select_best_model_empty_list(self):
         best_model = select_best_model([], 'cv_mean_score')
         self.assertIsNone(best_model)
+    def test_halving_schedule_ends_on_full_data(self):
+        self.assertEqual(halving_schedule(0.1, eta=3), [1 / 9, 1 / 3, 1.0])
+        self.assertEqual(halving_schedule(1.0, eta=3), [1.0])
+
+    def test_successive_halving_promotes_top_fraction(self):
+        quality = {'a': 0.9, 'b': 0.8, 'c': 0.7, 'd': 0.6, 'e': 0.5, 'f': 0.4, 'g': 0.3, 'h': 0.2, 'i': 0.1}
+        calls = []
+
+        def score_fn(candidate, fraction):
+            calls.append((candidate, fraction))
+            return quality[candidate]
+
+        survivors, ladder = successive_halving(list(quality), score_fn, [1 / 9, 1 / 3, 1.0], eta=3)
+
+        self.assertEqual(survivors, ['a'])
+        self.assertEqual([rung['promoted'] for rung in ladder], [['a', 'b', 'c'], ['a']])
+        # 9 candidates on the first rung, 3 on the second, none on the full data
+        self.assertEqual(len(calls), 12)
+
+    def test_successive_halving_drops_failing_candidates(self):
+        def score_fn(candidate, fraction):
+            if candidate == 'broken':
+                raise RuntimeError("fit failed")
+            return {'good': 1.0, 'ok': 0.5}[candidate]
+
+        survivors, ladder = successive_halving(['broken', 'good', 'ok'], score_fn, [0.5, 1.0], eta=2)
+
+        self.assertEqual(survivors, ['good', 'ok'])
+        self.assertNotIn('broken', ladder[0]['scores'])
+
+    def test_successive_halving_drops_non_finite_scores(self):
+        # NaN first: an unfiltered sort would keep it wherever it happens to land
+        scores = {'nan': float('nan'), 'good': 0.9, 'inf': float('-inf'), 'ok': 0.5}
+
+        survivors, ladder = successive_halving(list(scores), lambda c, f: scores[c], [0.5, 1.0], eta=2)
+
+        self.assertEqual(survivors, ['good', 'ok'])
+        self.assertEqual(ladder[0]['scores'], {'good': 0.9, 'ok': 0.5})
+
+    def test_successive_halving_stops_after_the_rung_that_cancels_or_spends_the_budget(self):
+        candidates = ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i']
+        fractions = [1 / 9, 1 / 3, 1.0]
+        quality = {c: -i for i, c in enumerate(candidates)}
+
+        state_store = MagicMock()
+        state_store.is_job_cancellation_requested.return_value = False
+        token = CancellationToken(state_store, "job-1", poll_interval=0)
+        budget = TimeBudget(60)
+
+        def stop_after_first_rung(stop):
+            calls = []
+
+            def score_fn(candidate, fraction):
+                calls.append(fraction)
+                if len(calls) == len(candidates):
+                    stop()
+                return quality[candidate]
+            return calls, score_fn
+
+        def cancel():
+            state_store.is_job_cancellation_requested.return_value = True
+
+        def spend_budget():
+            budget.started_at -= 60
+
+        for stop, kwargs in ((cancel, {"should_stop": token.is_cancelled}), (spend_budget, {"can_start": budget.can_start})):
+            calls, score_fn = stop_after_first_rung(stop)
+            survivors, ladder = successive_halving(candidates, score_fn, fractions, eta=3, **kwargs)
+
+            self.assertEqual(calls, [1 / 9] * 9)  # nothing scored on the second rung
+            self.assertEqual(survivors, ['a', 'b', 'c'])
+            self.assertEqual(len(ladder), 1)
+        self.assertTrue(budget.exhausted)
 
 if __name__ == '__main__':
     unittest.main()
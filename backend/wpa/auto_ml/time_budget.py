@@ -0,0 +1,177 @@
+"""
+Wall-clock time budget for an AutoML run (`ml_engine.global.max_runtime_seconds`).
+
+`TimeBudget` tracks the deadline; `order_by_expected_cost` puts cheap candidates
+first so a budget that runs out still leaves a ranked result; and
+`run_candidates_within_budget` drives a process pool that stops launching
+candidates once the remaining time no longer covers their expected cost and kills
+the workers of fits that are still running when the deadline passes (or when the
+job is cancelled).
+"""
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from joblib.externals.loky import ProcessPoolExecutor
+
+from backend.core.cancellation import CANCEL_POLL_SECONDS
+
+# Relative fit cost of the model families, matched as substrings of the normalized
+# candidate name (lowercase, no underscores). Anything unmatched costs 1.0.
+RELATIVE_FIT_COST = {
+    "lstm": 10.0, "gru": 10.0, "transformer": 10.0, "neural": 8.0, "autoencoder": 8.0,
+    "prophet": 5.0, "sarimax": 5.0, "arima": 4.0,
+    "svm": 5.0, "svc": 5.0, "svr": 5.0,
+    "catboost": 4.0, "gradientboosting": 3.0, "xgboost": 2.5, "lightgbm": 2.0,
+    "randomforest": 2.0, "extratrees": 2.0, "adaboost": 2.0,
+    "neighbors": 1.5, "spectral": 3.0, "affinity": 3.0, "tsne": 3.0,
+}
+
+
+def expected_cost(candidate: str) -> float:
+    """Relative expected fit cost of a candidate, from its name."""
+    normalized = candidate.lower().replace("_", "").replace("-", "")
+    return max((cost for family, cost in RELATIVE_FIT_COST.items() if family in normalized), default=1.0)
+
+
+def order_by_expected_cost(candidates: Sequence[str]) -> List[str]:
+    """Returns the candidates cheapest first (stable for equal costs)."""
+    return sorted(candidates, key=expected_cost)
+
+
+class TimeBudget:
+    """
+    A deadline measured from construction. `max_runtime_seconds=None` means unlimited.
+
+    `reserve_fraction` of the budget is kept back for the work that follows the
+    candidate fits (selection, refit, export), so `can_start` says no slightly
+    before the deadline itself.
+    """
+
+    def __init__(self, max_runtime_seconds: Optional[float], reserve_fraction: float = 0.1):
+        self.max_runtime_seconds = max_runtime_seconds
+        self.reserve_seconds = (max_runtime_seconds or 0) * reserve_fraction
+        self.started_at = time.monotonic()
+        self.exhausted = False
+
+    @property
+    def unlimited(self) -> bool:
+        return self.max_runtime_seconds is None
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline (never negative), or None when unlimited."""
+        if self.unlimited:
+            return None
+        return max(0.0, self.max_runtime_seconds - self.elapsed())
+
+    def can_start(self, expected_seconds: float = 0.0) -> bool:
+        """
+        Whether a task expected to take `expected_seconds` still fits in the budget.
+        Once this returns False the budget is flagged as exhausted.
+        """
+        if self.unlimited:
+            return True
+        if self.remaining() - self.reserve_seconds < expected_seconds:
+            self.exhausted = True
+            return False
+        return True
+
+
+def run_candidates_within_budget(
+    fn: Callable[..., Dict[str, Any]],
+    candidates: Sequence[str],
+    args: Sequence[Any],
+    n_jobs: int,
+    budget: TimeBudget,
+    env: Optional[Dict[str, str]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Runs `fn(candidate, *args)` for each candidate in a loky process pool of `n_jobs`
+    workers, in the given order and without oversubscribing the pool. The pool is
+    private to this call (never loky's process-wide reusable executor, which joblib's
+    `Parallel` relies on and which other stages may be using) and is shut down before
+    returning. `args` are pickled to every worker by value, so large matrices should
+    be passed as file paths (see `preprocessing_cache.load_matrix`).
+
+    A candidate is only launched when the budget can still cover its expected cost,
+    estimated from the mean wall time per unit of `expected_cost` of the fits that
+    already finished. Fits still running at the deadline are hard-cancelled by killing
+    the pool's workers. Returns one result per finished candidate, plus
+    `{"model": ..., "status": "timeout"}` for cancelled ones; candidates that were
+    never launched are left out. `env` is set in the worker processes (e.g. the
+    thread limits of a CPU allocation).
+
+    `should_stop` is polled every CANCEL_POLL_SECONDS while fits run; once it returns
+    True the running fits are killed and reported as `{"status": "cancelled"}` and the
+    pending candidates are dropped.
+    """
+    executor = ProcessPoolExecutor(max_workers=n_jobs, env=env)
+    try:
+        return _drive_candidates(executor, fn, candidates, args, n_jobs, budget, should_stop)
+    finally:
+        # Workers of killed fits are already gone; the others exit once idle
+        executor.shutdown(wait=False)
+
+
+def _drive_candidates(executor, fn, candidates, args, n_jobs, budget, should_stop) -> List[Dict[str, Any]]:
+    """The scheduling loop of `run_candidates_within_budget` on the given executor."""
+    pending = list(candidates)
+    running: Dict[Any, tuple] = {}
+    results: List[Dict[str, Any]] = []
+    seconds_per_cost_unit: List[float] = []
+
+    def estimate(candidate: str) -> float:
+        if not seconds_per_cost_unit:
+            return 0.0
+        return expected_cost(candidate) * sum(seconds_per_cost_unit) / len(seconds_per_cost_unit)
+
+    def kill_running(status: str, error: str):
+        for candidate, _ in running.values():
+            print(f"{error} Cancelling {candidate}.")
+            results.append({"model": candidate, "status": status, "error": error})
+        executor.shutdown(wait=False, kill_workers=True)
+
+    while pending or running:
+        if should_stop is not None and should_stop():
+            kill_running("cancelled", "Job cancelled.")
+            break
+
+        while pending and len(running) < n_jobs:
+            if not budget.can_start(estimate(pending[0])):
+                print(f"Time budget nearly spent; not launching {len(pending)} remaining candidate(s).")
+                pending = []
+                break
+            candidate = pending.pop(0)
+            running[executor.submit(fn, candidate, *args)] = (candidate, time.monotonic())
+
+        if not running:
+            break
+
+        timeout = budget.remaining()
+        if should_stop is not None:
+            timeout = CANCEL_POLL_SECONDS if timeout is None else min(timeout, CANCEL_POLL_SECONDS)
+        done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            if budget.unlimited or budget.remaining() > 0:
+                # Only woke up to poll for cancellation
+                continue
+            # Deadline passed with fits still in flight: kill them.
+            budget.exhausted = True
+            kill_running("timeout", "Time budget exhausted.")
+            break
+
+        for future in done:
+            candidate, launched_at = running.pop(future)
+            seconds_per_cost_unit.append((time.monotonic() - launched_at) / expected_cost(candidate))
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append({"model": candidate, "status": "failed", "error": str(e)})
+
+    # Report in launch order regardless of which worker finished first
+    launch_order = {candidate: i for i, candidate in enumerate(candidates)}
+    return sorted(results, key=lambda r: launch_order[r["model"]])
@@ -1,7 +1,14 @@
 import time
 import mlflow
+import numpy as np
 import pandas as pd
-from typing import Dict, Any
+from typing import Dict, Any, List
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import get_scorer
+
+from backend.wpa.auto_ml.preprocessing_cache import TransformedSplit, build_fitted_pipeline
+from backend.core.resource_manager import allocated_cores, configure_estimator_threads
 
 def train_model_with_cv(
     pipeline,
@@ -32,7 +39,10 @@ def train_model_with_cv(
         # NOTE: cross_val_score is not part of the public API in the latest scikit-learn versions
         # for parallel execution. A more robust implementation might use a different approach.
         from sklearn.model_selection import cross_val_score
-        scores = cross_val_score(pipeline, X_train, y_train, cv=cv, scoring=scoring, n_jobs=-1)
+        # Folds run in parallel, so each fold's estimator gets a single thread.
+        n_jobs = allocated_cores()
+        configure_estimator_threads(pipeline, 1 if n_jobs > 1 else None)
+        scores = cross_val_score(pipeline, X_train, y_train, cv=cv, scoring=scoring, n_jobs=n_jobs)
 
         fit_time = time.time() - start_time
 
@@ -65,6 +75,96 @@ def train_model_with_cv(
             "error": str(e),
         }
 
+def score_on_cached_folds(
+    model,
+    cv_splits: List[TransformedSplit],
+    y_train: pd.Series,
+    scoring: str = 'accuracy'
+) -> np.ndarray:
+    """
+    Fits a clone of `model` on every pre-transformed fold and returns the fold scores.
+    Nothing is logged, so it is also used for the cheap rungs of successive halving.
+
+    The folds run in parallel on up to the active allocation's cores (joblib's
+    configured backend; the memory-mapped matrices are not copied), each fold's
+    estimator getting its share of the cores as threads. Outside `cpu_allocation`
+    (e.g. in a candidate worker process) the folds run one after the other.
+    """
+    scorer = get_scorer(scoring)
+    y_values = np.asarray(y_train)
+    cores = allocated_cores()
+    n_jobs = max(1, min(cores, len(cv_splits)))
+    n_threads = max(1, cores // n_jobs)
+    scores = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_and_score_fold)(
+            model, split.X_train, y_values[split.train_index], split.X_test, y_values[split.test_index],
+            scorer, n_threads
+        )
+        for split in cv_splits
+    )
+    return np.array(scores)
+
+def _fit_and_score_fold(model, X_train, y_train, X_test, y_test, scorer, n_threads: int) -> float:
+    fold_model = configure_estimator_threads(clone(model), n_threads)
+    fold_model.fit(X_train, y_train)
+    return scorer(fold_model, X_test, y_test)
+
+def train_model_with_cached_cv(
+    model,
+    step_name: str,
+    cv_splits: List[TransformedSplit],
+    full_split: TransformedSplit,
+    y_train: pd.Series,
+    scoring: str = 'accuracy'
+) -> Dict[str, Any]:
+    """
+    Same contract as `train_model_with_cv`, but the preprocessing of every fold and
+    of the full training set comes pre-computed from a PreprocessingCache, so only
+    the estimator is fitted here. The returned "model" is the full fitted Pipeline.
+    """
+    start_time = time.time()
+    model_key = step_name
+
+    mlflow.log_param("scoring_metric", scoring)
+    mlflow.log_param("cv_folds", len(cv_splits))
+
+    try:
+        scores = score_on_cached_folds(model, cv_splits, y_train, scoring=scoring)
+        y_values = np.asarray(y_train)
+
+        fit_time = time.time() - start_time
+
+        # After CV, fit the estimator on the entire (already transformed) training data
+        final_model = configure_estimator_threads(clone(model))
+        final_model.fit(full_split.X_train, y_values)
+        pipeline = build_fitted_pipeline(full_split.preprocessor, final_model, step_name)
+
+        # Log metrics and the trained model artifact
+        mlflow.log_metric("cv_mean_score", scores.mean())
+        mlflow.log_metric("cv_std_score", scores.std())
+        mlflow.log_metric("fit_time", fit_time)
+        mlflow.sklearn.log_model(pipeline, "model")
+
+        return {
+            "status": "success",
+            "model": pipeline,
+            "model_key": model_key,
+            "cv_mean_score": scores.mean(),
+            "cv_std_score": scores.std(),
+            "fit_time": fit_time,
+        }
+    except Exception as e:
+        import traceback
+        error_str = traceback.format_exc()
+        print(f"Error during training for model {model_key}: {error_str}")
+        mlflow.set_tag("status", "failed")
+        mlflow.log_text(error_str, "error.log")
+        return {
+            "status": "failure",
+            "model_key": model_key,
+            "error": str(e),
+        }
+
 def hpo_search(*args, **kwargs):
     """Placeholder for future HPO implementation."""
     raise NotImplementedError("HPO search is not yet implemented.")
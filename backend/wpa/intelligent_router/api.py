@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Body
+from starlette.concurrency import run_in_threadpool
 from typing import List, Dict, Any
 import pandas as pd
 import joblib
 from io import BytesIO
 
-from backend.core.state_store import get_state_store, StateStore, ModelScoreboardModel
+from backend.core.state_store import ModelScoreboardModel
+from backend.core.async_state_store import AsyncStateStore, get_async_state_store
 
 router = APIRouter(tags=["WPA - Intelligent Router"])
 
@@ -14,16 +16,18 @@ MODEL_CACHE: Dict[str, Any] = {}
 @router.post("/predict")
 async def intelligent_predict(
     input_data: List[Dict[str, Any]] = Body(...),
-    state_store: StateStore = Depends(get_state_store)
+    state_store: AsyncStateStore = Depends(get_async_state_store)
 ):
     """
     Dynamically selects the best model from the scoreboard, loads it,
     and performs a prediction.
     """
-    db = state_store.SessionLocal()
+    db = state_store.sync_store.SessionLocal()
     try:
         # 1. Select the best model from the scoreboard
-        best_model_entry = db.query(ModelScoreboardModel).order_by(ModelScoreboardModel.composite_score.desc()).first()
+        best_model_entry = await run_in_threadpool(
+            lambda: db.query(ModelScoreboardModel).order_by(ModelScoreboardModel.composite_score.desc()).first()
+        )
         if not best_model_entry:
             raise HTTPException(status_code=404, detail="No models found in the scoreboard.")
 
@@ -39,9 +43,10 @@ async def intelligent_predict(
                 # would unzip this. Let's adjust the path for this example.
                 joblib_path = model_path.replace(".zip", "/pipeline.joblib").replace("exporter/", "exported_models/")
 
-                response = state_store.s3_client.get_object(Bucket="sadi", Key=joblib_path)
-                model_bytes = BytesIO(response['Body'].read())
-                MODEL_CACHE[model_key] = joblib.load(model_bytes)
+                model_bytes = await state_store.load_object_bytes(joblib_path)
+                if model_bytes is None:
+                    raise FileNotFoundError(joblib_path)
+                MODEL_CACHE[model_key] = await run_in_threadpool(joblib.load, BytesIO(model_bytes))
             except Exception as e:
                 raise HTTPException(status_code=500, detail=f"Failed to load model artifact: {e}")
 
@@ -50,10 +55,10 @@ async def intelligent_predict(
         # 3. Perform prediction
         input_df = pd.DataFrame(input_data)
         try:
-            predictions = pipeline.predict(input_df)
+            predictions = await run_in_threadpool(pipeline.predict, input_df)
             return {"predictions": predictions.tolist()}
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Error during prediction: {e}")
 
     finally:
-        db.close()
+        await run_in_threadpool(db.close)
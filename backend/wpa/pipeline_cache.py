@@ -0,0 +1,95 @@
+"""
+Content-addressed cache of master pipeline results.
+
+A job's results are fully determined by the uploaded file and the pipeline
+configuration, so the cache key is a digest of the raw file bytes, its extension
+(which selects the reader) and the `version`/`ml_engine` sections of config.json.
+When a completed job with the same key exists, a new job reuses its artifacts
+(server-side copied in MinIO) instead of recomputing them.
+"""
+import json
+import os
+from typing import Any, BinaryIO, Dict, Optional, Union
+
+import xxhash
+
+from backend.core.config_loader import Config
+from backend.core.state_store import StateStore
+
+# Bump when a pipeline change makes previously cached results stale.
+PIPELINE_CACHE_VERSION = 1
+CACHED_CONFIG_SECTIONS = ("version", "ml_engine")
+# Block size for hashing file objects that expose no buffer.
+RAW_FILE_READ_BYTES = 8 * 1024 * 1024
+
+
+def raw_file_digest(content: Union[bytes, BinaryIO]) -> str:
+    """
+    Digest of the raw upload, given as bytes or as a seekable binary file object.
+    The file is never copied whole: a BytesIO is hashed through a view of its
+    buffer, any other file in blocks from its start.
+    """
+    if not hasattr(content, "read"):
+        return xxhash.xxh3_128_hexdigest(content)
+    if hasattr(content, "getbuffer"):
+        with content.getbuffer() as view:
+            return xxhash.xxh3_128_hexdigest(view)
+    position = content.tell()
+    content.seek(0)
+    h = xxhash.xxh3_128()
+    for block in iter(lambda: content.read(RAW_FILE_READ_BYTES), b""):
+        h.update(block)
+    content.seek(position)
+    return h.hexdigest()
+
+
+def pipeline_config_digest(config: Optional[Dict[str, Any]] = None) -> str:
+    config = config if config is not None else Config.load()
+    relevant = {section: config.get(section) for section in CACHED_CONFIG_SECTIONS}
+    return xxhash.xxh3_128_hexdigest(json.dumps(relevant, sort_keys=True).encode("utf-8"))
+
+
+def pipeline_cache_key(content: Union[bytes, BinaryIO], filename: str, config: Optional[Dict[str, Any]] = None) -> str:
+    ext = os.path.splitext(filename)[1].lower()
+    payload = f"v{PIPELINE_CACHE_VERSION}:{ext}:{raw_file_digest(content)}:{pipeline_config_digest(config)}"
+    return xxhash.xxh3_128_hexdigest(payload.encode("utf-8"))
+
+
+class PipelineResultCache:
+    """Maps pipeline cache keys to the last completed job that produced them."""
+
+    def __init__(self, state_store: StateStore):
+        self.state_store = state_store
+
+    def lookup(self, cache_key: str) -> Optional[str]:
+        """
+        The job_id of a completed job with this key, or None. Entries whose job is
+        no longer complete (or whose manifest is gone) are dropped.
+        """
+        source_job_id = self.state_store.load_pipeline_cache_entry(cache_key)
+        if not source_job_id:
+            return None
+        status = self.state_store.load_job_status(source_job_id) or {}
+        if status.get("status") != "completed" or not self.state_store.artifact_exists(source_job_id, "manifest.json"):
+            self.state_store.delete_pipeline_cache_entry(cache_key)
+            return None
+        return source_job_id
+
+    def store(self, cache_key: str, job_id: str):
+        self.state_store.save_pipeline_cache_entry(cache_key, job_id)
+
+    def reuse(self, cache_key: str, source_job_id: str, job_id: str) -> Dict[str, Any]:
+        """
+        Copies the artifacts of `source_job_id` to `job_id` and returns the new job's
+        manifest: the source manifest re-addressed to `job_id`, with a cache-hit record.
+        """
+        copied = self.state_store.copy_job_artifacts(source_job_id, job_id)
+        manifest = self.state_store.load_json_artifact(job_id, "manifest.json") or {}
+        manifest["job_id"] = job_id
+        manifest["cache"] = {
+            "hit": True,
+            "key": cache_key,
+            "source_job_id": source_job_id,
+            "artifacts_copied": copied,
+        }
+        return manifest
@@ -0,0 +1,238 @@
+"""
+Stage DAG for the master pipeline.
+
+Each stage declares the stages it depends on and the StateStore artifacts it
+reads (`inputs`) and writes (`outputs`). `PipelineDAG` checks that every input is
+produced upstream of the stage that reads it, and runs the stages in a thread pool
+as soon as their dependencies completed, so independent branches (e.g. EDA and
+target detection -> AutoML) overlap. The stages themselves are I/O or process-pool
+bound, so threads are enough to overlap them.
+
+A run can resume a partially completed pipeline: stages passed as `completed` are
+not run again, and their `restore` callables rebuild the context values they
+would have returned from the artifacts they persisted.
+
+A run can also be cancelled cooperatively through `should_stop`: no stage starts
+once it returns True, and stages that stop early by raising while it is True are
+marked cancelled instead of failed.
+"""
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+PENDING, RUNNING, COMPLETED, FAILED, SKIPPED, CANCELLED = (
+    "pending", "running", "completed", "failed", "skipped", "cancelled"
+)
+# How often a run with `should_stop` checks it while stages are running.
+STOP_POLL_SECONDS = 0.5
+
+
+class PipelineStageError(RuntimeError):
+    """A stage of the pipeline failed; the original exception is chained."""
+
+    def __init__(self, stage: str, error: BaseException):
+        super().__init__(f"Stage '{stage}' failed: {error}")
+        self.stage = stage
+
+
+class PipelineCancelled(RuntimeError):
+    """The run was stopped through `should_stop`; `stages` are the cancelled ones."""
+
+    def __init__(self, stages: List[str]):
+        super().__init__(f"Pipeline cancelled (stages {stages} interrupted).")
+        self.stages = stages
+
+
+@dataclass
+class Stage:
+    name: str
+    run: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]
+    label: str = ""
+    depends_on: Tuple[str, ...] = ()
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+    restore: Optional[Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]] = None
+
+    def __post_init__(self):
+        self.label = self.label or self.name
+
+
+@dataclass
+class PipelineDAG:
+    """
+    `run` receives a shared context dict; each stage gets it and returns a dict of
+    values to add to it (or None). `external_inputs` are artifacts that exist before
+    the pipeline starts.
+    """
+    stages: List[Stage]
+    external_inputs: Tuple[str, ...] = ()
+    durations: Dict[str, float] = field(init=False, default_factory=dict)
+    _by_name: Dict[str, Stage] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self._by_name = {}
+        for stage in self.stages:
+            if stage.name in self._by_name:
+                raise ValueError(f"Duplicate stage '{stage.name}'.")
+            self._by_name[stage.name] = stage
+        self.validate()
+
+    def ancestors(self, name: str) -> set:
+        seen, stack = set(), list(self._by_name[name].depends_on)
+        while stack:
+            dep = stack.pop()
+            if dep not in seen:
+                seen.add(dep)
+                stack.extend(self._by_name[dep].depends_on)
+        return seen
+
+    def descendants(self, name: str) -> set:
+        return {stage.name for stage in self.stages if name in self.ancestors(stage.name)}
+
+    def validate(self):
+        """Unknown dependencies, cycles and inputs nothing upstream produces are errors."""
+        for stage in self.stages:
+            for dep in stage.depends_on:
+                if dep not in self._by_name:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'.")
+        self.topological_order()
+        for stage in self.stages:
+            available = set(self.external_inputs)
+            for dep in self.ancestors(stage.name):
+                available.update(self._by_name[dep].outputs)
+            missing = [name for name in stage.inputs if name not in available]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' reads {missing}, which no upstream stage writes.")
+
+    def topological_order(self) -> List[str]:
+        order, done, visiting = [], set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Cycle in pipeline DAG at stage '{name}'.")
+            visiting.add(name)
+            for dep in self._by_name[name].depends_on:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+            order.append(name)
+
+        for stage in self.stages:
+            visit(stage.name)
+        return order
+
+    def critical_path(self, durations: Dict[str, float]) -> Tuple[List[str], float]:
+        """Longest dependency chain for the given stage durations."""
+        finish, previous = {}, {}
+        for name in self.topological_order():
+            deps = self._by_name[name].depends_on
+            start_dep = max(deps, key=lambda d: finish[d], default=None)
+            finish[name] = (finish[start_dep] if start_dep else 0.0) + durations.get(name, 0.0)
+            previous[name] = start_dep
+        end = max(finish, key=finish.get)
+        path = [end]
+        while previous[path[-1]]:
+            path.append(previous[path[-1]])
+        return path[::-1], finish[end]
+
+    def restore(self, context: Dict[str, Any], completed: Iterable[str]):
+        """
+        Rebuilds the context of already completed stages that still have an
+        incomplete stage downstream, in dependency order. A restore callable shared
+        by several stages (e.g. reloading the latest dataframe) runs once.
+        """
+        completed = set(completed)
+        done_callables = set()
+        for name in self.topological_order():
+            stage = self._by_name[name]
+            if name not in completed or stage.restore is None or stage.restore in done_callables:
+                continue
+            if self.descendants(name) - completed:
+                context.update(stage.restore(context) or {})
+                done_callables.add(stage.restore)
+
+    def run(self, context: Dict[str, Any], max_workers: int = 2,
+            on_update: Optional[Callable[[Dict[str, str], Iterable[Stage]], None]] = None,
+            completed: Iterable[str] = (), should_stop: Optional[Callable[[], bool]] = None) -> Dict[str, str]:
+        """
+        Runs every stage once its dependencies completed, at most `max_workers` at a
+        time. `on_update(statuses, running_stages)` is called whenever a stage starts
+        or finishes; the wall time of each stage is kept in `durations`. After a
+        failure no new stage starts; the running ones finish, the stages downstream
+        of the failure are marked skipped and PipelineStageError is raised.
+        Stages in `completed` are restored (see `restore`) instead of run.
+        Once `should_stop()` returns True no new stage starts; when the running ones
+        have returned the remaining stages are marked cancelled and
+        PipelineCancelled is raised.
+        """
+        completed = set(completed)
+        unknown = completed - set(self._by_name)
+        if unknown:
+            raise ValueError(f"Unknown completed stages {sorted(unknown)}.")
+        self.restore(context, completed)
+        statuses = {stage.name: COMPLETED if stage.name in completed else PENDING for stage in self.stages}
+        running: Dict[Any, Stage] = {}
+        started_at: Dict[str, float] = {}
+        failure: Optional[PipelineStageError] = None
+        stopping = False
+
+        def notify():
+            if on_update is not None:
+                on_update(dict(statuses), list(running.values()))
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pipeline-stage") as executor:
+            while True:
+                if should_stop is not None and not stopping and should_stop():
+                    stopping = True
+                if failure is None and not stopping:
+                    for stage in self.stages:
+                        ready = statuses[stage.name] == PENDING and all(
+                            statuses[dep] == COMPLETED for dep in stage.depends_on
+                        )
+                        if ready and len(running) < max_workers:
+                            statuses[stage.name] = RUNNING
+                            started_at[stage.name] = time.monotonic()
+                            running[executor.submit(stage.run, context)] = stage
+                    notify()
+                if not running:
+                    break
+
+                timeout = STOP_POLL_SECONDS if should_stop is not None and not stopping else None
+                done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    self.durations[stage.name] = time.monotonic() - started_at[stage.name]
+                    try:
+                        context.update(future.result() or {})
+                        statuses[stage.name] = COMPLETED
+                    except Exception as e:
+                        if should_stop is not None and (stopping or should_stop()):
+                            # The stage stopped early because the run is being cancelled
+                            stopping = True
+                            statuses[stage.name] = CANCELLED
+                            continue
+                        statuses[stage.name] = FAILED
+                        for name in self.descendants(stage.name):
+                            statuses[name] = SKIPPED
+                        if failure is None:
+                            failure = PipelineStageError(stage.name, e)
+                            failure.__cause__ = e
+                if done:
+                    notify()
+
+        if failure is None and stopping:
+            for name, status in statuses.items():
+                if status == PENDING:
+                    statuses[name] = CANCELLED
+            notify()
+            raise PipelineCancelled([name for name, status in statuses.items() if status == CANCELLED])
+        if failure is not None:
+            for name, status in statuses.items():
+                if status == PENDING:
+                    statuses[name] = SKIPPED
+            notify()
+            raise failure
+        return statuses
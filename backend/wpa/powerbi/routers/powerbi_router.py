@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel
 from starlette.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from backend.core.dependencies import get_db
@@ -83,7 +84,8 @@ async def get_widget_data(
     viz_service = VisualizationService(db)
     try:
         # Note: Caching would need to be re-implemented here if desired
-        processed_data = viz_service.process_widget_from_db(widget_id, filters=filter_values)
+        # The query and processing are blocking; keep them off the event loop
+        processed_data = await run_in_threadpool(viz_service.process_widget_from_db, widget_id, filters=filter_values)
         return processed_data
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f"Widget '{widget_id}' not found")
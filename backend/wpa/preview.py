@@ -0,0 +1,83 @@
+"""
+Fast-preview mode of the master pipeline.
+
+A preview runs ingestion checks, quality, target detection, EDA and the cheapest
+AutoML candidates on a bounded sample of the upload, so first results are
+published within seconds while the full-data run continues. The sample is drawn in
+two steps: a uniform sample of `oversample_factor * max_rows` rows is read while
+parsing the file and used for target detection, then `stratified_sample` reduces
+it to `max_rows` rows stratified on the detected target.
+
+Preview artifacts live under the job's `preview/` prefix and are removed once the
+full run has written the final ones.
+"""
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from backend.core.config_loader import Config
+
+PREVIEW_PREFIX = "preview/"
+# Targets with at most this many distinct values are stratified by class,
+# numeric targets with more by quantile bins.
+MAX_STRATA = 50
+QUANTILE_BINS = 10
+
+
+def preview_settings(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    config = config if config is not None else Config.load()
+    settings = {"max_rows": 5000, "oversample_factor": 4, "max_candidates": 2,
+                "max_runtime_seconds": 20, "random_state": 42}
+    settings.update(config.get("ml_engine", {}).get("preview", {}))
+    return settings
+
+
+def _strata(y: pd.Series) -> Optional[pd.Series]:
+    if y.nunique(dropna=False) <= MAX_STRATA:
+        return y.astype("object").where(y.notna(), "__missing__")
+    if pd.api.types.is_numeric_dtype(y):
+        bins = pd.qcut(y, q=QUANTILE_BINS, labels=False, duplicates="drop")
+        return bins.astype("float64").fillna(-1)
+    return None
+
+
+def stratified_sample(df: pd.DataFrame, target: Optional[str], max_rows: int,
+                      random_state: int = 42) -> pd.DataFrame:
+    """
+    At most `max_rows` rows of `df` whose distribution of `target` matches the
+    full frame: rows are allocated to the strata (classes, or quantile bins of a
+    continuous numeric target) in proportion to their size, with at least one row
+    per stratum as long as there are no more strata than `max_rows` (the one-row
+    floors are paid for by the largest strata). Without a usable target the sample
+    is uniform.
+    """
+    if len(df) <= max_rows:
+        return df
+    strata = _strata(df[target]) if target is not None and target in df.columns else None
+    if strata is None:
+        return df.sample(n=max_rows, random_state=random_state).reset_index(drop=True)
+
+    counts = strata.value_counts()
+    min_rows = 1 if len(counts) <= max_rows else 0
+    allocation = np.maximum(min_rows, np.floor(counts * max_rows / len(df))).astype(int)
+    # Hand the rows lost to flooring to the largest strata, never exceeding a stratum's size
+    for label in counts.index:
+        if allocation.sum() >= max_rows:
+            break
+        allocation[label] = min(counts[label], allocation[label] + max_rows - allocation.sum())
+    # Take the rows the one-row floors added beyond max_rows back from the largest strata
+    surplus = allocation.sum() - max_rows
+    for label in allocation.sort_values(ascending=False).index:
+        if surplus <= 0:
+            break
+        cut = min(surplus, allocation[label] - min_rows)
+        allocation[label] -= cut
+        surplus -= cut
+
+    rng = np.random.default_rng(random_state)
+    positions = []
+    for label, indices in strata.groupby(strata, sort=False).indices.items():
+        positions.append(rng.choice(indices, size=allocation[label], replace=False))
+    positions = np.sort(np.concatenate(positions))
+    return df.iloc[positions].reset_index(drop=True)
@@ -2,127 +2,435 @@
 This module contains the master Celery task orchestrator for the WPA layer,
 ensuring full system interoperability by using the StateStore for all I/O.
 """
+import threading
+import time
 import uuid
+from datetime import datetime, timezone
+
 import pandas as pd
 import mlflow
+import matplotlib.pyplot as plt
 from fastapi import UploadFile
 from io import BytesIO
 
 from backend.celery_worker import celery_app
+from backend.core.cancellation import CancellationToken, JobCancelled
+from backend.core.dataset_handle import DatasetHandle, DatasetWriter
+from backend.core.fingerprint import get_fingerprint_cache
+from backend.core.stage_metrics import StageMonitor
 from backend.core.state_store import get_state_store
-from backend.wpa.auto_analysis.target_detector import detect_target
+from backend.wpa.auto_analysis.target_detector import DEFAULT_CONFIG as DETECTION_CONFIG, detect_target
 from backend.wpa.auto_analysis.eda_intelligent_service import EDAIntelligentService
 from backend.mpa.ingestion.service import get_ingestion_service
+from backend.mpa.quality.service import get_data_quality_service
 from backend.mpa.etl.service import EtlService
+from backend.mpa.ingestion.schema_validator import validate_dataframe
+from backend.mpa.profiling.service import ColumnProfileStore, build_column_profile
 from backend.wpa.auto_ml.service import AutoMlService
+from backend.wpa.pipeline_cache import PipelineResultCache, pipeline_cache_key
+from backend.wpa.pipeline_dag import COMPLETED, PipelineCancelled, PipelineDAG, PipelineStageError, Stage
+from backend.wpa.preview import PREVIEW_PREFIX, preview_settings, stratified_sample
 
-@celery_app.task(name="wpa.master_pipeline_task")
-def master_pipeline_task(job_id: str):
+# Stages that may run at the same time (EDA runs alongside target detection -> AutoML).
+MASTER_PIPELINE_MAX_PARALLEL_STAGES = 2
+
+# --- Pipeline Stages ---
+# Each stage reads what it needs from the shared context (and the StateStore) and
+# returns the values it adds to the context. Stages run on several threads, so the
+# manifest is only changed under `ctx["manifest_lock"]`. The working dataframe is
+# passed in memory; ingestion and cleaning hand a snapshot of it to
+# `ctx["dataset_writer"]`, which persists `data.parquet` write-behind.
+
+def _record_step(ctx: dict, step: dict, **fields):
+    with ctx["manifest_lock"]:
+        ctx["manifest"].update(fields)
+        ctx["manifest"]["steps"].append(step)
+
+def _ingestion_stage(ctx: dict) -> dict:
+    # Use the IngestionService to process the file correctly
+    # NOTE: Since this is a Celery task (sync), we need to run the async service method in an event loop.
+    import asyncio
+
+    # Resolve services using the application's dependency injectors
+    ingestion_service = get_ingestion_service(
+        state_store=ctx["state_store"], quality_service=get_data_quality_service()
+    )
+
+    mock_upload_file = UploadFile(filename=ctx["original_filename"], file=ctx["raw_file_bytes"])
+    df = asyncio.run(ingestion_service.process_uploaded_file(
+        mock_upload_file, ctx["job_id"], should_stop=ctx["cancel_token"].is_cancelled, persist_dataframe=False
+    ))
+
+    if df is None:
+        raise ValueError("Dataframe could not be processed by IngestionService.")
+    # Only uploaded if the run stops before cleaning replaces it
+    ctx["dataset_writer"].write("ingestion", DatasetHandle.from_dataframe(df), defer=True)
+
+    _record_step(ctx, {"step": "ingestion", "status": "completed"})
+    return {"df": df}
+
+def _cleaning_stage(ctx: dict) -> dict:
+    etl_service = EtlService(state_store=ctx["state_store"])
+    cleaned_df, changed_columns = etl_service.standardize_df_with_changes(ctx["df"])
+    # Only the rewritten columns are rehashed for the cleaned dataset's digest; the
+    # first call is free when ingestion already fingerprinted this frame.
+    fingerprints = get_fingerprint_cache()
+    fingerprints.fingerprint(ctx["job_id"], ctx["df"])
+    fingerprints.fingerprint(ctx["job_id"], cleaned_df, changed_columns=changed_columns)
+    ctx["dataset_writer"].write("cleaning", DatasetHandle.from_dataframe(cleaned_df)) # Overwrites data.parquet
+
+    _record_step(ctx, {"step": "cleaning", "status": "completed"})
+    return {"df": cleaned_df} # Continue with the cleaned dataframe
+
+def _profiling_stage(ctx: dict) -> dict:
+    # Profile the cleaned dataset once; target detection and EDA read the same profile
+    column_profile = ColumnProfileStore(ctx["state_store"]).get_or_compute(ctx["job_id"], ctx["df"])
+    return {"column_profile": column_profile}
+
+def _target_detection_stage(ctx: dict) -> dict:
+    state_store, job_id = ctx["state_store"], ctx["job_id"]
+    target_results = detect_target(ctx["df"], job_id, column_profile=ctx["column_profile"])
+
+    state_store.save_json_artifact(job_id, "target.json", target_results["target_decision"])
+    state_store.save_json_artifact(job_id, "eda/summary.json", target_results["eda_summary"])
+
+    _record_step(ctx, {"step": "target_detection", "status": "completed", "result": target_results["target_decision"]},
+                 dataset_hash=target_results["dataset_hash"])
+    return {"selected_target": target_results["target_decision"].get("selected_target")}
+
+def _eda_stage(ctx: dict) -> dict:
+    state_store, job_id, df = ctx["state_store"], ctx["job_id"], ctx["df"]
+    inferred_types = {col: 'numeric' if pd.api.types.is_numeric_dtype(df[col]) else 'categorical' for col in df.columns}
+
+    eda_service = EDAIntelligentService(df, inferred_types, ctx["column_profile"])
+    eda_artifacts = eda_service.run_automated_eda()
+
+    for name, artifact in eda_artifacts["json_artifacts"].items():
+        state_store.save_json_artifact(job_id, f"eda/{name}", artifact)
+    for name, fig in eda_artifacts["figure_artifacts"].items():
+        if fig is not None:
+            state_store.save_figure_artifact(job_id, f"eda/{name}", fig)
+            plt.close(fig)
+
+    _record_step(ctx, {"step": "eda", "status": "completed"})
+
+def _automl_stage(ctx: dict) -> dict:
+    state_store, job_id = ctx["state_store"], ctx["job_id"]
+    selected_target = ctx["selected_target"]
+    if selected_target:
+        automl_service = AutoMlService(state_store)
+        automl_artifacts = automl_service.run_automl_pipeline(
+            job_id, ctx["df"], selected_target, cancel_token=ctx["cancel_token"]
+        )
+
+        # Save artifacts (also the partial results of a cancelled run)
+        state_store.save_json_artifact(job_id, "automl_summary.json", automl_artifacts["summary"])
+        if automl_artifacts["best_model"]:
+            import pickle
+            model_bytes = pickle.dumps(automl_artifacts["best_model"])
+            state_store.save_report_artifact(job_id, "best_model.pkl", model_bytes) # Using save_report_artifact for simplicity
+
+        if automl_artifacts["summary"].get("cancelled"):
+            _record_step(ctx, {"step": "automl", "status": "cancelled", "result": automl_artifacts["summary"]})
+            raise JobCancelled(job_id)
+        _record_step(ctx, {"step": "automl", "status": "completed", "result": automl_artifacts["summary"]})
+    else:
+        print(f"INFO: Skipping AutoML for job_id {job_id} as no target variable was detected.")
+        _record_step(ctx, {"step": "automl", "status": "skipped", "details": "No target variable detected"})
+
+def _report_stage(ctx: dict) -> dict:
+    state_store, job_id = ctx["state_store"], ctx["job_id"]
+    final_report = {
+        "quality_report": state_store.load_json_artifact(job_id, "quality_report.json"),
+        "eda_summary": state_store.load_json_artifact(job_id, "eda/summary.json"),
+        "target_detection": state_store.load_json_artifact(job_id, "target.json"),
+        "automl_results": state_store.load_json_artifact(job_id, "automl_summary.json"),
+    }
+
+    state_store.save_json_artifact(job_id, "final_report.json", final_report)
+    _record_step(ctx, {"step": "report_generation", "status": "completed"},
+                 reports={"final_report_json": "final_report.json"})
+
+# --- Stage Restores ---
+# On resume, completed stages are not rerun; these rebuild the context values they
+# returned from the artifacts they persisted.
+
+def _restore_dataframe(ctx: dict) -> dict:
+    # data.parquet holds the output of the last completed of ingestion and cleaning
+    df = ctx["state_store"].load_dataframe(ctx["job_id"])
+    if df is None:
+        raise FileNotFoundError(f"Checkpointed dataframe not found for job_id: {ctx['job_id']}")
+    return {"df": df}
+
+def _restore_column_profile(ctx: dict) -> dict:
+    return {"column_profile": ColumnProfileStore(ctx["state_store"]).get_or_compute(ctx["job_id"], ctx["df"])}
+
+def _restore_selected_target(ctx: dict) -> dict:
+    target_decision = ctx["state_store"].load_json_artifact(ctx["job_id"], "target.json")
+    if target_decision is None:
+        raise FileNotFoundError(f"Checkpointed target.json not found for job_id: {ctx['job_id']}")
+    return {"selected_target": target_decision.get("selected_target")}
+
+def build_master_pipeline() -> PipelineDAG:
     """
-    The master orchestrator task for the SADI analysis pipeline, refactored to be stateless.
-    It reads inputs from the StateStore and writes all artifacts back to it.
+    The master pipeline as a stage DAG. Inputs/outputs name the StateStore
+    artifacts (or shared values) each stage reads and writes:
+
+        ingestion -> cleaning -> profiling -> target_detection -> automl -> report
+                                          +-> eda
     """
-    state_store = get_state_store()
-    manifest = {"job_id": job_id, "steps": []}
+    return PipelineDAG(
+        stages=[
+            Stage("ingestion", _ingestion_stage, label="Ingesting Data",
+                  inputs=("raw_file",), outputs=("data.parquet", "metadata.json", "quality_report.json"),
+                  restore=_restore_dataframe),
+            Stage("cleaning", _cleaning_stage, label="Cleaning Data", depends_on=("ingestion",),
+                  inputs=("data.parquet",), outputs=("data.parquet",), restore=_restore_dataframe),
+            Stage("profiling", _profiling_stage, label="Profiling", depends_on=("cleaning",),
+                  inputs=("data.parquet",), outputs=("column_profile",), restore=_restore_column_profile),
+            Stage("target_detection", _target_detection_stage, label="Target Detection", depends_on=("profiling",),
+                  inputs=("column_profile",), outputs=("target.json", "eda/summary.json"),
+                  restore=_restore_selected_target),
+            Stage("eda", _eda_stage, label="EDA", depends_on=("profiling",),
+                  inputs=("column_profile",), outputs=("eda/summary_statistics.json", "eda/missing_values_report.json",
+                                                       "eda/eda_full_report.json", "eda/figures")),
+            Stage("automl", _automl_stage, label="AutoML", depends_on=("target_detection",),
+                  inputs=("target.json",), outputs=("automl_summary.json", "reports/best_model.pkl")),
+            Stage("report", _report_stage, label="Report Generation", depends_on=("target_detection", "automl"),
+                  inputs=("quality_report.json", "eda/summary.json", "target.json", "automl_summary.json"),
+                  outputs=("final_report.json",)),
+        ],
+        external_inputs=("raw_file",),
+    )
 
-    try:
-        # --- Step 1: Data Ingestion & Validation ---
-        state_store.save_job_status(job_id, {"status": "running", "stage": "Ingesting Data"})
+def _run_preview(job_id: str, state_store, original_filename: str, raw_file_bytes) -> dict:
+    """
+    Runs the pipeline on a bounded sample (see backend.wpa.preview) and saves its
+    artifacts under `preview/`. Returns the manifest entry describing the preview.
+    """
+    started_at = time.monotonic()
+    settings = preview_settings()
+    max_rows, random_state = settings["max_rows"], settings["random_state"]
 
-        job = state_store.get_job(uuid.UUID(job_id))
-        if not job or not job.original_filename:
-            raise ValueError(f"Job or original_filename not found for job_id: {job_id}")
+    # --- Ingestion checks and target detection on a uniform (oversampled) sample ---
+    ingestion_service = get_ingestion_service(state_store=state_store, quality_service=get_data_quality_service())
+    pool = ingestion_service.read_sample(original_filename, raw_file_bytes,
+                                         max_rows * settings["oversample_factor"], random_state)
+    if pool is None or pool.empty:
+        raise ValueError("Preview sample could not be read.")
+    pool = EtlService(state_store=state_store).standardize_df(pool)
+    pool_profile = build_column_profile(pool)
+    # On a sample this small, starting a worker pool costs more than the checks themselves
+    detection_config = dict(DETECTION_CONFIG, pruning={**DETECTION_CONFIG["pruning"], "n_jobs": 1})
+    target_results = detect_target(pool, job_id, config=detection_config, column_profile=pool_profile)
+    selected_target = target_results["target_decision"].get("selected_target")
 
-        raw_file_bytes = state_store.load_raw_file(job_id, job.original_filename)
-        if not raw_file_bytes:
-            raise FileNotFoundError(f"Raw file not found in storage for job_id: {job_id}")
+    # --- Quality, EDA and cheap models on the sample stratified by the detected target ---
+    sample = stratified_sample(pool, selected_target, max_rows, random_state)
+    profile = pool_profile if len(sample) == len(pool) else build_column_profile(sample)
+    quality_report = get_data_quality_service().get_quality_report(sample, profile)
 
-        # Use the IngestionService to process the file correctly
-        # NOTE: Since this is a Celery task (sync), we need to run the async service method in an event loop.
-        import asyncio
-        from backend.mpa.ingestion.service import get_ingestion_service
+    state_store.save_json_artifact(job_id, f"{PREVIEW_PREFIX}metadata.json", validate_dataframe(sample, profile))
+    state_store.save_json_artifact(job_id, f"{PREVIEW_PREFIX}quality_report.json", quality_report.model_dump())
+    state_store.save_json_artifact(job_id, f"{PREVIEW_PREFIX}target.json", target_results["target_decision"])
+    state_store.save_json_artifact(job_id, f"{PREVIEW_PREFIX}eda/summary.json", target_results["eda_summary"])
 
-        # Resolve services using the application's dependency injectors
-        ingestion_service = get_ingestion_service(state_store=state_store)
+    inferred_types = {col: 'numeric' if pd.api.types.is_numeric_dtype(sample[col]) else 'categorical' for col in sample.columns}
+    eda_artifacts = EDAIntelligentService(sample, inferred_types, profile).run_automated_eda()
+    for name, artifact in eda_artifacts["json_artifacts"].items():
+        state_store.save_json_artifact(job_id, f"{PREVIEW_PREFIX}eda/{name}", artifact)
+    for name, fig in eda_artifacts["figure_artifacts"].items():
+        if fig is not None:
+            state_store.save_figure_artifact(job_id, f"{PREVIEW_PREFIX}eda/{name}", fig)
+            plt.close(fig)
 
-        mock_upload_file = UploadFile(filename=job.original_filename, file=raw_file_bytes)
-        df = asyncio.run(ingestion_service.process_uploaded_file(mock_upload_file, job_id))
+    automl_summary = None
+    if selected_target:
+        automl_artifacts = AutoMlService(state_store).run_automl_pipeline(
+            job_id, sample, selected_target,
+            max_runtime_seconds=settings["max_runtime_seconds"], max_candidates=settings["max_candidates"]
+        )
+        automl_summary = automl_artifacts["summary"]
+        state_store.save_json_artifact(job_id, f"{PREVIEW_PREFIX}automl_summary.json", automl_summary)
 
-        if df is None:
-            raise ValueError("Dataframe could not be processed by IngestionService.")
+    state_store.save_json_artifact(job_id, f"{PREVIEW_PREFIX}final_report.json", {
+        "quality_report": quality_report.model_dump(),
+        "eda_summary": target_results["eda_summary"],
+        "target_detection": target_results["target_decision"],
+        "automl_results": automl_summary,
+    })
+    return {
+        "status": "ready",
+        "sample_rows": len(sample),
+        "detection_rows": len(pool),
+        "selected_target": selected_target,
+        "artifacts_prefix": PREVIEW_PREFIX,
+        "seconds": time.monotonic() - started_at,
+    }
 
-        manifest["steps"].append({"step": "ingestion", "status": "completed"})
+def _resumable_stages(manifest: dict, pipeline: PipelineDAG) -> list:
+    """
+    The checkpointed stages of a previous run whose dependencies are checkpointed
+    too, i.e. the stages a resumed run can skip.
+    """
+    checkpoints = manifest.get("checkpoints", {})
+    depends_on = {stage.name: stage.depends_on for stage in pipeline.stages}
+    completed = []
+    for name in pipeline.topological_order():
+        if name in checkpoints and all(dep in completed for dep in depends_on[name]):
+            completed.append(name)
+    return completed
 
-        # --- Step 2: Data Cleaning & Standardization ---
-        state_store.save_job_status(job_id, {"status": "running", "stage": "Cleaning Data"})
-        etl_service = EtlService(state_store=state_store)
-        cleaned_df = etl_service.standardize_df(df)
-        state_store.save_dataframe(job_id, cleaned_df) # Overwrite with the cleaned version
-        df = cleaned_df # Continue with the cleaned dataframe
+@celery_app.task(name="wpa.master_pipeline_task")
+def master_pipeline_task(job_id: str, force_recompute: bool = False, resume: bool = False, preview: bool = False):
+    """
+    The master orchestrator task for the SADI analysis pipeline, refactored to be stateless.
+    It reads inputs from the StateStore and writes all artifacts back to it.
+
+    The stages run as the DAG of `build_master_pipeline`: independent branches
+    (EDA vs. target detection and AutoML) run concurrently, and `job_status`
+    carries the status of every stage under `stages`.
+
+    If a previous job completed with the same raw file and pipeline configuration,
+    its artifacts are reused instead of recomputed, unless `force_recompute` is set.
+    The manifest's `cache` entry records whether the job was a cache hit.
+
+    Every completed stage is checkpointed in `manifest.json` (`checkpoints`) as soon
+    as it finishes. With `resume=True` the job's stages that are checkpointed are not
+    rerun: their outputs are restored from the persisted artifacts and the pipeline
+    continues from the first incomplete stages.
 
-        manifest["steps"].append({"step": "cleaning", "status": "completed"})
+    With `preview=True` the pipeline first runs on a bounded stratified sample
+    (`_run_preview`) and publishes those results under a `preview` job status and
+    the `preview/` artifacts; the full-data run follows and replaces them.
 
+    A job cancelled through `POST /job/{job_id}/cancel` stops cooperatively: no new
+    stage starts, the running ones stop at their next cancellation check, and the
+    job ends with status `cancelled`, keeping its artifacts and checkpoints.
 
-        # --- Step 3: Target Detection ---
-        state_store.save_job_status(job_id, {"status": "running", "stage": "Target Detection"})
-        target_results = detect_target(df, job_id)
+    Every stage is measured by a StageMonitor (wall/CPU time, peak memory, input
+    shape, bytes written); the measurements go to Prometheus and to the manifest's
+    `stage_metrics`.
 
-        state_store.save_json_artifact(job_id, "target.json", target_results["target_decision"])
-        state_store.save_json_artifact(job_id, "eda/summary.json", target_results["eda_summary"])
+    The dataframe is persisted write-behind by a DatasetWriter: `data.parquet` is
+    uploaded once, from the newest stage snapshot, while the later stages run, and
+    a stage is only checkpointed once its output is durable.
+    """
+    state_store = get_state_store()
+    manifest = {"job_id": job_id, "steps": [], "checkpoints": {}}
+    manifest_lock = threading.Lock()
+    stage_statuses = {}
+    preview_status = {}
+    pipeline = build_master_pipeline()
+    stage_monitor = StageMonitor()
+    cancel_token = CancellationToken(state_store, job_id)
+    stage_monitor.instrument(pipeline)
 
-        manifest["dataset_hash"] = target_results["dataset_hash"]
-        manifest["steps"].append({"step": "target_detection", "status": "completed", "result": target_results["target_decision"]})
-        selected_target = target_results["target_decision"].get("selected_target")
+    def save_checkpoints(statuses):
+        with manifest_lock:
+            checkpoints = manifest.setdefault("checkpoints", {})
+            new = [s for s in pipeline.stages if statuses.get(s.name) == COMPLETED and s.name not in checkpoints
+                   and dataset_writer.is_durable(s.name)]
+            for stage in new:
+                checkpoints[stage.name] = {
+                    "completed_at": datetime.now(timezone.utc).isoformat(),
+                    "outputs": list(stage.outputs),
+                }
+            snapshot = dict(manifest, steps=list(manifest["steps"]), checkpoints=dict(checkpoints)) if new else None
+        if snapshot is not None:
+            state_store.save_json_artifact(job_id, "manifest.json", snapshot)
 
-        # --- Step 4: Exploratory Data Analysis (EDA) ---
-        state_store.save_job_status(job_id, {"status": "running", "stage": "EDA"})
-        inferred_types = {col: 'numeric' if pd.api.types.is_numeric_dtype(df[col]) else 'categorical' for col in df.columns}
+    def save_durable_checkpoints():
+        with manifest_lock:
+            statuses = dict(stage_statuses)
+        save_checkpoints(statuses)
 
-        eda_service = EDAIntelligentService(df, inferred_types)
-        eda_artifacts = eda_service.run_automated_eda()
+    dataset_writer = DatasetWriter(state_store, job_id, on_durable=save_durable_checkpoints)
 
-        for name, artifact in eda_artifacts["json_artifacts"].items():
-            state_store.save_json_artifact(job_id, f"eda/{name}", artifact)
-        for name, fig in eda_artifacts["figure_artifacts"].items():
-            if fig is not None:
-                state_store.save_figure_artifact(job_id, f"eda/{name}", fig)
+    def report_progress(statuses, running_stages):
+        with manifest_lock:
+            stage_statuses.update(statuses)
+        save_checkpoints(statuses)
+        stage = " + ".join(s.label for s in running_stages) or "Scheduling"
+        status = "cancelling" if cancel_token.is_cancelled() else "running"
+        state_store.save_job_status(job_id, {"status": status, "stage": stage, "stages": statuses, **preview_status})
 
-        manifest["steps"].append({"step": "eda", "status": "completed"})
+    try:
+        cancel_token.raise_if_cancelled()  # cancelled while queued
+        state_store.save_job_status(job_id, {"status": "running", "stage": "Ingesting Data"})
 
-        # --- Step 5: AutoML (Conditional) ---
-        state_store.save_job_status(job_id, {"status": "running", "stage": "AutoML"})
-        if selected_target:
-            automl_service = AutoMlService(state_store)
-            automl_artifacts = automl_service.run_automl_pipeline(job_id, df, selected_target)
+        job = state_store.get_job(uuid.UUID(job_id))
+        if not job or not job.original_filename:
+            raise ValueError(f"Job or original_filename not found for job_id: {job_id}")
+
+        raw_file_bytes = state_store.load_raw_file(job_id, job.original_filename)
+        if not raw_file_bytes:
+            raise FileNotFoundError(f"Raw file not found in storage for job_id: {job_id}")
 
-            # Save artifacts
-            state_store.save_json_artifact(job_id, "automl_summary.json", automl_artifacts["summary"])
-            if automl_artifacts["best_model"]:
-                import pickle
-                model_bytes = pickle.dumps(automl_artifacts["best_model"])
-                state_store.save_report_artifact(job_id, "best_model.pkl", model_bytes) # Using save_report_artifact for simplicity
+        pipeline_cache = PipelineResultCache(state_store)
+        cache_key = pipeline_cache_key(raw_file_bytes, job.original_filename)
 
-            manifest["steps"].append({"step": "automl", "status": "completed", "result": automl_artifacts["summary"]})
+        completed_stages = []
+        if resume:
+            # --- Resume from the checkpoints of the previous run ---
+            previous = state_store.load_json_artifact(job_id, "manifest.json") or {}
+            completed_stages = _resumable_stages(previous, pipeline)
+            manifest = dict(previous, job_id=job_id, steps=previous.get("steps", []),
+                            checkpoints={name: previous["checkpoints"][name] for name in completed_stages})
+            manifest["steps"].append({"step": "resume", "status": "started", "completed_stages": completed_stages})
+            print(f"INFO: Resuming job {job_id}; reusing checkpointed stages {completed_stages}.")
         else:
-            print(f"INFO: Skipping AutoML for job_id {job_id} as no target variable was detected.")
-            manifest["steps"].append({"step": "automl", "status": "skipped", "details": "No target variable detected"})
+            # --- Pipeline Result Cache ---
+            manifest["cache"] = {"hit": False, "key": cache_key, "force_recompute": force_recompute}
+            source_job_id = None if force_recompute else pipeline_cache.lookup(cache_key)
+            if source_job_id:
+                print(f"INFO: Reusing the results of job {source_job_id} for job {job_id} (pipeline cache hit).")
+                manifest = pipeline_cache.reuse(cache_key, source_job_id, job_id)
+                state_store.save_job_status(job_id, {
+                    "status": "completed", "stage": "Finished", "mlflow_run_id": manifest.get("mlflow_run_id"),
+                    "cache_hit": True, "source_job_id": source_job_id
+                })
+                return
 
-        # --- Step 6: Report Generation ---
-        state_store.save_job_status(job_id, {"status": "running", "stage": "Report Generation"})
+        if preview and not resume:
+            # --- Fast Preview on a sample; a failed preview never fails the job ---
+            state_store.save_job_status(job_id, {"status": "running", "stage": "Preview"})
+            try:
+                manifest["preview"] = _run_preview(job_id, state_store, job.original_filename, raw_file_bytes)
+                preview_status["preview"] = "ready"
+                state_store.save_json_artifact(job_id, "manifest.json", manifest)
+                state_store.save_job_status(job_id, {"status": "preview", "stage": "Preview ready; running full analysis",
+                                                     "preview": "ready"})
+            except Exception as e:
+                print(f"WARNING: Preview failed for job_id {job_id}: {e}")
+                manifest["preview"] = {"status": "failed", "error": str(e)}
+            cancel_token.raise_if_cancelled()
 
-        final_report = {
-            "quality_report": state_store.load_json_artifact(job_id, "quality_report.json"),
-            "eda_summary": state_store.load_json_artifact(job_id, "eda/summary.json"),
-            "target_detection": state_store.load_json_artifact(job_id, "target.json"),
-            "automl_results": state_store.load_json_artifact(job_id, "automl_summary.json"),
+        # --- Stages: ingestion, cleaning, profiling, target detection, EDA, AutoML, report ---
+        context = {
+            "job_id": job_id, "state_store": state_store, "manifest": manifest, "manifest_lock": manifest_lock,
+            "original_filename": job.original_filename, "raw_file_bytes": raw_file_bytes,
+            "cancel_token": cancel_token, "dataset_writer": dataset_writer,
         }
+        with stage_monitor:
+            pipeline.run(context, max_workers=MASTER_PIPELINE_MAX_PARALLEL_STAGES, on_update=report_progress,
+                         completed=completed_stages, should_stop=cancel_token.is_cancelled)
+        dataset_writer.flush()
+        manifest["stage_metrics"] = dict(manifest.get("stage_metrics", {}), **stage_monitor.results)
 
-        state_store.save_json_artifact(job_id, "final_report.json", final_report)
-        manifest["reports"] = {"final_report_json": "final_report.json"}
-        manifest["steps"].append({"step": "report_generation", "status": "completed"})
+        # On resume, the checkpointed stages keep the durations of the run that completed them
+        durations = dict(manifest.get("stage_durations_seconds", {}), **pipeline.durations)
+        critical_path, critical_seconds = pipeline.critical_path(durations)
+        manifest["stage_durations_seconds"] = durations
+        manifest["critical_path"] = {"stages": critical_path, "seconds": critical_seconds}
 
-        # --- Step 7: Centralized Logging & Finalization ---
-        state_store.save_job_status(job_id, {"status": "running", "stage": "Finalizing"})
+        # --- Centralized Logging & Finalization ---
+        state_store.save_job_status(job_id, {"status": "running", "stage": "Finalizing", "stages": stage_statuses,
+                                             **preview_status})
+        if manifest.get("preview", {}).get("status") == "ready":
+            # The full-data artifacts replace the preview ones
+            state_store.delete_artifacts(job_id, PREVIEW_PREFIX)
+            manifest["preview"]["status"] = "replaced"
 
         with mlflow.start_run(run_name=f"job_{job_id}") as run:
             run_id = run.info.run_id
@@ -133,15 +441,33 @@ def master_pipeline_task(job_id: str):
             state_store.save_json_artifact(job_id, "manifest.json", manifest)
             mlflow.log_dict(manifest, "manifest.json")
 
-        state_store.save_job_status(job_id, {"status": "completed", "stage": "Finished", "mlflow_run_id": run_id})
+        state_store.save_job_status(job_id, {"status": "completed", "stage": "Finished", "mlflow_run_id": run_id,
+                                             "stages": stage_statuses})
+        pipeline_cache.store(cache_key, job_id)
 
+    except (JobCancelled, PipelineCancelled) as e:
+        print(f"INFO: Master pipeline cancelled for job_id {job_id}: {e}")
+        state_store.save_job_status(job_id, {"status": "cancelled", "stage": "Cancelled", "stages": stage_statuses,
+                                             "resumable": True})
+        manifest["steps"].append({"step": "cancelled", "status": "cancelled", "detail": str(e)})
     except Exception as e:
         import traceback
         traceback.print_exc()
         error_message = f"Master pipeline failed for job_id {job_id}: {e}"
         print(error_message)
-        state_store.save_job_status(job_id, {"status": "failed", "error": error_message})
+        failed_status = {"status": "failed", "error": error_message}
+        if isinstance(e, PipelineStageError):
+            failed_status.update({"stage": e.stage, "stages": stage_statuses, "resumable": True})
+        state_store.save_job_status(job_id, failed_status)
         manifest["steps"].append({"step": "error", "status": "failed", "detail": error_message})
     finally:
-        # Always save the final manifest
+        # Persist the newest dataframe snapshot even if the run stopped, so it can be resumed
+        try:
+            dataset_writer.flush()
+        except Exception as e:
+            print(f"WARNING: Could not persist the dataframe of job_id {job_id}: {e}")
+        dataset_writer.close()
+        # Always save the final manifest, with the measurements of the stages that ran
+        manifest["stage_durations_seconds"] = dict(manifest.get("stage_durations_seconds", {}), **pipeline.durations)
+        manifest["stage_metrics"] = dict(manifest.get("stage_metrics", {}), **stage_monitor.results)
         state_store.save_json_artifact(job_id, "manifest.json", manifest)